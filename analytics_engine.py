@@ -4,18 +4,60 @@ Core pricing analytics: margin decomposition, override recommendations,
 lever change impact measurement, and data integrity validation.
 """
 
+import os
 import pandas as pd
 import numpy as np
 from scipy import stats
-import json
+import sys
 import warnings
+from storage import DATA_DIR, TRANSACTIONS_DATASET, read_transactions, upcast_money
+from schema import build_star_schema, attach_attributes
+from cube import build_cube, as_cube, cube_frame, is_cube
+from data_ingestion import CUSTOMER_SEGMENTS
+from scenario_specs import evaluate_specs
+from copurchase import co_purchase_affinities, basket_risk
+from dashboard_export import EXPORT_DIR, export_panels
+from lever_detection import (
+    product_breaks, category_breaks, lever_events, detect_lever_week, multi_event_impact,
+)
+from integrity import (
+    INTEGRITY_PARAMS, INTEGRITY_RULES, cube_rules, rule_summary, cube_rule_summary,
+)
+import instrumentation
+from instrumentation import instrumented, trace
 warnings.filterwarnings("ignore")
 
 
-def load_data():
-    products = pd.read_csv("/home/claude/pricing_engine/products.csv")
-    customers = pd.read_csv("/home/claude/pricing_engine/customers.csv")
-    txns = pd.read_csv("/home/claude/pricing_engine/transactions.csv")
+@instrumented
+def load_data(data_dir=DATA_DIR, weeks=None, columns=None, layout="wide"):
+    """
+    Load the catalog, customer base and transaction history.
+
+    Transactions come from the partitioned columnar dataset when present
+    (falling back to transactions.csv). `weeks=(first, last)` and `columns`
+    are pushed down to the reader, e.g. load_data(weeks=(13, None)) reads
+    only the recent-4-week partitions used by Module 3.
+
+    layout="star" returns the transactions as a star schema (narrow fact
+    table + dimensions, see schema.py). Every module accepts either form, or
+    a prebuilt aggregation cube (cube.build_cube) to skip the raw scan.
+    """
+    products = pd.read_csv(os.path.join(data_dir, "products.csv"))
+    customers = pd.read_csv(os.path.join(data_dir, "customers.csv"))
+
+    dataset_path = os.path.join(data_dir, TRANSACTIONS_DATASET)
+    if os.path.isdir(dataset_path):
+        # Analytics run in float64; rounding to the cent restores the stored values
+        txns = upcast_money(read_transactions(dataset_path, columns=columns, weeks=weeks))
+    else:
+        txns = pd.read_csv(os.path.join(data_dir, "transactions.csv"), usecols=columns)
+        if weeks is not None:
+            lo, hi = weeks
+            txns = txns[txns["week_number"].between(lo or -np.inf, hi or np.inf)]
+    if layout == "star":
+        txns = build_star_schema(txns, products=products, customers=customers)
+    elif layout != "wide":
+        raise ValueError(f"Unknown layout: {layout!r} (expected 'wide' or 'star')")
     return products, customers, txns
 
 
@@ -23,22 +65,30 @@ def load_data():
 #  MODULE 1: PORTFOLIO HEALTH MONITOR (Weekly Pricing Review)
 # ═══════════════════════════════════════════════════════════════════════════════
 
+@instrumented
 def weekly_portfolio_summary(txns):
     """
     Produces the weekly pricing review pack — the core operating rhythm
     of a Revenue Management Analyst at Sysco.
     """
-    weekly = txns.groupby("week_number").agg(
+    cells = cube_frame(as_cube(txns), ["week_number", "customer_key", "product_key",
+                                       "net_sales", "cogs", "gross_profit_dollars",
+                                       "cases_ordered", "override_count", "txn_count"])
+    weekly = cells.groupby("week_number").agg(
         total_net_sales=("net_sales", "sum"),
         total_cogs=("cogs", "sum"),
         total_gp=("gross_profit_dollars", "sum"),
         total_cases=("cases_ordered", "sum"),
-        unique_customers=("customer_id", "nunique"),
-        unique_products=("product_id", "nunique"),
-        override_count=("has_override", "sum"),
-        transaction_count=("transaction_id", "count"),
+        unique_customers=("customer_key", "nunique"),
+        unique_products=("product_key", "nunique"),
+        override_count=("override_count", "sum"),
+        transaction_count=("txn_count", "sum"),
     ).reset_index()
+    return add_weekly_metrics(weekly)
 
+
+def add_weekly_metrics(weekly):
+    """Derived ratios and week-over-week deltas on top of the weekly sums."""
     weekly["gp_pct"] = (weekly["total_gp"] / weekly["total_net_sales"]).round(4)
     weekly["avg_price_per_case"] = (weekly["total_net_sales"] / weekly["total_cases"]).round(2)
     weekly["avg_cost_per_case"] = (weekly["total_cogs"] / weekly["total_cases"]).round(2)
@@ -54,29 +104,43 @@ def weekly_portfolio_summary(txns):
     return weekly
 
 
+@instrumented
 def category_performance(txns):
     """Category-level margin and volume analysis for the managed portfolio."""
-    cat = txns.groupby(["week_number", "category"]).agg(
+    cells = cube_frame(as_cube(txns), ["week_number", "category", "product_key", "net_sales",
+                                       "cogs", "gross_profit_dollars", "cases_ordered"])
+    cat = cells.groupby(["week_number", "category"], observed=True).agg(
         net_sales=("net_sales", "sum"),
         cogs=("cogs", "sum"),
         gp=("gross_profit_dollars", "sum"),
         cases=("cases_ordered", "sum"),
-        products=("product_id", "nunique"),
+        products=("product_key", "nunique"),
     ).reset_index()
+    return add_category_metrics(cat)
+
+
+def add_category_metrics(cat):
     cat["gp_pct"] = (cat["gp"] / cat["net_sales"]).round(4)
     cat["revenue_per_case"] = (cat["net_sales"] / cat["cases"]).round(2)
     return cat
 
 
+@instrumented
 def segment_performance(txns):
     """Customer segment-level performance tracking."""
-    seg = txns.groupby(["week_number", "segment"]).agg(
+    cells = cube_frame(as_cube(txns), ["week_number", "segment", "customer_key", "net_sales",
+                                       "cogs", "gross_profit_dollars", "cases_ordered"])
+    seg = cells.groupby(["week_number", "segment"], observed=True).agg(
         net_sales=("net_sales", "sum"),
         cogs=("cogs", "sum"),
         gp=("gross_profit_dollars", "sum"),
         cases=("cases_ordered", "sum"),
-        customers=("customer_id", "nunique"),
+        customers=("customer_key", "nunique"),
     ).reset_index()
+    return add_segment_metrics(seg)
+
+
+def add_segment_metrics(seg):
     seg["gp_pct"] = (seg["gp"] / seg["net_sales"]).round(4)
     return seg
 
@@ -85,27 +149,45 @@ def segment_performance(txns):
 #  MODULE 2: MARGIN DECOMPOSITION (Price / Cost / Mix Bridge)
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def margin_bridge(txns, period_a_weeks=(1, 6), period_b_weeks=(7, 16)):
+BRIDGE_DIMENSIONS = ["category", "segment", "customer_id", "brand", "pricing_tier"]
+BRIDGE_MEASURES = ["net_price_sum", "unit_cost_sum", "txn_count", "cases_ordered",
+                   "gross_profit_dollars"]
+
+
+@instrumented
+def margin_bridge(txns, period_a_weeks=(1, 6), period_b_weeks=(7, 16), by=("category",)):
     """
     Decomposes GP$ change between two periods into:
     - Price effect (what changed because net price moved)
     - Cost effect (what changed because cost moved)
     - Volume effect (what changed because volume moved)
     - Mix effect (residual from product/customer composition shift)
+
+    Returns the portfolio bridge and the same decomposition per `by` group
+    (see dimension_bridge).
     """
-    a = txns[txns["week_number"].between(*period_a_weeks)]
-    b = txns[txns["week_number"].between(*period_b_weeks)]
+    cube = as_cube(txns)
+    cells = cube_frame(cube, ["week_number", "product_id", "category",
+                              "net_price_sum", "unit_cost_sum", "txn_count",
+                              "cases_ordered", "net_sales", "cogs",
+                              "gross_profit_dollars"])
+    a = cells[cells["week_number"].between(*period_a_weeks)]
+    b = cells[cells["week_number"].between(*period_b_weeks)]
 
     # Aggregate by product
     def agg_period(df):
-        return df.groupby("product_id").agg(
-            avg_net_price=("net_price", "mean"),
-            avg_cost=("unit_cost", "mean"),
+        agg = df.groupby("product_id", observed=True).agg(
+            net_price_sum=("net_price_sum", "sum"),
+            unit_cost_sum=("unit_cost_sum", "sum"),
+            txn_count=("txn_count", "sum"),
             total_cases=("cases_ordered", "sum"),
             total_sales=("net_sales", "sum"),
             total_cogs=("cogs", "sum"),
             total_gp=("gross_profit_dollars", "sum"),
         ).reset_index()
+        agg.insert(1, "avg_net_price", agg.pop("net_price_sum") / agg["txn_count"])
+        agg.insert(2, "avg_cost", agg.pop("unit_cost_sum") / agg.pop("txn_count"))
+        return agg
 
     agg_a = agg_period(a)
     agg_b = agg_period(b)
@@ -151,96 +233,287 @@ def margin_bridge(txns, period_a_weeks=(1, 6), period_b_weeks=(7, 16)):
         "mix_effect": round(mix_effect, 2),
     }
 
-    # Category-level bridge
-    cat_bridge = []
-    for cat in txns["category"].unique():
-        a_cat = a[a["category"] == cat]
-        b_cat = b[b["category"] == cat]
-        if len(a_cat) == 0 or len(b_cat) == 0:
-            continue
-        gp_a = a_cat["gross_profit_dollars"].sum() / weeks_a
-        gp_b = b_cat["gross_profit_dollars"].sum() / weeks_b
-        cost_a = a_cat["unit_cost"].mean()
-        cost_b = b_cat["unit_cost"].mean()
-        price_a = a_cat["net_price"].mean()
-        price_b = b_cat["net_price"].mean()
-        cat_bridge.append({
-            "category": cat,
-            "gp_per_week_a": round(gp_a, 2),
-            "gp_per_week_b": round(gp_b, 2),
-            "gp_delta": round(gp_b - gp_a, 2),
-            "avg_cost_change_pct": round((cost_b - cost_a) / cost_a, 4),
-            "avg_price_change_pct": round((price_b - price_a) / price_a, 4),
-        })
+    return bridge, dimension_bridge(cube, by, period_a_weeks, period_b_weeks)
 
-    return bridge, pd.DataFrame(cat_bridge).sort_values("gp_delta")
+
+@instrumented
+def dimension_bridge(txns, by=("category",), period_a_weeks=(1, 6), period_b_weeks=(7, 16)):
+    """
+    Price / cost / volume / mix bridge per group of the `by` dimensions
+    (any of BRIDGE_DIMENSIONS or other cube attributes, combined when
+    several are given), in one grouped pass.
+
+    Lines are (group, product). Price, cost and volume effects are summed
+    over lines sold in both periods, exactly as in the portfolio bridge, so
+    with by=["category"] they add up to it; mix is the rest of the group's
+    GP/week change (composition shifts, new and lost lines). Groups missing
+    from either period are dropped.
+    """
+    by = list(by)
+    line_keys = by + ([] if "product_id" in by else ["product_id"])
+    cells = cube_frame(as_cube(txns), ["week_number"] + line_keys + BRIDGE_MEASURES)
+    week = cells["week_number"].to_numpy()
+    period = np.select([(week >= period_a_weeks[0]) & (week <= period_a_weeks[1]),
+                        (week >= period_b_weeks[0]) & (week <= period_b_weeks[1])],
+                       ["a", "b"], default="")
+    cells = cells[period != ""].assign(period=period[period != ""])
+    weeks = pd.Series({"a": period_a_weeks[1] - period_a_weeks[0] + 1,
+                       "b": period_b_weeks[1] - period_b_weeks[0] + 1})
+
+    # (line × period) totals, then (group × period) totals from them
+    lines = cells.groupby(line_keys + ["period"], observed=True)[BRIDGE_MEASURES].sum()
+    lines = lines.unstack("period")
+    groups = lines.groupby(level=list(range(len(by))), observed=True).sum(min_count=1)
+    groups = groups[groups[("txn_count", "a")].notna() & groups[("txn_count", "b")].notna()]
+
+    def period_avgs(table, p):
+        price = table[("net_price_sum", p)] / table[("txn_count", p)]
+        cost = table[("unit_cost_sum", p)] / table[("txn_count", p)]
+        return price, cost
+
+    # Line-level effects for lines present in both periods
+    both = lines[lines[("txn_count", "a")].notna() & lines[("txn_count", "b")].notna()]
+    price_a, cost_a = period_avgs(both, "a")
+    price_b, cost_b = period_avgs(both, "b")
+    cases_a = both[("cases_ordered", "a")] / weeks["a"]
+    cases_b = both[("cases_ordered", "b")] / weeks["b"]
+    effects = pd.DataFrame({
+        "price_effect": (price_b - price_a) * cases_a,
+        "cost_effect": -(cost_b - cost_a) * cases_a,
+        "volume_effect": (cases_b - cases_a) * (price_a - cost_a),
+    }).groupby(level=list(range(len(by))), observed=True).sum()
+
+    gp_a = groups[("gross_profit_dollars", "a")] / weeks["a"]
+    gp_b = groups[("gross_profit_dollars", "b")] / weeks["b"]
+    g_price_a, g_cost_a = period_avgs(groups, "a")
+    g_price_b, g_cost_b = period_avgs(groups, "b")
+    out = pd.DataFrame({
+        "gp_per_week_a": gp_a,
+        "gp_per_week_b": gp_b,
+        "gp_delta": gp_b - gp_a,
+        "avg_cost_change_pct": (g_cost_b - g_cost_a) / g_cost_a,
+        "avg_price_change_pct": (g_price_b - g_price_a) / g_price_a,
+    })
+    out = out.join(effects).fillna({col: 0.0 for col in effects.columns})
+    out["mix_effect"] = out["gp_delta"] - out[["price_effect", "cost_effect",
+                                               "volume_effect"]].sum(axis=1)
+    out = out.round({"gp_per_week_a": 2, "gp_per_week_b": 2, "gp_delta": 2,
+                     "avg_cost_change_pct": 4, "avg_price_change_pct": 4, "price_effect": 2,
+                     "cost_effect": 2, "volume_effect": 2, "mix_effect": 2})
+    out = out.reset_index()
+    for col in by:
+        if isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype(str)
+    return out.sort_values("gp_delta", kind="stable").reset_index(drop=True)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
 #  MODULE 3: PRICING OVERRIDE RECOMMENDATIONS
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def compute_price_sensitivity(txns):
+def _group_sum(codes, values, n_groups):
+    return np.bincount(codes, weights=values, minlength=n_groups)
+
+
+@instrumented
+def compute_price_sensitivity(txns, loglog=False):
     """
     Estimate customer-product level price sensitivity using
     historical price-volume correlation as a proxy for elasticity.
-    """
-    # Need at least 4 weeks of data per customer-product pair
-    pairs = txns.groupby(["customer_id", "product_id"]).filter(lambda x: len(x) >= 4)
 
-    sensitivities = []
-    for (cid, pid), group in pairs.groupby(["customer_id", "product_id"]):
-        if group["net_price"].std() < 0.01:
-            continue
-        price_pct_change = group["net_price"].pct_change().dropna()
-        vol_pct_change = group["cases_ordered"].pct_change().dropna()
-        if len(price_pct_change) < 3:
-            continue
-
-        corr, p_val = stats.pearsonr(price_pct_change, vol_pct_change)
-        # Elasticity proxy: vol%_change / price%_change
-        avg_elasticity = (vol_pct_change.mean() / price_pct_change.mean()
-                          if abs(price_pct_change.mean()) > 0.001 else 0)
-
-        sensitivities.append({
-            "customer_id": cid,
-            "product_id": pid,
-            "price_vol_corr": round(corr, 3),
-            "elasticity_proxy": round(np.clip(avg_elasticity, -5, 5), 3),
-            "p_value": round(p_val, 4),
-            "sensitivity_label": (
-                "High" if corr < -0.3 else
-                "Medium" if corr < -0.1 else
-                "Low"
-            ),
-        })
+    Batched: week-over-week pct changes, Pearson r, its t-distribution
+    p-value and the ratio-of-means proxy are computed for every pair at once
+    with grouped NumPy reductions. loglog=True adds a per-pair log-log
+    regression elasticity (slope of ln cases on ln price) with its standard
+    error, a steadier estimate than the ratio-of-means proxy.
+    """
+    cells = cube_frame(as_cube(txns), ["customer_id", "product_id", "net_price_sum",
+                                       "txn_count", "cases_ordered"])
+    keys = cells.groupby(["customer_id", "product_id"], observed=True, sort=True)
+    codes = keys.ngroup().to_numpy()
+    order = np.argsort(codes, kind="stable")   # pair-major, week order within pair
+    codes = codes[order]
+    price = (cells["net_price_sum"] / cells["txn_count"]).to_numpy(dtype=float)[order]
+    cases = cells["cases_ordered"].to_numpy(dtype=float)[order]
+    n_groups = codes.max() + 1 if len(codes) else 0
 
-    return pd.DataFrame(sensitivities)
+    # Need at least 4 weeks of data per customer-product pair
+    n_obs = np.bincount(codes, minlength=n_groups)
+    price_mean = _group_sum(codes, price, n_groups) / np.maximum(n_obs, 1)
+    price_ss = _group_sum(codes, (price - price_mean[codes]) ** 2, n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_std = np.sqrt(price_ss / (n_obs - 1))
+    eligible = (n_obs >= 4) & (price_std >= 0.01)
+
+    # Period-over-period changes within each pair (first row of a pair has none)
+    follows = np.r_[False, codes[1:] == codes[:-1]]
+    follows &= eligible[codes]
+    g = codes[follows]
+    x = price[follows] / price[np.flatnonzero(follows) - 1] - 1
+    y = cases[follows] / cases[np.flatnonzero(follows) - 1] - 1
+
+    n = np.bincount(g, minlength=n_groups).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_mean = _group_sum(g, x, n_groups) / n
+        y_mean = _group_sum(g, y, n_groups) / n
+        dx, dy = x - x_mean[g], y - y_mean[g]
+        sxx = _group_sum(g, dx * dx, n_groups)
+        syy = _group_sum(g, dy * dy, n_groups)
+        sxy = _group_sum(g, dx * dy, n_groups)
+        corr = np.clip(sxy / np.sqrt(sxx * syy), -1.0, 1.0)
+
+    # Pearson r is undefined when either series is constant
+    constant = np.zeros(n_groups, dtype=bool)
+    for series in (x, y):
+        lo = np.full(n_groups, np.inf)
+        hi = np.full(n_groups, -np.inf)
+        np.minimum.at(lo, g, series)
+        np.maximum.at(hi, g, series)
+        constant |= lo == hi
+    corr[constant] = np.nan
+
+    df = n - 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_stat = corr * np.sqrt(df / (1 - corr ** 2))
+    p_val = 2 * stats.t.sf(np.abs(t_stat), df)
+    p_val[np.abs(corr) == 1] = 0.0
+
+    # Elasticity proxy: vol%_change / price%_change
+    with np.errstate(divide="ignore", invalid="ignore"):
+        elasticity = np.where(np.abs(x_mean) > 0.001, y_mean / x_mean, 0.0)
+
+    sel = np.flatnonzero(eligible & (n >= 3))
+    if len(sel) == 0:
+        return pd.DataFrame()
 
+    pair_keys = keys.size().index
+    corr_sel = corr[sel]
+    result = pd.DataFrame({
+        "customer_id": pair_keys.get_level_values("customer_id")[sel],
+        "product_id": pair_keys.get_level_values("product_id")[sel],
+        "price_vol_corr": np.round(corr_sel, 3),
+        "elasticity_proxy": np.round(np.clip(elasticity[sel], -5, 5), 3),
+        "p_value": np.round(p_val[sel], 4),
+        "sensitivity_label": np.select(
+            [corr_sel < -0.3, corr_sel < -0.1], ["High", "Medium"], default="Low"),
+    })
 
-def generate_override_recommendations(txns, gp_floor=0.18):
+    if loglog:
+        # OLS of ln(cases) on ln(price) over the pair's weekly observations
+        lx, ly = np.log(price), np.log(cases)
+        lx_mean = _group_sum(codes, lx, n_groups) / np.maximum(n_obs, 1)
+        ly_mean = _group_sum(codes, ly, n_groups) / np.maximum(n_obs, 1)
+        ldx, ldy = lx - lx_mean[codes], ly - ly_mean[codes]
+        lsxx = _group_sum(codes, ldx * ldx, n_groups)
+        lsyy = _group_sum(codes, ldy * ldy, n_groups)
+        lsxy = _group_sum(codes, ldx * ldy, n_groups)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = lsxy / lsxx
+            resid_var = np.maximum(lsyy - slope * lsxy, 0) / (n_obs - 2)
+            slope_se = np.sqrt(resid_var / lsxx)
+        result["loglog_elasticity"] = np.round(slope[sel], 3)
+        result["loglog_elasticity_se"] = np.round(slope_se[sel], 3)
+
+    return result
+
+
+# Volume-risk tiers by required price increase: a pair falls in the first tier
+# whose max_increase_pct exceeds its increase. Edit the table to re-tier.
+OVERRIDE_RISK_RULES = pd.DataFrame([
+    {"max_increase_pct": 0.02,   "volume_risk": "Low",         "confidence": "High",   "est_vol_loss": 0.01},
+    {"max_increase_pct": 0.05,   "volume_risk": "Medium",      "confidence": "Medium", "est_vol_loss": 0.04},
+    {"max_increase_pct": 0.10,   "volume_risk": "Medium-High", "confidence": "Medium", "est_vol_loss": 0.08},
+    {"max_increase_pct": np.inf, "volume_risk": "High",        "confidence": "Low",    "est_vol_loss": 0.15},
+])
+# Non-commodity increases above this are flagged as structural reprices
+REASON_STRUCTURAL_PCT = 0.08
+
+
+@instrumented
+def override_candidates(txns, recent_from=13):
     """
-    Core override recommendation engine.
-    Identifies customer-product pairs below GP target and recommends
-    specific price actions with impact estimates and confidence levels.
+    Customer-product stats over the recent weeks (the input to every override
+    calculation): average price and cost, totals, weeks ordered, descriptors
+    and current GP%. Aggregated once so many floors can be evaluated on it.
     """
+    cube = as_cube(txns)
+    cells = cube_frame(cube, ["week_number", "customer_id", "product_id", "net_price_sum",
+                              "unit_cost_sum", "txn_count", "cases_ordered", "net_sales",
+                              "cogs", "gross_profit_dollars"])
+
     # Focus on recent 4 weeks
-    recent = txns[txns["week_number"] >= 13]
-
-    # Aggregate at customer-product level
-    cp = recent.groupby(["customer_id", "customer_name", "segment",
-                          "product_id", "description", "category",
-                          "is_commodity", "pricing_tier"]).agg(
-        avg_net_price=("net_price", "mean"),
-        avg_cost=("unit_cost", "mean"),
+    recent = cells[cells["week_number"] >= recent_from]
+
+    # Aggregate at customer-product level; descriptors are joined afterwards
+    cp = recent.groupby(["customer_id", "product_id"], observed=True).agg(
+        net_price_sum=("net_price_sum", "sum"),
+        unit_cost_sum=("unit_cost_sum", "sum"),
+        txn_count=("txn_count", "sum"),
         total_cases=("cases_ordered", "sum"),
         total_sales=("net_sales", "sum"),
         total_cogs=("cogs", "sum"),
         total_gp=("gross_profit_dollars", "sum"),
         weeks_ordered=("week_number", "nunique"),
     ).reset_index()
+    cp.insert(2, "avg_net_price", cp.pop("net_price_sum") / cp["txn_count"])
+    cp.insert(3, "avg_cost", cp.pop("unit_cost_sum") / cp.pop("txn_count"))
+    cp = attach_attributes(cp, cube, ["customer_name", "segment", "description",
+                                      "category", "is_commodity", "pricing_tier"])
 
     cp["current_gp_pct"] = cp["total_gp"] / cp["total_sales"]
+    return cp
+
+
+def _override_projection(cp, gp_floor, risk_rules):
+    """
+    Required price, risk tier and weekly GP uplift for candidate pairs at
+    `gp_floor`. The floor may be a scalar, a per-pair vector, or a
+    (pairs × floors) matrix; results broadcast to the floor's shape.
+    """
+    floor = np.asarray(gp_floor, dtype=float)
+    col = (lambda name: cp[name].to_numpy(dtype=float)[:, None]) if floor.ndim == 2 else \
+          (lambda name: cp[name].to_numpy(dtype=float))
+    avg_cost, avg_price = col("avg_cost"), col("avg_net_price")
+    weeks = col("weeks_ordered")
+
+    required_price = avg_cost / (1 - floor)
+    price_increase_needed = required_price - avg_price
+    price_increase_pct = price_increase_needed / avg_price
+    tier = np.searchsorted(risk_rules["max_increase_pct"].to_numpy(),
+                           price_increase_pct, side="right")
+    est_vol_loss = risk_rules["est_vol_loss"].to_numpy()[tier]
+
+    weekly_cases = col("total_cases") / weeks
+    projected_new_vol = weekly_cases * (1 - est_vol_loss)
+    projected_new_gp = projected_new_vol * required_price - projected_new_vol * avg_cost
+    gp_uplift = projected_new_gp - col("total_gp") / weeks
+    return {
+        "below_floor": col("current_gp_pct") < floor,
+        "required_price": required_price,
+        "price_increase_needed": price_increase_needed,
+        "price_increase_pct": price_increase_pct,
+        "tier": tier,
+        "est_vol_loss": est_vol_loss,
+        "weekly_cases": weekly_cases,
+        "gp_uplift": gp_uplift,
+    }
+
+
+@instrumented
+def generate_override_recommendations(txns, gp_floor=0.18, risk_rules=OVERRIDE_RISK_RULES,
+                                      basket_k=10):
+    """
+    Core override recommendation engine.
+    Identifies customer-product pairs below GP target and recommends
+    specific price actions with impact estimates and confidence levels.
+    Risk tiering comes from the `risk_rules` table (sorted by
+    max_increase_pct, last tier unbounded); every step is a column operation.
+    Each line also carries its basket risk: the customer's weekly GP$ on the
+    SKU's top-`basket_k` co-purchase partners (None to skip), and that GP
+    scaled by the tier's volume loss as an expected annual exposure.
+    """
+    cube = as_cube(txns)   # built once for the candidates and the basket indexes
+    cp = override_candidates(cube)
     cp["gp_gap"] = cp["current_gp_pct"] - gp_floor
 
     # Filter: below floor
@@ -249,169 +522,235 @@ def generate_override_recommendations(txns, gp_floor=0.18):
     if len(below_target) == 0:
         return pd.DataFrame()
 
-    recommendations = []
-    for _, row in below_target.iterrows():
-        # Calculate required price to hit floor
-        required_price = row["avg_cost"] / (1 - gp_floor)
-        price_increase_needed = required_price - row["avg_net_price"]
-        price_increase_pct = price_increase_needed / row["avg_net_price"]
-
-        # Estimate volume risk based on increase magnitude
-        if price_increase_pct < 0.02:
-            vol_risk = "Low"
-            confidence = "High"
-            est_vol_loss = 0.01
-        elif price_increase_pct < 0.05:
-            vol_risk = "Medium"
-            confidence = "Medium"
-            est_vol_loss = 0.04
-        elif price_increase_pct < 0.10:
-            vol_risk = "Medium-High"
-            confidence = "Medium"
-            est_vol_loss = 0.08
-        else:
-            vol_risk = "High"
-            confidence = "Low"
-            est_vol_loss = 0.15
-
-        # Projected impact
-        weekly_cases = row["total_cases"] / row["weeks_ordered"]
-        projected_new_vol = weekly_cases * (1 - est_vol_loss)
-        projected_new_sales = projected_new_vol * required_price
-        projected_new_cogs = projected_new_vol * row["avg_cost"]
-        projected_new_gp = projected_new_sales - projected_new_cogs
-        current_weekly_gp = row["total_gp"] / row["weeks_ordered"]
-        gp_uplift = projected_new_gp - current_weekly_gp
-
-        # Reason code
-        if row["is_commodity"]:
-            reason = "Commodity cost pass-through required"
-        elif price_increase_pct > 0.08:
-            reason = "Significant margin erosion — structural reprice needed"
-        else:
-            reason = "Below-target margin — standard override recommended"
-
-        recommendations.append({
-            "customer_id": row["customer_id"],
-            "customer_name": row["customer_name"],
-            "segment": row["segment"],
-            "product_id": row["product_id"],
-            "description": row["description"],
-            "category": row["category"],
-            "is_commodity": row["is_commodity"],
-            "pricing_tier": row["pricing_tier"],
-            "current_net_price": round(row["avg_net_price"], 2),
-            "current_cost": round(row["avg_cost"], 2),
-            "current_gp_pct": round(row["current_gp_pct"], 4),
-            "target_gp_pct": gp_floor,
-            "gp_gap_bps": round(row["gp_gap"] * 10000),
-            "recommended_price": round(required_price, 2),
-            "price_change_dollars": round(price_increase_needed, 2),
-            "price_change_pct": round(price_increase_pct, 4),
-            "weekly_cases_current": round(weekly_cases, 1),
-            "est_volume_loss_pct": est_vol_loss,
-            "volume_risk": vol_risk,
-            "confidence": confidence,
-            "projected_weekly_gp_uplift": round(gp_uplift, 2),
-            "projected_annual_gp_impact": round(gp_uplift * 52, 2),
-            "reason_code": reason,
-            "action": "OVERRIDE_UP",
-        })
+    # Required price to hit the floor, tiered by how large the move is
+    proj = _override_projection(below_target, gp_floor, risk_rules)
+    tier = risk_rules.iloc[proj["tier"]]
+    price_increase_pct = pd.Series(proj["price_increase_pct"], index=below_target.index)
+
+    # Reason code: first matching rule wins
+    reason = np.select(
+        [below_target["is_commodity"].astype(bool).to_numpy(),
+         (price_increase_pct > REASON_STRUCTURAL_PCT).to_numpy()],
+        ["Commodity cost pass-through required",
+         "Significant margin erosion — structural reprice needed"],
+        default="Below-target margin — standard override recommended",
+    )
 
-    rec_df = pd.DataFrame(recommendations)
-    rec_df = rec_df.sort_values("projected_annual_gp_impact", ascending=False)
-    return rec_df
+    rec_df = below_target[["customer_id", "customer_name", "segment", "product_id",
+                           "description", "category", "is_commodity", "pricing_tier"]].copy()
+    rec_df["current_net_price"] = below_target["avg_net_price"].round(2)
+    rec_df["current_cost"] = below_target["avg_cost"].round(2)
+    rec_df["current_gp_pct"] = below_target["current_gp_pct"].round(4)
+    rec_df["target_gp_pct"] = gp_floor
+    rec_df["gp_gap_bps"] = (below_target["gp_gap"] * 10000).round().astype(int)
+    rec_df["recommended_price"] = proj["required_price"].round(2)
+    rec_df["price_change_dollars"] = proj["price_increase_needed"].round(2)
+    rec_df["price_change_pct"] = price_increase_pct.round(4)
+    rec_df["weekly_cases_current"] = proj["weekly_cases"].round(1)
+    rec_df["est_volume_loss_pct"] = proj["est_vol_loss"]
+    rec_df["volume_risk"] = tier["volume_risk"].to_numpy()
+    rec_df["confidence"] = tier["confidence"].to_numpy()
+    rec_df["projected_weekly_gp_uplift"] = proj["gp_uplift"].round(2)
+    rec_df["projected_annual_gp_impact"] = (proj["gp_uplift"] * 52).round(2)
+    if basket_k:
+        exposure = basket_risk(cube, below_target["customer_id"], below_target["product_id"],
+                               k=basket_k)
+        rec_df["basket_affine_skus"] = exposure["affine_skus"]
+        rec_df["basket_gp_at_risk_weekly"] = exposure["weekly_gp_at_risk"].round(2)
+        rec_df["basket_risk_annual"] = (exposure["weekly_gp_at_risk"]
+                                        * proj["est_vol_loss"] * 52).round(2)
+    rec_df["reason_code"] = reason
+    rec_df["action"] = "OVERRIDE_UP"
+
+    rec_df = rec_df.sort_values("projected_annual_gp_impact", ascending=False, kind="stable")
+    return rec_df.reset_index(drop=True)
+
+
+def segment_floor_map():
+    """Per-segment GP floors from the customer segment margin targets."""
+    return {seg: cfg["margin_target"] for seg, cfg in CUSTOMER_SEGMENTS.items()}
+
+
+@instrumented
+def override_floor_sweep(txns, floors=None, segment_floors=None, by=None,
+                         risk_rules=OVERRIDE_RISK_RULES):
+    """
+    Override recommendations for many GP floors in one call.
+
+    Customer-product stats are aggregated once; every floor is a column of a
+    (pairs × floors) floor matrix and the projection broadcasts across it.
+    `floors` is a vector of uniform floors (default 14%–24% in 1pt steps,
+    pass [] for none); `segment_floors` is a {segment: floor} map evaluated
+    as one extra
+    scenario labelled "segment targets" (True uses segment_floor_map()).
+    `by` optionally breaks results down by a pair attribute, e.g. "segment".
+
+    Returns a tidy frame: one row per floor scenario (× `by` group) with
+    recommendation counts, confidence mix and annual GP impact.
+    """
+    cp = override_candidates(txns)
+    if floors is None:
+        floors = np.round(np.arange(0.14, 0.2401, 0.01), 2)
+    floors = list(floors)
+    labels = [f"{f:.0%}" for f in floors]
+    columns = [np.full(len(cp), f, dtype=float) for f in floors]
+    if segment_floors is not None:
+        if segment_floors is True:
+            segment_floors = segment_floor_map()
+        labels.append("segment targets")
+        columns.append(cp["segment"].astype(str).map(segment_floors).to_numpy(dtype=float))
+    floor_matrix = np.column_stack(columns)
+
+    proj = _override_projection(cp, floor_matrix, risk_rules)
+    below = proj["below_floor"]
+    confidence = risk_rules["confidence"].to_numpy()[proj["tier"]]
+    annual = np.where(below, proj["gp_uplift"] * 52, 0.0)
+    weights = {
+        "recommendations": below,
+        "high_confidence": below & (confidence == "High"),
+        "medium_confidence": below & (confidence == "Medium"),
+        "low_confidence": below & (confidence == "Low"),
+        "annual_gp_impact": annual,
+        "price_change_pct_sum": np.where(below, proj["price_increase_pct"], 0.0),
+    }
+
+    if by is None:
+        group_codes, groups = np.zeros(len(cp), dtype=np.intp), [None]
+    else:
+        group_codes, groups = pd.factorize(cp[by], sort=True)
+    n_groups, n_floors = len(groups), floor_matrix.shape[1]
+    # Σ over pairs within each group, for every floor: (groups × floors)
+    totals = {name: np.stack([_group_sum(group_codes, w[:, j].astype(float), n_groups)
+                              for j in range(n_floors)], axis=1)
+              for name, w in weights.items()}
+
+    sweep = pd.DataFrame({
+        "floor": np.tile(labels, n_groups),
+        "gp_floor": np.tile([float(f) for f in floors] + ([np.nan] if segment_floors is not None else []),
+                            n_groups),
+    })
+    if by is not None:
+        sweep.insert(2, by, np.repeat(np.asarray(groups, dtype=object), n_floors))
+    for name in ["recommendations", "high_confidence", "medium_confidence", "low_confidence"]:
+        sweep[name] = totals[name].ravel().astype(int)
+    sweep["annual_gp_impact"] = totals["annual_gp_impact"].ravel().round(2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sweep["avg_price_change_pct"] = (totals["price_change_pct_sum"].ravel()
+                                         / totals["recommendations"].ravel()).round(4)
+    return sweep
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
 #  MODULE 4: PRICING LEVER CHANGE IMPACT ANALYSIS
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def lever_change_impact(txns):
+def _period_pivot(cells, entity):
+    """
+    One grouped pass over (entity, period, is_commodity) → wide table with a
+    column per measure × period × commodity flag (missing combos are 0).
+    """
+    keys = ([entity] if entity else []) + ["period", "is_commodity"]
+    sums = cells.groupby(keys, observed=True)[
+        ["gross_profit_dollars", "net_sales", "cases_ordered",
+         "unit_cost_sum", "net_price_sum", "txn_count"]].sum()
+    return sums.unstack(["period", "is_commodity"], fill_value=0) if entity else sums
+
+
+@instrumented
+def lever_change_impact(txns, lever_week=7):
     """
     Identifies the commodity cost increase (lever shift) at Week 7
     and measures its downstream impact on profitability, volume, and basket.
     This is the core "pricing lever change impact" analysis.
+
+    `lever_week` is the first post-lever week; per-week rates divide by the
+    number of weeks actually observed in each period.
     """
-    pre = txns[(txns["week_number"] <= 6)]
-    post = txns[(txns["week_number"] >= 7)]
+    cube = as_cube(txns)
+    cells = cube_frame(cube, ["week_number", "customer_id", "category", "is_commodity",
+                              "txn_count", "cases_ordered", "unit_cost_sum",
+                              "net_price_sum", "net_sales", "gross_profit_dollars"])
+    cells["is_commodity"] = cells["is_commodity"].astype(bool)
+    cells["period"] = np.where(cells["week_number"] >= lever_week, "post", "pre")
+    period_weeks = cells.groupby("period")["week_number"].agg(["min", "max", "nunique"])
+    n_weeks = period_weeks["nunique"]
 
     # --- Aggregate impact by commodity vs non-commodity ---
-    def period_stats(df, label):
-        comm = df[df["is_commodity"] == True]
-        non_comm = df[df["is_commodity"] == False]
-        n_weeks = df["week_number"].nunique()
+    totals = _period_pivot(cells, None)
+
+    def measure(period, commodity, col):
+        key = (period, commodity)
+        return totals.loc[key, col] if key in totals.index else 0
+
+    def period_stats(period, label):
+        weeks = n_weeks[period]
+        comm = {col: measure(period, True, col) for col in totals.columns}
+        non_comm = {col: measure(period, False, col) for col in totals.columns}
+        blended_gp = comm["gross_profit_dollars"] + non_comm["gross_profit_dollars"]
+        blended_sales = comm["net_sales"] + non_comm["net_sales"]
         return {
             "period": label,
-            "weeks": n_weeks,
-            "commodity_gp_pct": round(comm["gross_profit_dollars"].sum() / comm["net_sales"].sum(), 4) if comm["net_sales"].sum() > 0 else 0,
-            "non_commodity_gp_pct": round(non_comm["gross_profit_dollars"].sum() / non_comm["net_sales"].sum(), 4) if non_comm["net_sales"].sum() > 0 else 0,
-            "blended_gp_pct": round(df["gross_profit_dollars"].sum() / df["net_sales"].sum(), 4),
-            "commodity_sales_per_wk": round(comm["net_sales"].sum() / n_weeks, 2),
-            "non_commodity_sales_per_wk": round(non_comm["net_sales"].sum() / n_weeks, 2),
-            "commodity_cases_per_wk": round(comm["cases_ordered"].sum() / n_weeks, 0),
-            "non_commodity_cases_per_wk": round(non_comm["cases_ordered"].sum() / n_weeks, 0),
-            "commodity_avg_cost": round(comm["unit_cost"].mean(), 2),
-            "non_commodity_avg_cost": round(non_comm["unit_cost"].mean(), 2),
-            "commodity_avg_price": round(comm["net_price"].mean(), 2),
-            "non_commodity_avg_price": round(non_comm["net_price"].mean(), 2),
+            "weeks": int(weeks),
+            "commodity_gp_pct": round(comm["gross_profit_dollars"] / comm["net_sales"], 4) if comm["net_sales"] > 0 else 0,
+            "non_commodity_gp_pct": round(non_comm["gross_profit_dollars"] / non_comm["net_sales"], 4) if non_comm["net_sales"] > 0 else 0,
+            "blended_gp_pct": round(blended_gp / blended_sales, 4),
+            "commodity_sales_per_wk": round(comm["net_sales"] / weeks, 2),
+            "non_commodity_sales_per_wk": round(non_comm["net_sales"] / weeks, 2),
+            "commodity_cases_per_wk": round(comm["cases_ordered"] / weeks, 0),
+            "non_commodity_cases_per_wk": round(non_comm["cases_ordered"] / weeks, 0),
+            "commodity_avg_cost": round(comm["unit_cost_sum"] / comm["txn_count"], 2),
+            "non_commodity_avg_cost": round(non_comm["unit_cost_sum"] / non_comm["txn_count"], 2),
+            "commodity_avg_price": round(comm["net_price_sum"] / comm["txn_count"], 2),
+            "non_commodity_avg_price": round(non_comm["net_price_sum"] / non_comm["txn_count"], 2),
         }
 
-    pre_stats = period_stats(pre, "Pre-Lever (Wk 1-6)")
-    post_stats = period_stats(post, "Post-Lever (Wk 7-16)")
-
-    # --- Customer-level impact ---
-    cust_impact = []
-    for cid in txns["customer_id"].unique():
-        c_pre = pre[(pre["customer_id"] == cid) & (pre["is_commodity"] == True)]
-        c_post = post[(post["customer_id"] == cid) & (post["is_commodity"] == True)]
-        if len(c_pre) == 0 or len(c_post) == 0:
-            continue
-
-        gp_pct_pre = c_pre["gross_profit_dollars"].sum() / c_pre["net_sales"].sum()
-        gp_pct_post = c_post["gross_profit_dollars"].sum() / c_post["net_sales"].sum()
-        vol_pre = c_pre["cases_ordered"].sum() / 6
-        vol_post = c_post["cases_ordered"].sum() / 10
-
-        cust_name = txns[txns["customer_id"] == cid]["customer_name"].iloc[0]
-        segment = txns[txns["customer_id"] == cid]["segment"].iloc[0]
-
-        cust_impact.append({
-            "customer_id": cid,
-            "customer_name": cust_name,
-            "segment": segment,
-            "commodity_gp_pct_pre": round(gp_pct_pre, 4),
-            "commodity_gp_pct_post": round(gp_pct_post, 4),
-            "gp_erosion_bps": round((gp_pct_post - gp_pct_pre) * 10000),
-            "commodity_cases_per_wk_pre": round(vol_pre, 1),
-            "commodity_cases_per_wk_post": round(vol_post, 1),
-            "volume_change_pct": round((vol_post - vol_pre) / vol_pre, 4) if vol_pre > 0 else 0,
-        })
-
-    cust_impact_df = pd.DataFrame(cust_impact).sort_values("gp_erosion_bps")
-
-    # --- Category-level impact (commodity only) ---
-    cat_impact = []
-    for cat in txns[txns["is_commodity"] == True]["category"].unique():
-        c_pre = pre[(pre["category"] == cat) & (pre["is_commodity"] == True)]
-        c_post = post[(post["category"] == cat) & (post["is_commodity"] == True)]
-        if len(c_pre) == 0 or len(c_post) == 0:
-            continue
-
-        gp_pre = c_pre["gross_profit_dollars"].sum() / 6
-        gp_post = c_post["gross_profit_dollars"].sum() / 10
-        cost_pre = c_pre["unit_cost"].mean()
-        cost_post = c_post["unit_cost"].mean()
-
-        cat_impact.append({
-            "category": cat,
-            "weekly_gp_pre": round(gp_pre, 2),
-            "weekly_gp_post": round(gp_post, 2),
-            "gp_delta_per_week": round(gp_post - gp_pre, 2),
-            "avg_cost_increase_pct": round((cost_post - cost_pre) / cost_pre, 4),
-        })
-
-    cat_impact_df = pd.DataFrame(cat_impact).sort_values("gp_delta_per_week")
+    def label(period, name):
+        lo, hi = period_weeks.loc[period, "min"], period_weeks.loc[period, "max"]
+        return f"{name} (Wk {lo}-{hi})"
+
+    pre_stats = period_stats("pre", label("pre", "Pre-Lever"))
+    post_stats = period_stats("post", label("post", "Post-Lever"))
+
+    # --- Customer / category impact (commodity only): one pivot per entity ---
+    def commodity_pivot(entity):
+        wide = _period_pivot(cells, entity)
+        cols = {}
+        for col in ["gross_profit_dollars", "net_sales", "cases_ordered",
+                    "unit_cost_sum", "txn_count"]:
+            for period in ["pre", "post"]:
+                key = (col, period, True)
+                cols[f"{col}_{period}"] = wide[key] if key in wide.columns else 0
+        out = pd.DataFrame(cols, index=wide.index)
+        # Entity needs commodity activity on both sides of the lever
+        return out[(out["txn_count_pre"] > 0) & (out["txn_count_post"] > 0)].reset_index()
+
+    cust = commodity_pivot("customer_id")
+    gp_pct_pre = cust["gross_profit_dollars_pre"] / cust["net_sales_pre"]
+    gp_pct_post = cust["gross_profit_dollars_post"] / cust["net_sales_post"]
+    vol_pre = cust["cases_ordered_pre"] / n_weeks["pre"]
+    vol_post = cust["cases_ordered_post"] / n_weeks["post"]
+    cust_impact_df = attach_attributes(pd.DataFrame({
+        "customer_id": cust["customer_id"],
+        "commodity_gp_pct_pre": gp_pct_pre.round(4),
+        "commodity_gp_pct_post": gp_pct_post.round(4),
+        "gp_erosion_bps": ((gp_pct_post - gp_pct_pre) * 10000).round().astype(int),
+        "commodity_cases_per_wk_pre": vol_pre.round(1),
+        "commodity_cases_per_wk_post": vol_post.round(1),
+        "volume_change_pct": ((vol_post - vol_pre) / vol_pre).where(vol_pre > 0, 0).round(4),
+    }), cube, ["customer_name", "segment"]).sort_values("gp_erosion_bps", kind="stable")
+
+    cat = commodity_pivot("category")
+    gp_pre = cat["gross_profit_dollars_pre"] / n_weeks["pre"]
+    gp_post = cat["gross_profit_dollars_post"] / n_weeks["post"]
+    cost_pre = cat["unit_cost_sum_pre"] / cat["txn_count_pre"]
+    cost_post = cat["unit_cost_sum_post"] / cat["txn_count_post"]
+    cat_impact_df = pd.DataFrame({
+        "category": cat["category"],
+        "weekly_gp_pre": gp_pre.round(2),
+        "weekly_gp_post": gp_post.round(2),
+        "gp_delta_per_week": (gp_post - gp_pre).round(2),
+        "avg_cost_increase_pct": ((cost_post - cost_pre) / cost_pre).round(4),
+    }).sort_values("gp_delta_per_week", kind="stable")
 
     return {
         "pre_period": pre_stats,
@@ -425,122 +764,90 @@ def lever_change_impact(txns):
 #  MODULE 5: SCENARIO MODELING
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def scenario_analysis(txns):
-    """
-    Models three pricing scenarios for commodity pass-through:
-    A) Full pass-through (100% cost increase passed to customer)
-    B) Targeted overrides by segment (differentiated approach)
-    C) Temporary hold with triggers (absorb short-term, plan recovery)
-    """
-    recent = txns[txns["week_number"] >= 13]
-    commodity = recent[recent["is_commodity"] == True]
-
-    # Baseline
-    base_sales = commodity["net_sales"].sum()
-    base_cogs = commodity["cogs"].sum()
-    base_gp = commodity["gross_profit_dollars"].sum()
-    base_cases = commodity["cases_ordered"].sum()
-    base_gp_pct = base_gp / base_sales
-
-    scenarios = []
-
-    # Scenario A: Full Pass-Through
-    avg_cost_increase = 0.04  # ~4% commodity cost increase
-    new_price_a = commodity["net_price"] * (1 + avg_cost_increase)
-    vol_loss_a = 0.06  # 6% volume loss from full pass-through
-    projected_cases_a = base_cases * (1 - vol_loss_a)
-    projected_sales_a = (new_price_a * commodity["cases_ordered"] * (1 - vol_loss_a)).sum()
-    projected_cogs_a = base_cogs * (1 - vol_loss_a)
-    projected_gp_a = projected_sales_a - projected_cogs_a
-
-    scenarios.append({
-        "scenario": "A: Full Pass-Through",
+# Point assumptions behind the three scenarios (also the centres of the
+# Monte Carlo distributions in monte_carlo.py)
+PASS_THROUGH_COST_INCREASE = 0.04   # ~4% commodity cost increase
+PASS_THROUGH_VOL_LOSS = 0.06        # 6% volume loss from full pass-through
+SEGMENT_PASS_THROUGH_RATES = {
+    "Healthcare": 0.035,
+    "Senior Living": 0.030,
+    "Restaurant/FSR": 0.020,
+    "K-12 Education": 0.015,
+    "Corrections/Government": 0.010,
+}
+SEGMENT_VOL_LOSS = {
+    "Healthcare": 0.02,
+    "Senior Living": 0.03,
+    "Restaurant/FSR": 0.05,
+    "K-12 Education": 0.08,
+    "Corrections/Government": 0.10,
+}
+HOLD_WEEKS = 4
+HOLD_VOL_GAIN = 0.03                # volume boost from holding price
+
+
+SCENARIO_SPECS = [
+    {
+        "name": "A: Full Pass-Through",
         "description": "Pass 100% of cost increase to all customers. Simple, transparent, but risks volume loss in price-sensitive segments.",
-        "price_action": f"+{avg_cost_increase:.1%} across all commodity items",
-        "projected_sales": round(projected_sales_a, 2),
-        "projected_cogs": round(projected_cogs_a, 2),
-        "projected_gp": round(projected_gp_a, 2),
-        "projected_gp_pct": round(projected_gp_a / projected_sales_a, 4),
-        "projected_volume": round(projected_cases_a, 0),
-        "volume_change_pct": round(-vol_loss_a, 4),
-        "gp_vs_baseline": round(projected_gp_a - base_gp, 2),
+        "price_action": f"+{PASS_THROUGH_COST_INCREASE:.1%} across all commodity items",
+        "price": PASS_THROUGH_COST_INCREASE,
+        "volume": -PASS_THROUGH_VOL_LOSS,
+        "cost_pass_through": True,
+        "volume_shock": "pass_through_loss",
         "risk_level": "Medium",
         "best_for": "Segments with low price sensitivity (Healthcare, Senior Living)",
-    })
-
-    # Scenario B: Targeted by Segment
-    seg_rates = {
-        "Healthcare": 0.035,
-        "Senior Living": 0.030,
-        "Restaurant/FSR": 0.020,
-        "K-12 Education": 0.015,
-        "Corrections/Government": 0.010,
-    }
-    seg_vol_loss = {
-        "Healthcare": 0.02,
-        "Senior Living": 0.03,
-        "Restaurant/FSR": 0.05,
-        "K-12 Education": 0.08,
-        "Corrections/Government": 0.10,
-    }
-
-    proj_sales_b = 0
-    proj_cogs_b = 0
-    proj_cases_b = 0
-    for seg, rate in seg_rates.items():
-        seg_data = commodity[commodity["segment"] == seg]
-        if len(seg_data) == 0:
-            continue
-        new_prices = seg_data["net_price"] * (1 + rate)
-        vl = seg_vol_loss[seg]
-        seg_proj_sales = (new_prices * seg_data["cases_ordered"] * (1 - vl)).sum()
-        seg_proj_cogs = seg_data["cogs"].sum() * (1 - vl)
-        seg_proj_cases = seg_data["cases_ordered"].sum() * (1 - vl)
-        proj_sales_b += seg_proj_sales
-        proj_cogs_b += seg_proj_cogs
-        proj_cases_b += seg_proj_cases
-
-    proj_gp_b = proj_sales_b - proj_cogs_b
-    total_vol_loss_b = (base_cases - proj_cases_b) / base_cases
-
-    scenarios.append({
-        "scenario": "B: Targeted Overrides",
+    },
+    {
+        "name": "B: Targeted Overrides",
         "description": "Differentiated pass-through by segment. Higher recovery from low-sensitivity accounts, protect volume with price-sensitive segments.",
         "price_action": "Healthcare +3.5%, Senior Living +3.0%, FSR +2.0%, K-12 +1.5%, Gov +1.0%",
-        "projected_sales": round(proj_sales_b, 2),
-        "projected_cogs": round(proj_cogs_b, 2),
-        "projected_gp": round(proj_gp_b, 2),
-        "projected_gp_pct": round(proj_gp_b / proj_sales_b, 4) if proj_sales_b > 0 else 0,
-        "projected_volume": round(proj_cases_b, 0),
-        "volume_change_pct": round(-total_vol_loss_b, 4),
-        "gp_vs_baseline": round(proj_gp_b - base_gp, 2),
+        "price": {"segment": SEGMENT_PASS_THROUGH_RATES},
+        "volume": {"segment": {seg: -loss for seg, loss in SEGMENT_VOL_LOSS.items()}},
+        "volume_shock": "segment_loss",
         "risk_level": "Low-Medium",
         "best_for": "Balanced approach — maximizes GP recovery while managing churn risk",
-    })
-
-    # Scenario C: Temporary Hold
-    hold_weeks = 4
-    vol_gain_c = 0.03  # volume boost from holding price
-    projected_cases_c = base_cases * (1 + vol_gain_c)
-    projected_sales_c = base_sales * (1 + vol_gain_c)
-    projected_cogs_c = base_cogs * (1 + vol_gain_c)
-    projected_gp_c = projected_sales_c - projected_cogs_c
-
-    scenarios.append({
-        "scenario": "C: Temporary Hold + Trigger Plan",
-        "description": f"Absorb cost increase for {hold_weeks} weeks to lock volume. Implement phased increase if commodity index stays elevated past trigger date.",
+    },
+    {
+        "name": "C: Temporary Hold + Trigger Plan",
+        "description": f"Absorb cost increase for {HOLD_WEEKS} weeks to lock volume. Implement phased increase if commodity index stays elevated past trigger date.",
         "price_action": "No change for 4 weeks; +2.5% if commodity cost persists; +4% at week 8",
-        "projected_sales": round(projected_sales_c, 2),
-        "projected_cogs": round(projected_cogs_c, 2),
-        "projected_gp": round(projected_gp_c, 2),
-        "projected_gp_pct": round(projected_gp_c / projected_sales_c, 4) if projected_sales_c > 0 else 0,
-        "projected_volume": round(projected_cases_c, 0),
-        "volume_change_pct": round(vol_gain_c, 4),
-        "gp_vs_baseline": round(projected_gp_c - base_gp, 2),
+        # The projection covers the hold window only
+        "phases": [{"weeks": HOLD_WEEKS, "volume": HOLD_VOL_GAIN}],
+        "volume_shock": "hold_gain",
         "risk_level": "High (short-term GP drag)",
         "best_for": "Competitive defense — protect share during volatile period",
-    })
+    },
+]
 
+
+@instrumented
+def scenario_analysis(txns, specs=SCENARIO_SPECS):
+    """
+    Models three pricing scenarios for commodity pass-through:
+    A) Full pass-through (100% cost increase passed to customer)
+    B) Targeted overrides by segment (differentiated approach)
+    C) Temporary hold with triggers (absorb short-term, plan recovery)
+    Scenarios are declarative specs (see scenario_specs.py); pass `specs`
+    to evaluate other strategies.
+    """
+    results = evaluate_specs(txns, specs)
+    scenarios = []
+    for row in results.to_dict(orient="records"):
+        scenarios.append({
+            "scenario": row["scenario"],
+            "description": row.get("description"),
+            "price_action": row.get("price_action"),
+            "projected_sales": round(row["projected_sales"], 2),
+            "projected_cogs": round(row["projected_cogs"], 2),
+            "projected_gp": round(row["projected_gp"], 2),
+            "projected_gp_pct": round(row["projected_gp_pct"], 4),
+            "projected_volume": round(row["projected_volume"], 0),
+            "volume_change_pct": round(row["volume_change_pct"], 4),
+            "gp_vs_baseline": round(row["gp_vs_baseline"], 2),
+            "risk_level": row.get("risk_level"),
+            "best_for": row.get("best_for"),
+        })
     return scenarios
 
 
@@ -548,64 +855,58 @@ def scenario_analysis(txns):
 #  MODULE 6: DATA INTEGRITY & QA CHECKS
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def data_integrity_audit(txns, products):
+@instrumented
+def data_integrity_audit(txns, products, rows=None, rules=INTEGRITY_RULES, params=None):
     """
     Validates pricing data for system integrity issues.
     Catches the kind of errors that can create customer-facing price mistakes.
-    """
-    issues = []
 
-    # Check 1: Negative margins
-    neg_margin = txns[txns["gp_pct"] < 0]
-    if len(neg_margin) > 0:
-        issues.append({
-            "check": "Negative Margin Transactions",
-            "severity": "CRITICAL",
-            "count": len(neg_margin),
-            "detail": f"{len(neg_margin)} transactions with negative GP% detected. "
-                      f"Affected products: {neg_margin['product_id'].nunique()}. "
-                      f"Total GP$ impact: ${neg_margin['gross_profit_dollars'].sum():,.2f}",
-            "action": "Immediate review — likely cost update not reflected in pricing"
-        })
-
-    # Check 2: Price below cost
-    below_cost = txns[txns["net_price"] < txns["unit_cost"]]
-    if len(below_cost) > 0:
-        issues.append({
-            "check": "Net Price Below Cost",
-            "severity": "CRITICAL",
-            "count": len(below_cost),
-            "detail": f"{len(below_cost)} transactions where net price < unit cost. "
-                      f"Revenue leakage: ${abs(below_cost['gross_profit_dollars'].sum()):,.2f}",
-            "action": "Escalate to pricing system admin — config error likely"
-        })
+    Row-level checks come from the integrity rule registry: evaluated on the
+    raw rows (`rows`, or `txns` when it is not a cube) into one bitmask, or
+    served from the cube's pre-aggregated rule measures when only a cube is
+    given (row-only rules are then skipped). Product-level price checks
+    follow.
+    """
+    cube = as_cube(txns)
+    cells = cube_frame(cube, ["week_number", "product_id", "txn_count", "net_price_sum",
+                              "net_price_sq_sum"] + [m for rule in cube_rules(rules)
+                                                     for m in rule["measures"]])
+    if rows is None and not is_cube(txns):
+        rows = txns
+    params = {**INTEGRITY_PARAMS, **(params or {})}
+    if rows is not None:
+        summary = rule_summary(rows, rules=rules, params=params)
+    else:
+        summary = cube_rule_summary(cells, rules)
+    by_name = {rule["name"]: rule for rule in rules}
 
-    # Check 3: Unusually high margins (possible data error)
-    high_margin = txns[txns["gp_pct"] > 0.50]
-    if len(high_margin) > 0:
+    issues = []
+    for s in summary.to_dict(orient="records"):
+        if s["count"] == 0:
+            continue
+        rule = by_name[s["rule"]]
         issues.append({
-            "check": "Abnormally High Margin (>50%)",
-            "severity": "WARNING",
-            "count": len(high_margin),
-            "detail": f"{len(high_margin)} transactions with GP% > 50%. "
-                      f"May indicate stale cost data or pricing system misconfiguration.",
-            "action": "Validate cost data freshness for flagged products"
+            "check": rule["check"],
+            "severity": rule["severity"],
+            "count": s["count"],
+            "detail": rule["detail"](s, params),
+            "action": rule["action"],
+            "rule": rule["name"],
+            "dollar_impact": round(s["dollar_impact"], 2),
+            "products": s["products"],
         })
 
-    # Check 4: Missing override justification
-    overrides_no_reason = txns[txns["has_override"] == True]
-    if len(overrides_no_reason) > 0:
-        issues.append({
-            "check": "Override Audit Trail",
-            "severity": "INFO",
-            "count": int(overrides_no_reason["has_override"].sum()),
-            "detail": f"{int(overrides_no_reason['has_override'].sum())} active overrides in the last 16 weeks. "
-                      f"Override rate: {overrides_no_reason['has_override'].mean():.1%}",
-            "action": "Ensure all overrides have documented reason codes and expiry dates"
-        })
+    # Row-level net price mean / std per product from the cube's Σx, Σx², n
+    def price_moments(df):
+        m = df.groupby("product_id", observed=True)[
+            ["txn_count", "net_price_sum", "net_price_sq_sum"]].sum()
+        n = m["txn_count"]
+        mean = m["net_price_sum"] / n
+        var = (m["net_price_sq_sum"] - n * mean ** 2).clip(lower=0) / (n - 1)
+        return pd.DataFrame({"mean": mean, "std": np.sqrt(var)}).reset_index()
 
     # Check 5: Price variance within same product (consistency)
-    price_cv = txns.groupby("product_id")["net_price"].agg(["mean", "std"]).reset_index()
+    price_cv = price_moments(cells)
     price_cv["cv"] = price_cv["std"] / price_cv["mean"]
     high_variance = price_cv[price_cv["cv"] > 0.15]
     if len(high_variance) > 0:
@@ -619,8 +920,8 @@ def data_integrity_audit(txns, products):
         })
 
     # Check 6: Stale pricing (no change in 8+ weeks)
-    recent_prices = txns[txns["week_number"] >= 9].groupby("product_id")["net_price"].std()
-    stale = recent_prices[recent_prices < 0.01]
+    recent_prices = price_moments(cells[cells["week_number"] >= 9])
+    stale = recent_prices[recent_prices["std"] < 0.01]
     issues.append({
         "check": "Stale Pricing (No Movement 8+ Weeks)",
         "severity": "INFO",
@@ -637,37 +938,40 @@ def data_integrity_audit(txns, products):
 #  MODULE 7: BASKET ANALYSIS
 # ═══════════════════════════════════════════════════════════════════════════════
 
+@instrumented
 def basket_analysis(txns):
     """
-    Analyze customer basket composition and co-purchase patterns
-    to assess basket risk of pricing actions.
+    Analyze customer basket composition to assess basket risk of pricing
+    actions; co-purchase affinities come from copurchase.co_purchase_affinities.
     """
-    recent = txns[txns["week_number"] >= 13]
+    cube = as_cube(txns)
+    cells = cube_frame(cube, ["week_number", "customer_id", "product_key", "category",
+                              "is_commodity", "cases_ordered", "net_sales",
+                              "gross_profit_dollars"])
+    recent = cells[cells["week_number"] >= 13]
 
     # Customer basket breadth
-    basket = recent.groupby(["customer_id", "customer_name", "segment"]).agg(
+    basket = recent.groupby("customer_id", observed=True).agg(
         total_sales=("net_sales", "sum"),
         total_gp=("gross_profit_dollars", "sum"),
-        unique_products=("product_id", "nunique"),
+        unique_products=("product_key", "nunique"),
         unique_categories=("category", "nunique"),
         total_cases=("cases_ordered", "sum"),
     ).reset_index()
-
-    basket["gp_pct"] = basket["total_gp"] / basket["total_sales"]
-    basket["avg_basket_value"] = basket["total_sales"] / 4  # 4 weeks
+    basket = add_basket_metrics(attach_attributes(basket, cube, ["customer_name", "segment"]))
 
     # Category concentration per customer
-    cat_mix = recent.groupby(["customer_id", "category"])["net_sales"].sum().reset_index()
-    cat_mix["total"] = cat_mix.groupby("customer_id")["net_sales"].transform("sum")
+    cat_mix = recent.groupby(["customer_id", "category"], observed=True)["net_sales"].sum().reset_index()
+    cat_mix["total"] = cat_mix.groupby("customer_id", observed=True)["net_sales"].transform("sum")
     cat_mix["category_share"] = cat_mix["net_sales"] / cat_mix["total"]
 
     # Top categories by revenue
-    top_cats = cat_mix.groupby("category")["net_sales"].sum().sort_values(ascending=False).head(10)
+    top_cats = cat_mix.groupby("category", observed=True)["net_sales"].sum().sort_values(ascending=False).head(10)
 
     # Commodity share of basket
-    comm_share = recent.groupby("customer_id").apply(
-        lambda x: x[x["is_commodity"] == True]["net_sales"].sum() / x["net_sales"].sum()
-    ).reset_index()
+    comm_sales = recent["net_sales"].where(recent["is_commodity"].astype(bool), 0.0)
+    by_cust = recent.assign(commodity_sales=comm_sales).groupby("customer_id", observed=True)
+    comm_share = (by_cust["commodity_sales"].sum() / by_cust["net_sales"].sum()).reset_index()
     comm_share.columns = ["customer_id", "commodity_share"]
 
     basket = basket.merge(comm_share, on="customer_id", how="left")
@@ -675,25 +979,55 @@ def basket_analysis(txns):
     return basket, top_cats
 
 
+def add_basket_metrics(basket):
+    basket["gp_pct"] = basket["total_gp"] / basket["total_sales"]
+    basket["avg_basket_value"] = basket["total_sales"] / 4  # 4 weeks
+    return basket
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 #  MAIN EXECUTION
 # ═══════════════════════════════════════════════════════════════════════════════
 
 if __name__ == "__main__":
+    # Traces every module call; PRICING_PROFILE=cprofile|sample adds hot spots
+    instrumentation.enable(**instrumentation.env_options())
+
     print("Loading data...")
     products, customers, txns = load_data()
+    cube = build_cube(txns)   # single scan of the raw rows, shared by every module
+
+    # python analytics_engine.py --parallel  → modules run as a DAG on a process pool
+    computed = {}
+    if "--parallel" in sys.argv:
+        from parallel import run_parallel
+        computed, _ = run_parallel(cube, products, rows=txns)
+        print(f"  → {len(computed)} modules computed on the process pool")
+
+    def module(name, compute):
+        """A module's result from the parallel run, else computed here."""
+        return computed[name] if name in computed else compute()
+
+    # Lever week = week with the most structural breaks in product unit cost
+    breaks = product_breaks(cube)
+    events = lever_events(breaks)
+    lever = module("lever_week", lambda: {"lever_week": detect_lever_week(cube, breaks=breaks)})
+    lever_week = lever["lever_week"]
+    first_week, last_week = int(cube["weeks"]["week_number"].min()), int(cube["weeks"]["week_number"].max())
+    print(f"  → detected lever week: {lever_week}")
 
     print("\n" + "="*70)
     print("  MODULE 1: Weekly Portfolio Summary")
     print("="*70)
-    weekly = weekly_portfolio_summary(txns)
+    weekly = module("weekly_summary", lambda: weekly_portfolio_summary(cube))
     print(weekly[["week_number", "total_net_sales", "total_gp", "gp_pct",
                    "total_cases", "override_rate"]].to_string(index=False))
 
     print("\n" + "="*70)
     print("  MODULE 2: Margin Bridge (Pre vs Post Cost Increase)")
     print("="*70)
-    bridge, cat_bridge = margin_bridge(txns)
+    bridge, cat_bridge = module("margin_bridge", lambda: margin_bridge(
+        cube, period_a_weeks=(first_week, lever_week - 1), period_b_weeks=(lever_week, last_week)))
     print(f"\nGP/week Period A: ${bridge['gp_per_week_a']:,.2f}")
     print(f"GP/week Period B: ${bridge['gp_per_week_b']:,.2f}")
     print(f"Delta:            ${bridge['delta_gp_per_week']:,.2f}")
@@ -705,19 +1039,24 @@ if __name__ == "__main__":
     print("\n" + "="*70)
     print("  MODULE 3: Override Recommendations")
     print("="*70)
-    overrides = generate_override_recommendations(txns)
+    overrides = module("override_recommendations", lambda: generate_override_recommendations(cube))
     print(f"\n{len(overrides)} override recommendations generated")
     if len(overrides) > 0:
         print(f"Total projected annual GP impact: ${overrides['projected_annual_gp_impact'].sum():,.2f}")
+        print(f"Basket GP at risk on affine SKUs: ${overrides['basket_risk_annual'].sum():,.2f}/yr")
         print(f"\nTop 10 by impact:")
         print(overrides[["customer_name", "description", "current_gp_pct",
                          "recommended_price", "confidence", "projected_annual_gp_impact"
                          ]].head(10).to_string(index=False))
+    floor_sweep = module("override_floor_sweep",
+                         lambda: override_floor_sweep(cube, segment_floors=True))
+    print(f"\nFloor sensitivity:")
+    print(floor_sweep[["floor", "recommendations", "annual_gp_impact"]].to_string(index=False))
 
     print("\n" + "="*70)
     print("  MODULE 4: Lever Change Impact")
     print("="*70)
-    impact = lever_change_impact(txns)
+    impact = module("lever_impact", lambda: lever_change_impact(cube, lever_week=lever_week))
     print(f"\nPre-lever commodity GP%:  {impact['pre_period']['commodity_gp_pct']:.2%}")
     print(f"Post-lever commodity GP%: {impact['post_period']['commodity_gp_pct']:.2%}")
     print(f"Blended GP% Pre:         {impact['pre_period']['blended_gp_pct']:.2%}")
@@ -726,7 +1065,7 @@ if __name__ == "__main__":
     print("\n" + "="*70)
     print("  MODULE 5: Scenario Analysis")
     print("="*70)
-    scenarios = scenario_analysis(txns)
+    scenarios = module("scenarios", lambda: scenario_analysis(cube))
     for s in scenarios:
         print(f"\n{s['scenario']}")
         print(f"  GP$ Impact vs Baseline: ${s['gp_vs_baseline']:,.2f}")
@@ -736,7 +1075,7 @@ if __name__ == "__main__":
     print("\n" + "="*70)
     print("  MODULE 6: Data Integrity Audit")
     print("="*70)
-    issues = data_integrity_audit(txns, products)
+    issues = module("data_integrity", lambda: data_integrity_audit(cube, products, rows=txns))
     for issue in issues:
         print(f"\n[{issue['severity']}] {issue['check']}: {issue['count']} items")
         print(f"  {issue['detail']}")
@@ -744,34 +1083,51 @@ if __name__ == "__main__":
     print("\n" + "="*70)
     print("  MODULE 7: Basket Analysis")
     print("="*70)
-    basket, top_cats = basket_analysis(txns)
+    basket, top_cats = module("basket", lambda: basket_analysis(cube))
     print(f"\nAverage basket breadth: {basket['unique_products'].mean():.0f} products")
     print(f"Average commodity share: {basket['commodity_share'].mean():.1%}")
+    affinities = co_purchase_affinities(cube)
+    strongest = affinities.sort_values("lift", ascending=False).iloc[0]
+    print(f"Strongest co-purchase pair: {strongest['description']} + "
+          f"{strongest['partner_description']} (lift {strongest['lift']:.2f}, "
+          f"{strongest['co_baskets']} customers)")
 
-    # ── Export everything to JSON for dashboard ──
+    # ── Export the dashboard panels (one artifact each, unchanged ones skipped) ──
     print("\n\nExporting dashboard data...")
 
-    dashboard_data = {
-        "weekly_summary": weekly.to_dict(orient="records"),
-        "category_performance": category_performance(txns).to_dict(orient="records"),
-        "segment_performance": segment_performance(txns).to_dict(orient="records"),
+    has_overrides = len(overrides) > 0
+    panels = {
+        "weekly_summary": weekly,
+        "category_performance": lambda: module("category_performance",
+                                               lambda: category_performance(cube)),
+        "segment_performance": lambda: module("segment_performance",
+                                              lambda: segment_performance(cube)),
         "margin_bridge": bridge,
-        "category_bridge": cat_bridge.to_dict(orient="records"),
-        "override_recommendations": overrides.head(50).to_dict(orient="records") if len(overrides) > 0 else [],
+        "category_bridge": cat_bridge,
+        "dimension_bridges": lambda: {
+            dim: dimension_bridge(cube, [dim], (first_week, lever_week - 1), (lever_week, last_week))
+            for dim in BRIDGE_DIMENSIONS if dim != "category"
+        },
+        "override_recommendations": overrides.head(50),
         "override_summary": {
             "total_recommendations": len(overrides),
-            "total_annual_gp_impact": round(overrides["projected_annual_gp_impact"].sum(), 2) if len(overrides) > 0 else 0,
-            "high_confidence": len(overrides[overrides["confidence"] == "High"]) if len(overrides) > 0 else 0,
-            "medium_confidence": len(overrides[overrides["confidence"] == "Medium"]) if len(overrides) > 0 else 0,
-            "low_confidence": len(overrides[overrides["confidence"] == "Low"]) if len(overrides) > 0 else 0,
-            "by_segment": overrides.groupby("segment")["projected_annual_gp_impact"].sum().round(2).to_dict() if len(overrides) > 0 else {},
-            "by_category": overrides.groupby("category")["projected_annual_gp_impact"].sum().round(2).sort_values(ascending=False).head(10).to_dict() if len(overrides) > 0 else {},
+            "total_annual_gp_impact": round(overrides["projected_annual_gp_impact"].sum(), 2) if has_overrides else 0,
+            "high_confidence": len(overrides[overrides["confidence"] == "High"]) if has_overrides else 0,
+            "medium_confidence": len(overrides[overrides["confidence"] == "Medium"]) if has_overrides else 0,
+            "low_confidence": len(overrides[overrides["confidence"] == "Low"]) if has_overrides else 0,
+            "total_basket_risk_annual": round(overrides["basket_risk_annual"].sum(), 2) if has_overrides else 0,
+            "by_segment": overrides.groupby("segment", observed=True)["projected_annual_gp_impact"].sum().round(2) if has_overrides else {},
+            "by_category": overrides.groupby("category", observed=True)["projected_annual_gp_impact"].sum().round(2).sort_values(ascending=False).head(10) if has_overrides else {},
         },
-        "lever_impact": {
+        "override_floor_sweep": floor_sweep,
+        "lever_impact": lambda: {
             "pre_period": impact["pre_period"],
             "post_period": impact["post_period"],
-            "customer_impact_top": impact["customer_impact"].head(20).to_dict(orient="records"),
-            "category_impact": impact["category_impact"].to_dict(orient="records"),
+            "customer_impact_top": impact["customer_impact"].head(20),
+            "category_impact": impact["category_impact"],
+            "detected_events": events,
+            "category_breaks": category_breaks(breaks),
+            "event_comparison": multi_event_impact(cube, events["week_number"].tolist())["events"],
         },
         "scenarios": scenarios,
         "data_integrity": issues,
@@ -780,21 +1136,31 @@ if __name__ == "__main__":
             "avg_categories_per_customer": round(basket["unique_categories"].mean(), 1),
             "avg_commodity_share": round(basket["commodity_share"].mean(), 4),
             "avg_weekly_basket_value": round(basket["avg_basket_value"].mean(), 2),
-            "top_categories": top_cats.round(2).to_dict(),
+            "top_categories": top_cats.round(2),
+            "top_affinities": affinities.sort_values("lift", ascending=False).head(50),
         },
         "metadata": {
             "data_source": "Sysco Arkansas Price Sheet (Contract S000000035 / 4600049774)",
             "analysis_period": "Oct 6, 2025 — Jan 25, 2026 (16 weeks)",
-            "products_analyzed": int(txns["product_id"].nunique()),
-            "customers_analyzed": int(txns["customer_id"].nunique()),
+            "products_analyzed": txns["product_id"].nunique(),
+            "customers_analyzed": txns["customer_id"].nunique(),
             "total_transactions": len(txns),
             "total_net_sales": round(txns["net_sales"].sum(), 2),
             "generated_date": "2026-02-10",
         },
     }
 
-    with open("/home/claude/pricing_engine/dashboard_data.json", "w") as f:
-        json.dump(dashboard_data, f, indent=2, default=str)
+    # python analytics_engine.py [--arrow] [--force] [--parallel]
+    with trace("dashboard_export") as record:
+        exported = export_panels(panels, fmt="arrow" if "--arrow" in sys.argv else "json",
+                                 force="--force" in sys.argv)
+        written = exported[exported["status"] == "written"]
+        record["output_rows"] = len(written)
+        record["output_mb"] = round(written["bytes"].sum() / 2**20, 3)
 
-    print("Dashboard data exported to dashboard_data.json")
+    print(f"Dashboard panels exported to {EXPORT_DIR}: {len(written)} written, "
+          f"{len(exported) - len(written)} unchanged")
     print("\nPipeline complete.")
+
+    print("\nModule timings:")
+    print(instrumentation.summary_table().to_string(index=False))
@@ -0,0 +1,229 @@
+"""
+Sysco Revenue Management — Benchmark Suite
+Times every pipeline stage (catalog, customers, transaction generation,
+storage round trip, cube build and the seven analytics modules) at 1×, 10×
+and 100× the demo data size. Each stage records wall time, peak RSS and
+rows/sec; results are written as JSON and compared against a stored
+baseline, flagging stages that got slower or hungrier beyond a tolerance.
+"""
+
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from storage import DATA_DIR, TRANSACTIONS_DATASET, write_transactions
+from data_ingestion import (
+    CUSTOMER_SEGMENTS, build_product_catalog, generate_customers, generate_customers_scaled,
+    generate_transactions,
+)
+from analytics_engine import (
+    load_data, weekly_portfolio_summary, margin_bridge, generate_override_recommendations,
+    lever_change_impact, scenario_analysis, data_integrity_audit, basket_analysis,
+)
+from cube import build_cube
+from copurchase import co_purchase_affinities
+
+BENCH_DIR = os.path.join(DATA_DIR, "benchmarks")
+SCALES = [1, 10, 100]
+
+# A stage regresses when a metric exceeds baseline × (1 + tolerance) and the
+# absolute change is above the noise floor
+REGRESSION_TOLERANCE = {"wall_s": 0.20, "peak_rss_mb": 0.20}
+NOISE_FLOOR = {"wall_s": 0.05, "peak_rss_mb": 16.0}
+# Cheap stages are timed best-of-N to damp scheduler noise
+REPEATS = 3
+
+# stage → callable(state); the seven analytics modules (plus Module 7's
+# co-purchase engine) run on the shared cube
+MODULE_STAGES = {
+    "weekly_portfolio_summary": lambda s: weekly_portfolio_summary(s["cube"]),
+    "margin_bridge": lambda s: margin_bridge(s["cube"]),
+    "generate_override_recommendations": lambda s: generate_override_recommendations(s["cube"]),
+    "lever_change_impact": lambda s: lever_change_impact(s["cube"]),
+    "scenario_analysis": lambda s: scenario_analysis(s["cube"]),
+    "data_integrity_audit": lambda s: data_integrity_audit(s["cube"], s["products"]),
+    "basket_analysis": lambda s: basket_analysis(s["cube"]),
+    "co_purchase_affinities": lambda s: co_purchase_affinities(s["cube"]),
+}
+
+
+# ── Measurement ──────────────────────────────────────────────────────────────
+
+def _reset_peak_rss():
+    """Reset the kernel's peak-RSS counter; False when not supported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Lifetime peak (kB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def measure(stage, func, rows=None, repeats=1):
+    """
+    Run `func()` and return (result, record) with the best-of-`repeats`
+    wall time. Peak RSS is the process high water mark during the calls
+    where the kernel lets us reset it, the lifetime peak otherwise. `rows`
+    defaults to len(result).
+    """
+    _reset_peak_rss()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    wall = min(timings)
+    if rows is None:
+        rows = len(result) if hasattr(result, "__len__") else 0
+    record = {
+        "stage": stage,
+        "rows": int(rows),
+        "wall_s": round(wall, 4),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "rows_per_sec": round(rows / wall) if wall > 0 else None,
+    }
+    return result, record
+
+
+# ── Suite ────────────────────────────────────────────────────────────────────
+
+def run_scale(scale, seed=42, work_dir=None):
+    """
+    Every stage at `scale` × the demo data: customers are multiplied per
+    segment (1× uses the original generator), so rows grow linearly while
+    the catalog stays the price sheet. Data is round-tripped through a
+    scratch store under `work_dir`. Returns one record per stage.
+    """
+    work_dir = work_dir or os.path.join(BENCH_DIR, f"data_{scale}x")
+    os.makedirs(work_dir, exist_ok=True)
+    records = []
+
+    def step(stage, func, rows=None, repeats=1):
+        result, record = measure(stage, func, rows, repeats)
+        records.append({"scale": scale, **record})
+        return result
+
+    products = step("build_product_catalog", lambda: build_product_catalog(seed))
+    if scale == 1:
+        customers = step("generate_customers", lambda: generate_customers(seed))
+    else:
+        counts = {seg: cfg["count"] * scale for seg, cfg in CUSTOMER_SEGMENTS.items()}
+        customers = step("generate_customers", lambda: generate_customers_scaled(counts, seed))
+    txns = step("generate_transactions",
+                lambda: generate_transactions(products, customers, seed=seed))
+    n = len(txns)
+
+    products.to_csv(os.path.join(work_dir, "products.csv"), index=False)
+    customers.to_csv(os.path.join(work_dir, "customers.csv"), index=False)
+    step("write_transactions",
+         lambda: write_transactions(txns, path=os.path.join(work_dir, TRANSACTIONS_DATASET),
+                                    overwrite=True), rows=n)
+    del txns
+    products, _, txns = step("load_data", lambda: load_data(work_dir), rows=n)
+
+    state = {"products": products}
+    state["cube"] = step("build_cube", lambda: build_cube(txns), rows=n)
+    del txns
+    for stage, func in MODULE_STAGES.items():
+        step(stage, lambda: func(state), rows=n, repeats=REPEATS)
+    return records
+
+
+def run_suite(scales=SCALES, seed=42):
+    """Run every scale; returns the results document written by save_results()."""
+    records = []
+    for scale in scales:
+        records.extend(run_scale(scale, seed))
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": records,
+    }
+
+
+def save_results(document, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    return path
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# ── Baseline comparison ──────────────────────────────────────────────────────
+
+def compare_to_baseline(document, baseline, tolerance=REGRESSION_TOLERANCE,
+                        noise_floor=NOISE_FLOOR):
+    """
+    Stage-by-stage ratios against a baseline results document, matched on
+    (stage, scale). A metric regresses when it exceeds baseline ×
+    (1 + tolerance) by more than its noise floor; `regression` lists them.
+    """
+    keys = ["stage", "scale"]
+    current = pd.DataFrame(document["results"])
+    base = pd.DataFrame(baseline["results"])[keys + list(tolerance)]
+    merged = current.merge(base, on=keys, how="left", suffixes=("", "_baseline"))
+
+    flags = []
+    for metric, tol in tolerance.items():
+        now, before = merged[metric], merged[f"{metric}_baseline"]
+        merged[f"{metric}_ratio"] = (now / before).round(3)
+        flags.append(np.where((now > before * (1 + tol)) & (now - before > noise_floor[metric]),
+                              metric, ""))
+    merged["regression"] = [", ".join(f for f in row if f) for row in zip(*flags)]
+    return merged
+
+
+if __name__ == "__main__":
+    # python benchmarks.py [scale ...] [--save-baseline]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    scales = [int(a.rstrip("x")) for a in args] or SCALES
+    results_path = os.path.join(BENCH_DIR, "results.json")
+    baseline_path = os.path.join(BENCH_DIR, "baseline.json")
+
+    document = run_suite(scales)
+    save_results(document, results_path)
+    table = pd.DataFrame(document["results"])
+    print(table.to_string(index=False))
+    print(f"\n  → results written to {results_path}")
+
+    if "--save-baseline" in sys.argv:
+        save_results(document, baseline_path)
+        print(f"  → saved as baseline {baseline_path}")
+    elif os.path.exists(baseline_path):
+        comparison = compare_to_baseline(document, load_results(baseline_path))
+        print("\nVs baseline:")
+        print(comparison[["stage", "scale", "wall_s", "wall_s_ratio", "peak_rss_mb_ratio",
+                          "regression"]].to_string(index=False))
+        regressions = comparison[comparison["regression"] != ""]
+        print(f"\n  → {len(regressions)} regression(s)")
+        sys.exit(1 if len(regressions) else 0)
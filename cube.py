@@ -0,0 +1,108 @@
+"""
+Sysco Revenue Management — Shared Aggregation Cube
+One scan of the raw transactions produces a (week, customer, product) cube
+of additive measures. Every analytics module queries the cube instead of
+re-grouping the raw rows, and descriptive attributes come from the star
+schema dimensions by positional gather.
+"""
+
+import numpy as np
+import pandas as pd
+
+from schema import build_star_schema, is_star_schema, denormalize
+from instrumentation import instrumented
+from integrity import cube_rules, rule_flags
+
+CUBE_KEYS = ["week_number", "customer_key", "product_key"]
+
+# measure → how it is derived from one raw transaction row (summed per cell)
+CUBE_BASE_MEASURES = [
+    "txn_count",          # rows in the cell
+    "cases_ordered",
+    "net_sales",
+    "cogs",
+    "gross_profit_dollars",
+    "net_price_sum",      # Σ net_price      → row-level mean price
+    "net_price_sq_sum",   # Σ net_price²     → row-level price variance
+    "unit_cost_sum",      # Σ unit_cost      → row-level mean cost
+    "price_x_cases",      # Σ net_price × cases → repricing scenarios
+]
+
+
+def cube_measures():
+    """
+    Base measures plus (count, GP$) per cube-served integrity rule
+    (integrity.cube_rules), so a rule registered with `measures` is carried
+    by every cube built afterwards.
+    """
+    return CUBE_BASE_MEASURES + [m for rule in cube_rules() for m in rule["measures"]]
+
+
+def is_cube(obj):
+    return isinstance(obj, dict) and "cells" in obj
+
+
+def _cell_measures(fact):
+    price = fact["net_price"].to_numpy(dtype=float)
+    cost = fact["unit_cost"].to_numpy(dtype=float)
+    gp = fact["gross_profit_dollars"].to_numpy(dtype=float)
+    gp_pct = fact["gp_pct"].to_numpy(dtype=float)
+    cases = fact["cases_ordered"].to_numpy()
+    cells = pd.DataFrame({
+        "week_number": fact["week_number"].to_numpy(),
+        "customer_key": fact["customer_key"].to_numpy(),
+        "product_key": fact["product_key"].to_numpy(),
+        "txn_count": np.ones(len(fact), dtype=np.int64),
+        "cases_ordered": cases.astype(np.int64),
+        "net_sales": fact["net_sales"].to_numpy(dtype=float),
+        "cogs": fact["cogs"].to_numpy(dtype=float),
+        "gross_profit_dollars": gp,
+        "net_price_sum": price,
+        "net_price_sq_sum": price * price,
+        "unit_cost_sum": cost,
+        "price_x_cases": price * cases,
+    })
+    for rule, flags in rule_flags(fact, cube_rules()):
+        count_col, gp_col = rule["measures"]
+        cells[count_col] = flags.astype(np.int64)
+        cells[gp_col] = np.where(flags, gp, 0.0)
+    return cells[CUBE_KEYS + cube_measures()]
+
+
+@instrumented
+def build_cube(txns, products=None, customers=None):
+    """
+    Single scan: aggregate raw rows (denormalized frame or star schema) into
+    cells keyed on (week_number, customer_key, product_key). Returns a dict
+    with the `cells` table plus the customers / products / weeks dimensions.
+    """
+    if is_star_schema(txns):
+        star = txns
+    else:
+        star = build_star_schema(txns, products=products, customers=customers)
+
+    cells = _cell_measures(star["fact"])
+    # One row per (week, customer, product) in practice; collapse any repeats
+    if cells.duplicated(CUBE_KEYS).any():
+        cells = cells.groupby(CUBE_KEYS, sort=True)[cube_measures()].sum().reset_index()
+    else:
+        cells = cells.sort_values(CUBE_KEYS, kind="stable").reset_index(drop=True)
+
+    cube = {name: star[name] for name in ["customers", "products", "weeks"]}
+    cube["cells"] = cells
+    return cube
+
+
+def as_cube(txns):
+    """Pass a cube through; build one from raw transactions otherwise."""
+    return txns if is_cube(txns) else build_cube(txns)
+
+
+def cube_frame(cube, columns):
+    """
+    Cube cells with `columns`: measures, keys, ids (customer_id / product_id)
+    and dimension attributes (segment, category, is_commodity, ...).
+    """
+    star = {"fact": cube["cells"], "customers": cube["customers"],
+            "products": cube["products"], "weeks": cube["weeks"]}
+    return denormalize(star, columns)
@@ -0,0 +1,235 @@
+"""
+Sysco Revenue Management — Dashboard Export
+Writes each dashboard panel (weekly_summary, margin_bridge, override
+recommendations, ...) as its own artifact instead of one monolithic JSON:
+frames as columnar JSON ({"columns", "data": one array per column}) or as
+zstd-compressed Arrow IPC, other panels as plain JSON. NumPy / pandas
+values are converted column by column — NaN / ±inf become null, numpy
+scalars become native numbers, timestamps ISO strings — so nothing is
+stringified. A manifest records each panel's file, format, content hash
+and the dashboard tabs that read it; a panel whose content hash matches
+the manifest is neither serialized nor rewritten. Panels may be given as
+zero-argument callables so only the panels asked for are computed.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from storage import DATA_DIR
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback
+    orjson = None
+
+EXPORT_DIR = os.path.join(DATA_DIR, "dashboard")
+MANIFEST = "manifest.json"
+FORMATS = {"json": ".json", "arrow": ".arrow"}
+ARROW_COMPRESSION = "zstd"
+
+# Dashboard tab → panels it loads (sysco_pricing_dashboard.jsx reads this
+# from the manifest and fetches only the open tab's panels)
+TAB_PANELS = {
+    "Weekly Review": ["weekly_summary", "basket_summary", "metadata"],
+    "Margin Bridge": ["margin_bridge", "category_bridge", "dimension_bridges", "lever_impact"],
+    "Override Recs": ["override_recommendations", "override_summary", "override_floor_sweep"],
+    "Lever Impact": ["lever_impact", "weekly_summary"],
+    "Scenarios": ["scenarios"],
+    "Data Integrity": ["data_integrity", "metadata"],
+}
+# Panels the dashboard reads; it only decodes JSON, so these always get a JSON file
+DASHBOARD_PANELS = sorted({name for names in TAB_PANELS.values() for name in names})
+
+
+# ── Conversion ───────────────────────────────────────────────────────────────
+
+def column_values(series):
+    """One column as a list of JSON-native values (NaN / ±inf / NaT → None)."""
+    values = series.to_numpy()
+    if values.dtype.kind == "f":
+        out = values.tolist()
+        for i in np.flatnonzero(~np.isfinite(values)):
+            out[i] = None
+        return out
+    if values.dtype.kind in "iub":
+        return values.tolist()
+    if values.dtype.kind == "M":
+        return [None if pd.isna(v) else v.isoformat() for v in series]
+    return [jsonable(v) for v in series.astype(object)]
+
+
+def columnar(frame):
+    """A frame as {"columns": [...], "data": [[column values], ...]}."""
+    frame = frame.reset_index(drop=True)
+    return {"columns": [str(col) for col in frame.columns],
+            "data": [column_values(frame[col]) for col in frame.columns]}
+
+
+def jsonable(value):
+    """Recursively convert a panel to JSON-native types; frames go columnar."""
+    if isinstance(value, pd.DataFrame):
+        return columnar(value)
+    if isinstance(value, pd.Series):
+        return dict(zip([str(k) for k in value.index], column_values(value)))
+    if isinstance(value, dict):
+        return {str(k): jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return column_values(pd.Series(value))
+    if isinstance(value, (float, np.floating)):
+        return float(value) if np.isfinite(value) else None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, (pd.Timestamp, datetime, np.datetime64)):
+        return None if pd.isna(value) else pd.Timestamp(value).isoformat()
+    if value is None or isinstance(value, (str, int)):
+        return value
+    if pd.isna(value):
+        return None
+    return str(value)
+
+
+def dumps(value):
+    """Compact JSON bytes of an already-jsonable value."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), allow_nan=False).encode()
+
+
+def _arrow_bytes(frame):
+    table = pa.Table.from_pandas(frame.reset_index(drop=True), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    options = ipc.IpcWriteOptions(compression=ARROW_COMPRESSION)
+    with ipc.new_file(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# ── Hashing ──────────────────────────────────────────────────────────────────
+
+def content_hash(value):
+    """
+    Hash of a panel's content. Frames are hashed from their row hashes,
+    column names and dtypes without serializing; other panels from their
+    JSON bytes (returned too, so they are not serialized twice).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr([(str(c), str(t)) for c, t in value.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+        return digest.hexdigest(), None
+    data = dumps(jsonable(value))
+    digest.update(data)
+    return digest.hexdigest(), data
+
+
+# ── Export ───────────────────────────────────────────────────────────────────
+
+def load_manifest(out_dir=EXPORT_DIR):
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {"panels": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def export_panels(panels, out_dir=EXPORT_DIR, fmt="json", only=None, force=False):
+    """
+    Write dashboard panels, one artifact per panel, and update the manifest.
+    `panels` maps name → value or zero-argument callable; `only` restricts
+    the export to those names (others are not computed). With fmt="arrow"
+    frame panels are written as compressed Arrow IPC, everything else as
+    JSON; dashboard panels also get a JSON copy (the manifest's
+    `json_file`). A panel whose hash and format match the manifest (and
+    whose files exist) is skipped unless `force`. Returns one status row
+    per panel; `bytes` counts every file written for it.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r} (expected one of {list(FORMATS)})")
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    entries = manifest["panels"]
+
+    report = []
+    for name, panel in panels.items():
+        if only is not None and name not in only:
+            continue
+        value = panel() if callable(panel) else panel
+        panel_fmt = fmt if isinstance(value, pd.DataFrame) else "json"
+        digest, data = content_hash(value)
+        files = {name + FORMATS[panel_fmt]: panel_fmt}
+        if panel_fmt == "arrow" and name in DASHBOARD_PANELS:
+            files[name + FORMATS["json"]] = "json"
+        previous = entries.get(name, {})
+        previous_files = {previous.get("file"), previous.get("json_file")} - {None}
+        if (not force and previous.get("hash") == digest and previous.get("format") == panel_fmt
+                and previous_files == set(files)
+                and all(os.path.exists(os.path.join(out_dir, f)) for f in files)):
+            report.append({"panel": name, "status": "unchanged", "format": panel_fmt,
+                           "bytes": previous.get("bytes")})
+            continue
+
+        written = 0
+        for file, file_fmt in files.items():
+            if file_fmt == "arrow":
+                data = _arrow_bytes(value)
+            elif data is None:
+                data = dumps(jsonable(value))
+            _write_atomic(os.path.join(out_dir, file), data)
+            written += len(data)
+        for stale in previous_files - set(files):
+            if os.path.exists(os.path.join(out_dir, stale)):
+                os.remove(os.path.join(out_dir, stale))
+        entries[name] = {
+            "file": name + FORMATS[panel_fmt],
+            "format": panel_fmt,
+            "hash": digest,
+            "bytes": written,
+            "rows": len(value) if isinstance(value, (pd.DataFrame, list)) else None,
+            "updated": datetime.now().isoformat(timespec="seconds"),
+        }
+        if len(files) > 1:
+            entries[name]["json_file"] = name + FORMATS["json"]
+        report.append({"panel": name, "status": "written", "format": panel_fmt,
+                       "bytes": written})
+
+    manifest["tabs"] = TAB_PANELS
+    _write_atomic(os.path.join(out_dir, MANIFEST), json.dumps(manifest, indent=2).encode())
+    return pd.DataFrame(report)
+
+
+def read_panel(name, out_dir=EXPORT_DIR):
+    """Read one exported panel back; columnar frames come back as DataFrames."""
+    entry = load_manifest(out_dir)["panels"][name]
+    path = os.path.join(out_dir, entry["file"])
+    if entry["format"] == "arrow":
+        with pa.memory_map(path) as source:
+            return ipc.open_file(source).read_all().to_pandas()
+    with open(path, "rb") as f:
+        value = json.loads(f.read())
+    return _from_columnar(value)
+
+
+def _from_columnar(value):
+    if isinstance(value, dict) and set(value) == {"columns", "data"}:
+        return pd.DataFrame(dict(zip(value["columns"], value["data"])), columns=value["columns"])
+    if isinstance(value, dict):
+        return {k: _from_columnar(v) for k, v in value.items()}
+    return value
@@ -9,8 +9,12 @@ import numpy as np
 from datetime import datetime, timedelta
 import json
 import hashlib
-
-np.random.seed(42)
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from storage import (DATA_DIR, TRANSACTIONS_DATASET, FORMATS, claim_dataset_dir, write_transactions,
+                     write_transaction_part)
+from ingest_guard import new_guard, validate_batch, guard_report
 
 # ── Real Sysco Price Sheet Data ──────────────────────────────────────────────
 # Parsed from the Sysco Arkansas Price Sheet (Effective 4/1/23)
@@ -285,8 +289,17 @@ CUSTOMER_SEGMENTS = {
 }
 
 
-def build_product_catalog():
-    """Build product catalog from real Sysco pricing data."""
+def _random_source(seed):
+    """A Generator for `seed`; None draws from the global np.random stream."""
+    return np.random if seed is None else np.random.default_rng(seed)
+
+
+def build_product_catalog(seed=None):
+    """
+    Build product catalog from real Sysco pricing data. Pricing tiers are
+    drawn from `seed`'s Generator, or the global np.random stream if None.
+    """
+    rng = _random_source(seed)
     rows = []
     seen = set()
     for item in RAW_PRODUCTS:
@@ -312,7 +325,7 @@ def build_product_catalog():
             "base_cost": cost,
             "category": category,
             "is_commodity": is_commodity,
-            "pricing_tier": np.random.choice(
+            "pricing_tier": rng.choice(
                 ["Tier 1 - Strategic", "Tier 2 - Preferred", "Tier 3 - Standard"],
                 p=[0.25, 0.45, 0.30]
             ),
@@ -320,8 +333,12 @@ def build_product_catalog():
     return pd.DataFrame(rows)
 
 
-def generate_customers():
-    """Generate realistic customer base across segments."""
+def generate_customers(seed=None):
+    """
+    Generate realistic customer base across segments. Attributes are drawn
+    from `seed`'s Generator, or the global np.random stream if None.
+    """
+    rng = _random_source(seed)
     customers = []
     cust_id = 1000
     for seg_name, seg_config in CUSTOMER_SEGMENTS.items():
@@ -331,24 +348,403 @@ def generate_customers():
                 "customer_id": f"{seg_config['prefix']}-{cust_id}",
                 "customer_name": name,
                 "segment": seg_name,
-                "volume_multiplier": seg_config["volume_multiplier"] * np.random.uniform(0.7, 1.3),
-                "price_sensitivity": seg_config["price_sensitivity"] * np.random.uniform(0.8, 1.2),
+                "volume_multiplier": seg_config["volume_multiplier"] * rng.uniform(0.7, 1.3),
+                "price_sensitivity": seg_config["price_sensitivity"] * rng.uniform(0.8, 1.2),
                 "gp_target": seg_config["margin_target"],
                 "basket_breadth": seg_config["basket_breadth"],
-                "account_tier": np.random.choice(
+                "account_tier": rng.choice(
                     ["National", "Regional", "Local"],
                     p=[0.15, 0.35, 0.50]
                 ),
-                "credit_rating": np.random.choice(["A", "B", "C"], p=[0.5, 0.35, 0.15]),
-                "annual_revenue_est": round(np.random.lognormal(11.5, 0.8), 2),
+                "credit_rating": rng.choice(["A", "B", "C"], p=[0.5, 0.35, 0.15]),
+                "annual_revenue_est": round(rng.lognormal(11.5, 0.8), 2),
             })
     return pd.DataFrame(customers)
 
 
-def generate_transactions(products_df, customers_df, weeks=16):
+# ── Scale-Out Catalog & Customer Base (load testing) ─────────────────────────
+# Town names and per-segment account patterns for generated customers
+SCALE_TOWNS = [
+    "Little Rock", "Fort Smith", "Fayetteville", "Springdale", "Jonesboro", "Rogers",
+    "Conway", "North Little Rock", "Bentonville", "Pine Bluff", "Hot Springs", "Benton",
+    "Texarkana", "Sherwood", "Jacksonville", "Russellville", "Bella Vista", "Paragould",
+    "Cabot", "West Memphis", "Searcy", "Van Buren", "El Dorado", "Maumelle", "Bryant",
+    "Siloam Springs", "Forrest City", "Harrison", "Mountain Home", "Camden", "Magnolia",
+    "Arkadelphia", "Helena", "Hope", "Batesville", "Monticello", "Clarksville", "Malvern",
+]
+SCALE_NAME_PATTERNS = {
+    "Healthcare": ["{town} Regional Medical", "{town} Community Hospital", "{town} Health Clinic"],
+    "K-12 Education": ["{town} School District", "{town} Public Schools", "{town} Charter Academy"],
+    "Restaurant/FSR": ["{town} Grill", "{town} Diner", "{town} Steakhouse", "{town} Cafe"],
+    "Corrections/Government": ["{town} County Detention", "{town} Municipal Services"],
+    "Senior Living": ["{town} Senior Living", "{town} Nursing & Rehab", "{town} Retirement Village"],
+}
+
+# Scale parameter sets; rows ≈ estimate_rows() for the 122-SKU price sheet
+SCALE_PRESETS = {
+    "10M": {"customers_per_segment": 200, "sku_clones": 3, "weeks": 52},
+    "100M": {"customers_per_segment": 2000, "sku_clones": 3, "weeks": 52},
+    "1B": {"customers_per_segment": 4000, "sku_clones": 10, "weeks": 78},
+}
+
+
+def expand_catalog(products_df, sku_clones=1, cost_jitter=0.05, seed=42):
+    """
+    Catalog of `sku_clones` copies of every SKU. Copy 0 is the original;
+    copies k ≥ 1 get ids SKU-<item>-Vkk, a "[Vkk]" description suffix and
+    base cost × (1 ± `cost_jitter`) uniform; other attributes are kept.
+    """
+    if sku_clones <= 1:
+        return products_df.copy()
+    rng = np.random.default_rng(seed)
+    n = len(products_df)
+    clone = np.repeat(np.arange(sku_clones), n)
+    out = pd.concat([products_df] * sku_clones, ignore_index=True)
+    tags = np.array([f"V{k:02d}" for k in range(sku_clones)], dtype=object)[clone]
+    out["product_id"] = np.where(clone > 0, out["product_id"] + "-" + tags, out["product_id"])
+    out["description"] = np.where(clone > 0, out["description"] + " [" + tags + "]",
+                                  out["description"])
+    jitter = np.where(clone > 0, rng.uniform(-cost_jitter, cost_jitter, len(out)), 0.0)
+    out["base_cost"] = np.round(out["base_cost"].to_numpy(dtype=float) * (1 + jitter), 2)
+    return out
+
+
+def generate_customers_scaled(customers_per_segment, seed=42):
+    """
+    `customers_per_segment` accounts per segment (an int, or a
+    {segment: n} map). Each segment starts with its named accounts, then
+    generated "<town> <pattern> #n" names; ids continue the PREFIX-<number>
+    sequence. Attributes are drawn as in generate_customers() from a seeded
+    Generator.
+    """
+    rng = np.random.default_rng(seed)
+    frames, next_id = [], 1001
+    for seg_name, cfg in CUSTOMER_SEGMENTS.items():
+        n = (customers_per_segment.get(seg_name, 0) if isinstance(customers_per_segment, dict)
+             else customers_per_segment)
+        names = list(cfg["names"][:n])
+        patterns = SCALE_NAME_PATTERNS[seg_name]
+        for i in range(n - len(names)):
+            town = SCALE_TOWNS[i % len(SCALE_TOWNS)]
+            pattern = patterns[(i // len(SCALE_TOWNS)) % len(patterns)]
+            names.append(f"{pattern.format(town=town)} #{i + 1}")
+        frames.append(pd.DataFrame({
+            "customer_id": [f"{cfg['prefix']}-{i}" for i in range(next_id, next_id + n)],
+            "customer_name": names,
+            "segment": seg_name,
+            "volume_multiplier": cfg["volume_multiplier"] * rng.uniform(0.7, 1.3, n),
+            "price_sensitivity": cfg["price_sensitivity"] * rng.uniform(0.8, 1.2, n),
+            "gp_target": cfg["margin_target"],
+            "basket_breadth": cfg["basket_breadth"],
+            "account_tier": rng.choice(["National", "Regional", "Local"], size=n,
+                                       p=[0.15, 0.35, 0.50]),
+            "credit_rating": rng.choice(["A", "B", "C"], size=n, p=[0.5, 0.35, 0.15]),
+            "annual_revenue_est": np.round(rng.lognormal(11.5, 0.8, n), 2),
+        }))
+        next_id += n
+    return pd.concat(frames, ignore_index=True)
+
+
+def estimate_rows(products_df, customers_df, weeks):
+    """Expected transaction rows: basket sizes average 0.8 × breadth × catalog."""
+    breadth = customers_df["basket_breadth"].to_numpy(dtype=float)
+    return int(weeks * (0.8 * breadth * len(products_df)).sum())
+
+
+# ── Transaction Generation ───────────────────────────────────────────────────
+START_DATE = datetime(2025, 10, 6)  # 16 weeks back from ~Feb 2026
+OVERRIDE_RATE = 0.12
+OVERRIDE_UP_PROB = 0.3
+
+TRANSACTION_COLUMNS = [
+    "transaction_id", "week_number", "week_start", "customer_id", "customer_name",
+    "segment", "product_id", "description", "category", "brand", "is_commodity",
+    "cases_ordered", "unit_cost", "list_price", "net_price", "has_override",
+    "override_price", "net_sales", "cogs", "gross_profit_dollars", "gp_pct",
+    "pricing_tier",
+]
+
+
+# Commodity cost-shock schedule: (first week, cost multiplier, jitter) steps,
+# 1-based weeks. A step holds until the next one; weeks with jitter > 0 draw
+# multiplier + uniform(-jitter, jitter).
+COST_SHOCK_SCHEDULE = [
+    (7, 1.035, 0.0),     # 3.5% cost increase in week 7 (the "lever change")
+    (8, 1.042, 0.0),
+    (9, 1.040, 0.005),
+]
+
+
+def weekly_cost_shocks(weeks, rng, schedule=None):
+    """Commodity cost multiplier per 0-based week from a cost-shock schedule."""
+    steps = sorted(schedule if schedule is not None else COST_SHOCK_SCHEDULE)
+    shocks = np.ones(weeks)
+    for week_num in range(weeks):
+        active = [step for step in steps if step[0] <= week_num + 1]
+        if not active:
+            continue
+        _, multiplier, jitter = active[-1]
+        shocks[week_num] = multiplier + (rng.uniform(-jitter, jitter) if jitter > 0 else 0.0)
+    return shocks
+
+
+def _seasonal_factors(categories, week_num):
+    week_num = week_num % 52   # the season repeats on long horizons
+    seasonal = np.ones(len(categories))
+    if week_num > 10:
+        seasonal[np.isin(categories, ["Soup & Broth", "Breakfast"])] = 1.15  # winter boost
+    if week_num < 4:
+        seasonal[np.isin(categories, ["Beverages", "Frozen Desserts"])] = 1.10  # early fall warmth
+    return seasonal
+
+
+def _draw_baskets(rng, basket_breadth, n_products):
+    """
+    Sample each customer's weekly basket without replacement in one shot:
+    rank a (customers × products) matrix of uniform keys and keep the
+    first n ranks per row. Returns flat (customer_idx, product_idx) arrays.
+    """
+    n_cust = len(basket_breadth)
+    sizes = (n_products * basket_breadth * rng.uniform(0.6, 1.0, n_cust)).astype(int)
+    sizes = np.minimum(sizes, n_products)
+    ranks = rng.random((n_cust, n_products)).argsort(axis=1).argsort(axis=1)
+    return np.nonzero(ranks < sizes[:, None])
+
+
+def _draw_week(rng, week_num, shock, customers_df, products_df):
+    """
+    One week of baskets, volumes, prices and overrides for `customers_df`,
+    drawn from `rng`. Returns flat arrays; `ci` indexes customers_df rows.
+    """
+    vol_mult = customers_df["volume_multiplier"].to_numpy(dtype=float)
+    price_sens = customers_df["price_sensitivity"].to_numpy(dtype=float)
+    gp_target = customers_df["gp_target"].to_numpy(dtype=float)
+    breadth = customers_df["basket_breadth"].to_numpy(dtype=float)
+
+    base_cost = products_df["base_cost"].to_numpy(dtype=float)
+    is_commodity = products_df["is_commodity"].to_numpy(dtype=bool)
+    categories = products_df["category"].to_numpy()
+
+    ci, pi = _draw_baskets(rng, breadth, len(products_df))
+    n = len(ci)
+
+    base_vol = rng.poisson(lam=3, size=n) * vol_mult[ci]
+    base_vol[base_vol == 0] = 1
+    seasonal = _seasonal_factors(categories, week_num)[pi]
+    volume = np.maximum(1, (base_vol * seasonal).astype(int))
+
+    actual_cost = base_cost[pi] * np.where(is_commodity[pi], shock, 1.0)
+    list_price = actual_cost / (1 - gp_target[ci] - 0.05)
+
+    discount_pct = rng.uniform(0, 0.08, n) * price_sens[ci]
+    net_price = list_price * (1 - discount_pct)
+
+    has_override = rng.random(n) < OVERRIDE_RATE
+    override_up = rng.random(n) < OVERRIDE_UP_PROB
+    override_factor = np.where(override_up,
+                               rng.uniform(1.01, 1.06, n),
+                               rng.uniform(0.92, 0.98, n))
+    net_price = np.where(has_override, net_price * override_factor, net_price)
+
+    return {
+        "week_num": np.full(n, week_num, dtype=np.int64),
+        "ci": ci, "pi": pi, "volume": volume,
+        "actual_cost": actual_cost, "list_price": list_price,
+        "net_price": net_price, "has_override": has_override,
+    }
+
+
+def _transaction_frame(parts, products_df, customers_df):
+    """Concatenate drawn week arrays and build the transaction frame column-wise."""
+    cols = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    ci, pi, week_num = cols["ci"], cols["pi"], cols["week_num"]
+    volume, net_price = cols["volume"], cols["net_price"]
+
+    net_sales = np.round(net_price * volume, 2)
+    total_cost = np.round(cols["actual_cost"] * volume, 2)
+    gross_profit = np.round(net_sales - total_cost, 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gp_pct = np.where(net_sales > 0, np.round(gross_profit / net_sales, 4), 0.0)
+
+    n_weeks = int(week_num.max()) + 1 if len(week_num) else 0
+    week_starts = np.array([(START_DATE + timedelta(weeks=w)).strftime("%Y-%m-%d")
+                            for w in range(n_weeks)])
+    txn_cust = customers_df["customer_id"].to_numpy()[ci]
+    txn_prod = products_df["product_id"].to_numpy()[pi]
+    transaction_ids = [
+        hashlib.md5(f"{w}-{c}-{p}".encode()).hexdigest()[:12]
+        for w, c, p in zip(week_num.tolist(), txn_cust.tolist(), txn_prod.tolist())
+    ]
+
+    rounded_price = np.round(net_price, 2)
+    return pd.DataFrame({
+        "transaction_id": transaction_ids,
+        "week_number": week_num + 1,
+        "week_start": week_starts[week_num],
+        "customer_id": txn_cust,
+        "customer_name": customers_df["customer_name"].to_numpy()[ci],
+        "segment": customers_df["segment"].to_numpy()[ci],
+        "product_id": txn_prod,
+        "description": products_df["description"].to_numpy()[pi],
+        "category": products_df["category"].to_numpy()[pi],
+        "brand": products_df["brand"].to_numpy()[pi],
+        "is_commodity": products_df["is_commodity"].to_numpy(dtype=bool)[pi],
+        "cases_ordered": volume,
+        "unit_cost": np.round(cols["actual_cost"], 2),
+        "list_price": np.round(cols["list_price"], 2),
+        "net_price": rounded_price,
+        "has_override": cols["has_override"],
+        "override_price": np.where(cols["has_override"], rounded_price, np.nan),
+        "net_sales": net_sales,
+        "cogs": total_cost,
+        "gross_profit_dollars": gross_profit,
+        "gp_pct": gp_pct,
+        "pricing_tier": products_df["pricing_tier"].to_numpy()[pi],
+    }, columns=TRANSACTION_COLUMNS)
+
+
+def generate_transactions(products_df, customers_df, weeks=16, seed=42, cost_shocks=None):
     """
     Generate 16 weeks of transactional data simulating real ordering patterns.
     Includes cost fluctuations, seasonal effects, and customer-level variation.
+
+    Vectorized engine: each week's baskets, volumes, discounts and overrides
+    are drawn as arrays from a seeded np.random.Generator and the frame is
+    built column-wise, so output is reproducible for a given seed.
+    `cost_shocks` overrides COST_SHOCK_SCHEDULE.
+    """
+    rng = np.random.default_rng(seed)
+    shocks = weekly_cost_shocks(weeks, rng, cost_shocks)
+    parts = [_draw_week(rng, week_num, shocks[week_num], customers_df, products_df)
+             for week_num in range(weeks)]
+    return _transaction_frame(parts, products_df, customers_df)
+
+
+# ── Sharded generation (load testing) ────────────────────────────────────────
+
+_SHARD_INPUTS = {}
+
+
+def _init_shard_worker(products_df, customers_df, shocks, seed, customers_per_shard,
+                       out_dir, format):
+    _SHARD_INPUTS.update(products=products_df, customers=customers_df, shocks=shocks,
+                         seed=seed, block=customers_per_shard, out_dir=out_dir, format=format)
+
+
+def _shard_frame(week_num, block):
+    """
+    One (week, customer block) shard. Its Generator comes from a SeedSequence
+    keyed on the shard, so output never depends on scheduling.
+    """
+    inp = _SHARD_INPUTS
+    lo = block * inp["block"]
+    customers = inp["customers"].iloc[lo:lo + inp["block"]]
+    rng = np.random.default_rng(np.random.SeedSequence(inp["seed"], spawn_key=(week_num, block)))
+    part = _draw_week(rng, week_num, inp["shocks"][week_num], customers, inp["products"])
+    part["ci"] = part["ci"] + lo
+    return _transaction_frame([part], inp["products"], inp["customers"])
+
+
+def _write_shard(shard):
+    week_num, block = shard
+    txns = _shard_frame(week_num, block)
+    path = write_transaction_part(txns, _SHARD_INPUTS["out_dir"], week_num + 1, block,
+                                  format=_SHARD_INPUTS["format"])
+    return path, len(txns)
+
+
+def _draw_shard(shard):
+    return shard, _shard_frame(*shard)
+
+
+def _write_guarded(drawn, guard, out_dir, format):
+    """Validate shards in (week, block) order and write each clean part."""
+    written = []
+    for (week_num, block), txns in drawn:
+        clean = validate_batch(guard, txns)
+        written.append((write_transaction_part(clean, out_dir, week_num + 1, block, format=format),
+                        len(clean)))
+    return written
+
+
+def generate_transactions_sharded(products_df, customers_df, weeks=16, seed=42, out_dir=None,
+                                  customers_per_shard=256, max_workers=None, format="parquet",
+                                  cost_shocks=None, overwrite=False, guard=None):
+    """
+    Sharded generator for large synthetic histories. Work is split into
+    (week, block of `customers_per_shard` customers) shards on a process
+    pool; each shard draws from its own Generator seeded by
+    SeedSequence(seed, spawn_key=(week, block)) and writes its own parquet /
+    arrow part file into hive week partitions. Output is identical for any
+    `max_workers`; max_workers=1 runs in-process.
+
+    An existing `out_dir` is replaced only when it holds the storage
+    DATASET_MARKER (or is empty); any other directory raises
+    FileExistsError unless `overwrite=True`.
+
+    With `guard` (ingest_guard.new_guard) every shard passes validate_batch()
+    before its part is written: workers return their frames and the parent
+    validates them in (week, block) order, so the running price stats and
+    quarantine file are the same for any `max_workers`. Quarantined rows
+    are not written.
+
+    The commodity cost shocks (`cost_shocks` schedule, default
+    COST_SHOCK_SCHEDULE) come from the same seed as generate_transactions().
+    Returns (out_dir, total rows).
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown storage format: {format!r} (expected one of {list(FORMATS)})")
+    out_dir = out_dir or os.path.join(DATA_DIR, TRANSACTIONS_DATASET)
+    shocks = weekly_cost_shocks(weeks, np.random.default_rng(seed), cost_shocks)
+    n_blocks = -(-len(customers_df) // customers_per_shard)
+    claim_dataset_dir(out_dir, overwrite, writer="generate_transactions_sharded", seed=seed,
+                      weeks=weeks, format=format, customers_per_shard=customers_per_shard,
+                      shards=weeks * n_blocks)
+    shards = [(w, b) for w in range(weeks) for b in range(n_blocks)]
+    init_args = (products_df, customers_df, shocks, seed, customers_per_shard, out_dir, format)
+
+    task = _write_shard if guard is None else _draw_shard
+
+    if max_workers == 1:
+        _init_shard_worker(*init_args)
+        results = map(task, shards)
+        written = list(results) if guard is None else _write_guarded(results, guard, out_dir, format)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_shard_worker,
+                                 initargs=init_args) as pool:
+            results = pool.map(task, shards, chunksize=max(1, len(shards) // 64))
+            written = list(results) if guard is None else _write_guarded(results, guard, out_dir, format)
+    return out_dir, sum(rows for _, rows in written)
+
+
+def generate_scaled_dataset(customers_per_segment, sku_clones=1, weeks=16, cost_shocks=None,
+                            out_dir=None, seed=42, cost_jitter=0.05, max_workers=None,
+                            customers_per_shard=256, format="parquet", guard=False):
+    """
+    Load-testing dataset at an arbitrary scale (see SCALE_PRESETS): scaled
+    customer base, cloned catalog and `weeks` of sharded transactions. The
+    catalog and customers are written as CSVs next to the dataset directory.
+    With `guard=True` shards pass the ingest guard over the cloned catalog.
+    Returns (products, customers, dataset path, rows).
+    """
+    out_dir = out_dir or os.path.join(DATA_DIR, "scale")
+    os.makedirs(out_dir, exist_ok=True)
+    products = expand_catalog(build_product_catalog(seed), sku_clones, cost_jitter, seed)
+    customers = generate_customers_scaled(customers_per_segment, seed)
+    products.to_csv(os.path.join(out_dir, "products.csv"), index=False)
+    customers.to_csv(os.path.join(out_dir, "customers.csv"), index=False)
+    path, rows = generate_transactions_sharded(
+        products, customers, weeks=weeks, seed=seed,
+        out_dir=os.path.join(out_dir, TRANSACTIONS_DATASET),
+        customers_per_shard=customers_per_shard, max_workers=max_workers, format=format,
+        cost_shocks=cost_shocks, guard=new_guard(products) if guard else None)
+    return products, customers, path, rows
+
+
+def generate_transactions_legacy(products_df, customers_df, weeks=16):
+    """
+    Original row-by-row generator, driven by the global NumPy RNG.
+    Kept as the statistical reference for generator_parity_report().
     """
     transactions = []
     start_date = datetime(2025, 10, 6)  # 16 weeks back from ~Feb 2026
@@ -446,7 +842,72 @@ def generate_transactions(products_df, customers_df, weeks=16):
     return pd.DataFrame(transactions)
 
 
+def generator_parity_report(products_df, customers_df, weeks=16, seed=42, alpha=0.01):
+    """
+    Parity mode: runs the legacy and vectorized generators side by side and
+    tests that the key transaction distributions are statistically equivalent.
+    Distributional metrics use a two-sample KS test, rates a two-proportion
+    z-test; `equivalent` is True when the test does not reject at `alpha`.
+    """
+    from scipy import stats
+
+    np.random.seed(seed)
+    legacy = generate_transactions_legacy(products_df, customers_df, weeks=weeks)
+    fast = generate_transactions(products_df, customers_df, weeks=weeks, seed=seed)
+
+    def basket_sizes(df):
+        return df.groupby(["week_number", "customer_id"]).size().to_numpy()
+
+    def discount_ratio(df):
+        plain = df[~df["has_override"].astype(bool)]
+        return (plain["net_price"] / plain["list_price"]).to_numpy()
+
+    rows = []
+    for metric, fn in [
+        ("basket_size", basket_sizes),
+        ("cases_ordered", lambda df: df["cases_ordered"].to_numpy()),
+        ("gp_pct", lambda df: df["gp_pct"].to_numpy()),
+        ("net_to_list_ratio", discount_ratio),
+    ]:
+        a, b = fn(legacy), fn(fast)
+        rows.append({
+            "metric": metric,
+            "legacy": round(float(a.mean()), 4),
+            "vectorized": round(float(b.mean()), 4),
+            "p_value": round(float(stats.ks_2samp(a, b).pvalue), 4),
+        })
+
+    a, b = legacy["has_override"].astype(bool), fast["has_override"].astype(bool)
+    pooled = (a.sum() + b.sum()) / (len(a) + len(b))
+    se = np.sqrt(pooled * (1 - pooled) * (1 / len(a) + 1 / len(b)))
+    z = (a.mean() - b.mean()) / se
+    rows.append({
+        "metric": "override_rate",
+        "legacy": round(float(a.mean()), 4),
+        "vectorized": round(float(b.mean()), 4),
+        "p_value": round(float(2 * stats.norm.sf(abs(z))), 4),
+    })
+
+    report = pd.DataFrame(rows)
+    report["rel_diff"] = ((report["vectorized"] - report["legacy"]) / report["legacy"]).round(4)
+    report["equivalent"] = report["p_value"] >= alpha
+    return report
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # python data_ingestion.py 10M|100M|1B  → load-testing dataset
+        preset = SCALE_PRESETS[sys.argv[1]]
+        print(f"Generating {sys.argv[1]} scale dataset: {preset}")
+        products, customers, path, rows = generate_scaled_dataset(**preset)
+        print(f"  → {len(products):,} SKUs, {len(customers):,} customers, "
+              f"{rows:,} transactions → {path}")
+        sys.exit(0)
+
+    # The catalog and customer attributes draw from the global NumPy stream;
+    # seeding here (not at import) keeps importers' random state untouched
+    np.random.seed(42)
+
     print("Building product catalog from Sysco price sheet...")
     products = build_product_catalog()
     print(f"  → {len(products)} unique products across {products['category'].nunique()} categories")
@@ -461,8 +922,16 @@ if __name__ == "__main__":
     print(f"  → Total net sales: ${txns['net_sales'].sum():,.0f}")
     print(f"  → Average GP%: {txns['gp_pct'].mean():.1%}")
 
+    # Ingest guard on the write path: each week is validated before it is stored
+    guard = new_guard(products)
+    txns = pd.concat([validate_batch(guard, week) for _, week in txns.groupby("week_number")],
+                     ignore_index=True)
+    report = guard_report(guard)
+    print(f"  → Ingest guard: {report['quarantined']:,} rows quarantined, "
+          f"{report['flagged']:,} flagged")
+
     # Save intermediate outputs
-    products.to_csv("/home/claude/pricing_engine/products.csv", index=False)
-    customers.to_csv("/home/claude/pricing_engine/customers.csv", index=False)
-    txns.to_csv("/home/claude/pricing_engine/transactions.csv", index=False)
-    print("\nData saved to /home/claude/pricing_engine/")
+    products.to_csv(os.path.join(DATA_DIR, "products.csv"), index=False)
+    customers.to_csv(os.path.join(DATA_DIR, "customers.csv"), index=False)
+    dataset_path = write_transactions(txns, format="parquet", partition_by=("week_number",))
+    print(f"\nData saved to {DATA_DIR}/ (transactions → {dataset_path})")
@@ -0,0 +1,313 @@
+"""
+Sysco Revenue Management — Incremental Weekly Aggregation
+Keeps additive per-week aggregates (sales, COGS, GP, cases, override and
+transaction counts) plus exact-distinct bitmap sketches in a persisted state
+store, so a new week of transactions only aggregates that week's rows.
+Modules 1 and 7 (weekly summary, category / segment performance, basket
+analysis) are served from the state; WoW columns are re-derived on read.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from storage import DATA_DIR
+from schema import materialize
+from analytics_engine import (
+    add_weekly_metrics, add_category_metrics, add_segment_metrics, add_basket_metrics,
+    weekly_portfolio_summary, category_performance, segment_performance, basket_analysis,
+)
+
+STATE_DIR = os.path.join(DATA_DIR, "aggregate_state")
+
+STATE_COLUMNS = [
+    "week_number", "customer_id", "customer_name", "segment", "product_id", "category",
+    "is_commodity", "has_override", "transaction_id", "cases_ordered", "net_sales",
+    "cogs", "gross_profit_dollars",
+]
+
+# Entity dictionaries: stable id → bit position, append-only across weeks
+DICTIONARIES = ["customer_id", "product_id", "category"]
+
+# table → (group keys, additive measures, bitmap sketches: column → dictionary)
+AGGREGATES = {
+    "weekly": (["week_number"],
+               ["net_sales", "cogs", "gross_profit_dollars", "cases_ordered",
+                "override_count", "transaction_count"],
+               {"customer_bitmap": "customer_id", "product_bitmap": "product_id"}),
+    "category_weekly": (["week_number", "category"],
+                        ["net_sales", "cogs", "gross_profit_dollars", "cases_ordered"],
+                        {"product_bitmap": "product_id"}),
+    "segment_weekly": (["week_number", "segment"],
+                       ["net_sales", "cogs", "gross_profit_dollars", "cases_ordered"],
+                       {"customer_bitmap": "customer_id"}),
+    "customer_weekly": (["week_number", "customer_id"],
+                        ["net_sales", "gross_profit_dollars", "cases_ordered", "commodity_sales"],
+                        {"product_bitmap": "product_id", "category_bitmap": "category"}),
+    "customer_category_weekly": (["week_number", "customer_id", "category"],
+                                 ["net_sales"], {}),
+}
+
+
+# ── Exact-distinct bitmap sketches ───────────────────────────────────────────
+
+def _bitmap(codes, size):
+    bits = np.zeros(size, dtype=bool)
+    bits[codes] = True
+    return np.packbits(bits).tobytes()
+
+
+def _unpack(bitmap, size):
+    bits = np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8))
+    out = np.zeros(size, dtype=bool)
+    n = min(size, len(bits))
+    out[:n] = bits[:n].astype(bool)
+    return out
+
+
+def _distinct_count(bitmaps, size):
+    """Exact |union| of a group of bitmaps."""
+    union = np.zeros(size, dtype=bool)
+    for bm in bitmaps:
+        union |= _unpack(bm, size)
+    return int(union.sum())
+
+
+# ── State maintenance ────────────────────────────────────────────────────────
+
+def empty_state():
+    state = {name: pd.DataFrame(columns=keys + measures + list(sketches))
+             for name, (keys, measures, sketches) in AGGREGATES.items()}
+    state["dictionaries"] = {name: pd.Index([], dtype=object) for name in DICTIONARIES}
+    state["customers"] = pd.DataFrame(columns=["customer_id", "customer_name", "segment"])
+    return state
+
+
+def _extend_dictionary(index, values):
+    new = pd.Index(pd.unique(np.asarray(values, dtype=object))).difference(index, sort=False)
+    return index.append(new) if len(new) else index
+
+
+def _aggregate_week(rows, state):
+    """Per-table aggregates for one week's rows (dictionaries already extended)."""
+    rows = rows.assign(
+        override_count=rows["has_override"].astype(bool).astype(np.int64),
+        transaction_count=rows["transaction_id"].notna().astype(np.int64),
+        commodity_sales=rows["net_sales"].where(rows["is_commodity"].astype(bool), 0.0),
+    )
+    codes = {name: state["dictionaries"][name].get_indexer(rows[name].astype(object))
+             for name in DICTIONARIES}
+    sizes = {name: len(state["dictionaries"][name]) for name in DICTIONARIES}
+
+    tables = {}
+    for name, (keys, measures, sketches) in AGGREGATES.items():
+        grouped = rows.groupby(keys, observed=True, sort=True)
+        table = grouped[measures].sum().reset_index()
+        group_ids = grouped.ngroup().to_numpy()
+        for col, dictionary in sketches.items():
+            order = np.argsort(group_ids, kind="stable")
+            splits = np.flatnonzero(np.diff(group_ids[order])) + 1
+            member_codes = np.split(codes[dictionary][order], splits)
+            table[col] = [_bitmap(c, sizes[dictionary]) for c in member_codes]
+        tables[name] = table
+    return tables
+
+
+def append_week(state, week_txns):
+    """
+    Fold one week of transactions into the state. Only `week_txns` is scanned;
+    if the week is already present its aggregates are replaced.
+    """
+    rows = materialize(week_txns, STATE_COLUMNS)[STATE_COLUMNS]
+    weeks = rows["week_number"].unique()
+
+    for name in DICTIONARIES:
+        state["dictionaries"][name] = _extend_dictionary(state["dictionaries"][name], rows[name])
+    known = state["customers"]
+    new_customers = rows[["customer_id", "customer_name", "segment"]].drop_duplicates("customer_id")
+    new_customers = new_customers[~new_customers["customer_id"].isin(known["customer_id"])]
+    state["customers"] = pd.concat([known, new_customers.astype(object)], ignore_index=True)
+
+    for name, table in _aggregate_week(rows, state).items():
+        kept = state[name][~state[name]["week_number"].isin(weeks)]
+        merged = pd.concat([kept, table], ignore_index=True) if len(kept) else table
+        state[name] = merged.sort_values(AGGREGATES[name][0], kind="stable").reset_index(drop=True)
+    return state
+
+
+def build_state(txns):
+    """Full rebuild: fold every week of history into a fresh state."""
+    state = empty_state()
+    txns = materialize(txns, STATE_COLUMNS)
+    for _, week_txns in txns.groupby("week_number", sort=True):
+        append_week(state, week_txns)
+    return state
+
+
+def save_state(state, path=STATE_DIR):
+    os.makedirs(path, exist_ok=True)
+    for name in AGGREGATES:
+        state[name].to_parquet(os.path.join(path, f"{name}.parquet"), index=False)
+    for name, index in state["dictionaries"].items():
+        pd.DataFrame({name: index.astype(str)}).to_parquet(
+            os.path.join(path, f"dictionary_{name}.parquet"), index=False)
+    state["customers"].to_parquet(os.path.join(path, "customers.parquet"), index=False)
+    return path
+
+
+def load_state(path=STATE_DIR):
+    state = {name: pd.read_parquet(os.path.join(path, f"{name}.parquet")) for name in AGGREGATES}
+    state["dictionaries"] = {
+        name: pd.Index(pd.read_parquet(os.path.join(path, f"dictionary_{name}.parquet"))[name]
+                       .astype(object))
+        for name in DICTIONARIES
+    }
+    state["customers"] = pd.read_parquet(os.path.join(path, "customers.parquet"))
+    return state
+
+
+# ── Module outputs served from the state ─────────────────────────────────────
+
+def _distinct_by_row(table, col, size):
+    return np.array([_distinct_count([bm], size) for bm in table[col]], dtype=np.int64)
+
+
+def weekly_summary_from_state(state):
+    t = state["weekly"]
+    n_cust = len(state["dictionaries"]["customer_id"])
+    n_prod = len(state["dictionaries"]["product_id"])
+    weekly = pd.DataFrame({
+        "week_number": t["week_number"].astype(np.int64),
+        "total_net_sales": t["net_sales"].astype(float),
+        "total_cogs": t["cogs"].astype(float),
+        "total_gp": t["gross_profit_dollars"].astype(float),
+        "total_cases": t["cases_ordered"].astype(np.int64),
+        "unique_customers": _distinct_by_row(t, "customer_bitmap", n_cust),
+        "unique_products": _distinct_by_row(t, "product_bitmap", n_prod),
+        "override_count": t["override_count"].astype(np.int64),
+        "transaction_count": t["transaction_count"].astype(np.int64),
+    })
+    return add_weekly_metrics(weekly)
+
+
+def category_performance_from_state(state):
+    t = state["category_weekly"]
+    cat = pd.DataFrame({
+        "week_number": t["week_number"].astype(np.int64),
+        "category": t["category"],
+        "net_sales": t["net_sales"].astype(float),
+        "cogs": t["cogs"].astype(float),
+        "gp": t["gross_profit_dollars"].astype(float),
+        "cases": t["cases_ordered"].astype(np.int64),
+        "products": _distinct_by_row(t, "product_bitmap", len(state["dictionaries"]["product_id"])),
+    })
+    return add_category_metrics(cat)
+
+
+def segment_performance_from_state(state):
+    t = state["segment_weekly"]
+    seg = pd.DataFrame({
+        "week_number": t["week_number"].astype(np.int64),
+        "segment": t["segment"],
+        "net_sales": t["net_sales"].astype(float),
+        "cogs": t["cogs"].astype(float),
+        "gp": t["gross_profit_dollars"].astype(float),
+        "cases": t["cases_ordered"].astype(np.int64),
+        "customers": _distinct_by_row(t, "customer_bitmap", len(state["dictionaries"]["customer_id"])),
+    })
+    return add_segment_metrics(seg)
+
+
+def basket_from_state(state, recent_from=13):
+    """Module 7 basket breadth over weeks >= recent_from, merged from weekly sketches."""
+    cw = state["customer_weekly"]
+    cw = cw[cw["week_number"] >= recent_from]
+    n_prod = len(state["dictionaries"]["product_id"])
+    n_cat = len(state["dictionaries"]["category"])
+
+    grouped = cw.groupby("customer_id", sort=True)
+    basket = grouped[["net_sales", "gross_profit_dollars", "cases_ordered", "commodity_sales"]].sum()
+    basket["unique_products"] = grouped["product_bitmap"].agg(lambda b: _distinct_count(b, n_prod))
+    basket["unique_categories"] = grouped["category_bitmap"].agg(lambda b: _distinct_count(b, n_cat))
+    basket = basket.reset_index().merge(state["customers"], on="customer_id", how="left")
+
+    basket = add_basket_metrics(pd.DataFrame({
+        "customer_id": basket["customer_id"],
+        "customer_name": basket["customer_name"],
+        "segment": basket["segment"],
+        "total_sales": basket["net_sales"].astype(float),
+        "total_gp": basket["gross_profit_dollars"].astype(float),
+        "unique_products": basket["unique_products"].astype(np.int64),
+        "unique_categories": basket["unique_categories"].astype(np.int64),
+        "total_cases": basket["cases_ordered"].astype(np.int64),
+    }))
+    basket["commodity_share"] = basket["customer_id"].map(
+        grouped["commodity_sales"].sum() / grouped["net_sales"].sum()).to_numpy()
+
+    ccw = state["customer_category_weekly"]
+    ccw = ccw[ccw["week_number"] >= recent_from]
+    top_cats = (ccw.groupby("category")["net_sales"].sum().astype(float)
+                .sort_values(ascending=False).head(10))
+    return basket, top_cats
+
+
+# ── Proof of equivalence with the full recompute ─────────────────────────────
+
+def _frames_match(a, b, rtol=1e-9, atol=1e-9):
+    a = a.reset_index(drop=True)
+    b = b.reset_index(drop=True)
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    for col in a.columns:
+        x, y = a[col], b[col]
+        if pd.api.types.is_float_dtype(x) or pd.api.types.is_float_dtype(y):
+            if not np.allclose(x.astype(float), y.astype(float), rtol=rtol, atol=atol,
+                               equal_nan=True):
+                return False
+        elif not (x.astype(str).to_numpy() == y.astype(str).to_numpy()).all():
+            return False
+    return True
+
+
+def verify_incremental(txns, state=None):
+    """
+    Rebuild every served output from the state (built week by week when not
+    supplied) and compare against the full-history module functions.
+    Integer columns must match exactly, float sums to 1e-9 relative.
+    """
+    state = state or build_state(txns)
+    basket_full, top_full = basket_analysis(txns)
+    basket_inc, top_inc = basket_from_state(state)
+    checks = {
+        "weekly_portfolio_summary": _frames_match(weekly_portfolio_summary(txns),
+                                                  weekly_summary_from_state(state)),
+        "category_performance": _frames_match(category_performance(txns),
+                                              category_performance_from_state(state)),
+        "segment_performance": _frames_match(segment_performance(txns),
+                                             segment_performance_from_state(state)),
+        "basket_analysis": _frames_match(basket_full, basket_inc),
+        "top_categories": _frames_match(top_full.reset_index(), top_inc.reset_index()),
+    }
+    return pd.DataFrame({"output": list(checks), "equal": list(checks.values())})
+
+
+if __name__ == "__main__":
+    import time
+    from analytics_engine import load_data
+
+    print("Loading data...")
+    products, customers, txns = load_data()
+    last_week = int(txns["week_number"].max())
+
+    start = time.perf_counter()
+    state = build_state(txns[txns["week_number"] < last_week])
+    print(f"  → State built for weeks 1-{last_week - 1} in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    append_week(state, txns[txns["week_number"] == last_week])
+    print(f"  → Week {last_week} appended in {time.perf_counter() - start:.3f}s")
+    print(f"  → State saved to {save_state(state)}")
+
+    print("\nIncremental vs full rebuild:")
+    print(verify_incremental(txns, load_state()).to_string(index=False))
@@ -0,0 +1,244 @@
+"""
+Sysco Revenue Management — Ingest Integrity Guard
+Validates transactions as they arrive instead of after the fact: every
+incoming batch is checked against the product catalog and rolling
+per-product net price statistics, using the row-local rules of the
+integrity registry plus guard rules that read that reference state. Rows
+failing a quarantine-severity rule are appended to the run's quarantine
+file (one time-stamped file per guard) with their violation bitmask; clean rows pass on and update the running price
+mean / variance (Welford, merged per batch). Per-batch latency is recorded.
+"""
+
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from storage import DATA_DIR
+from integrity import INTEGRITY_RULES, violation_mask, row_columns
+
+QUARANTINE_DIR = os.path.join(DATA_DIR, "quarantine")
+
+GUARD_PARAMS = {
+    "catalog_cost_pct": 0.25,    # unit cost within ±25% of the catalog base cost
+    "price_z": 4.0,              # net price within 4 running sd of the product mean
+    "min_history": 8,            # rows of history before the price test applies
+}
+QUARANTINE_SEVERITIES = {"CRITICAL"}
+
+# Integrity rules that only read the row itself
+ROW_LOCAL_RULES = ["neg_margin", "below_cost", "high_margin", "override_outside_band"]
+
+# Rules over reference state; their columns are supplied as context per batch
+GUARD_RULES = [
+    {
+        "name": "unknown_product",
+        "check": "Product Not in Catalog",
+        "severity": "CRITICAL",
+        "columns": ["catalog_code"],
+        "predicate": lambda c, p: c["catalog_code"] < 0,
+        "detail": lambda s, p: f"{s['count']} rows for products missing from the catalog",
+        "action": "Load the product into the catalog before accepting its transactions",
+    },
+    {
+        "name": "catalog_cost_mismatch",
+        "check": "Unit Cost Off Catalog Cost",
+        "severity": "CRITICAL",
+        "columns": ["unit_cost", "catalog_cost"],
+        "predicate": lambda c, p: np.abs(c["unit_cost"] / c["catalog_cost"] - 1)
+                                  > p["catalog_cost_pct"],
+        "detail": lambda s, p: (f"{s['count']} rows with unit cost more than "
+                                f"±{p['catalog_cost_pct']:.0%} from the catalog base cost"),
+        "action": "Check the cost feed for unit-of-measure or keying errors",
+    },
+    {
+        "name": "price_outlier",
+        "check": "Net Price Outlier vs Running Stats",
+        "severity": "CRITICAL",
+        "columns": ["net_price", "running_n", "running_mean", "running_sd"],
+        "predicate": lambda c, p: (c["running_n"] >= p["min_history"]) & (
+            np.abs(c["net_price"] - c["running_mean"]) > p["price_z"] * c["running_sd"]),
+        "detail": lambda s, p: (f"{s['count']} rows priced more than {p['price_z']:g} sd "
+                                f"from the product's running mean"),
+        "action": "Confirm the price with the account owner before invoicing",
+    },
+]
+
+
+# Per-row reference values validate_batch() supplies to the guard rules
+CONTEXT_COLUMNS = ["catalog_code", "catalog_cost", "running_n", "running_mean", "running_sd"]
+
+
+def guard_rules():
+    by_name = {rule["name"]: rule for rule in INTEGRITY_RULES}
+    return [by_name[name] for name in ROW_LOCAL_RULES] + GUARD_RULES
+
+
+def guard_columns(guard):
+    """Transaction columns a guard reads from each batch."""
+    cols = {col for rule in guard["rules"] for col in rule["columns"]} - set(CONTEXT_COLUMNS)
+    return sorted(cols | {"product_id"})
+
+
+def quarantine_file(quarantine_dir=QUARANTINE_DIR):
+    """A run-stamped quarantine path, e.g. quarantine/quarantine_20260301T101500_123456.csv."""
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S_%f")
+    return os.path.join(quarantine_dir, f"quarantine_{stamp}.csv")
+
+
+def new_guard(products, quarantine_path=None, params=None, rules=None):
+    """
+    Guard state over a product catalog: running price stats per catalog
+    product (count, mean, sum of squared deviations) start empty.
+    Quarantined rows go to `quarantine_path` (default: a new run-stamped
+    file under QUARANTINE_DIR; False disables it). Existing files are
+    appended to, never removed.
+    """
+    catalog = pd.Index(products["product_id"].astype(str))
+    if quarantine_path is None:
+        quarantine_path = quarantine_file()
+    return {
+        "catalog": catalog,
+        "catalog_cost": products["base_cost"].to_numpy(dtype=float),
+        "n": np.zeros(len(catalog), dtype=np.int64),
+        "mean": np.zeros(len(catalog)),
+        "m2": np.zeros(len(catalog)),
+        "params": {**GUARD_PARAMS, **(params or {})},
+        "rules": rules or guard_rules(),
+        "quarantine_path": quarantine_path,
+        "batches": [],
+    }
+
+
+def update_price_stats(guard, codes, prices):
+    """
+    Fold a batch into the running per-product mean / M2: per-product batch
+    moments are merged with Welford's parallel update (Chan et al.),
+    n = nA + nB, δ = meanB - meanA, mean += δ·nB/n, M2 += M2B + δ²·nA·nB/n.
+    """
+    size = len(guard["catalog"])
+    n_b = np.bincount(codes, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_b = np.bincount(codes, weights=prices, minlength=size) / n_b
+    m2_b = np.bincount(codes, weights=(prices - mean_b[codes]) ** 2, minlength=size)
+
+    hit = n_b > 0
+    n_a, mean_a = guard["n"][hit], guard["mean"][hit]
+    n = n_a + n_b[hit]
+    delta = mean_b[hit] - mean_a
+    guard["mean"][hit] = mean_a + delta * n_b[hit] / n
+    guard["m2"][hit] += m2_b[hit] + delta ** 2 * n_a * n_b[hit] / n
+    guard["n"][hit] = n
+
+
+def price_stats(guard):
+    """Running per-product net price count / mean / sd (sample) as a frame."""
+    n = guard["n"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sd = np.sqrt(guard["m2"] / (n - 1))
+    return pd.DataFrame({"product_id": guard["catalog"], "rows": n,
+                         "mean_net_price": guard["mean"], "sd_net_price": sd})
+
+
+def validate_batch(guard, batch):
+    """
+    Check one batch. Rows failing a quarantine-severity rule are appended to
+    the quarantine file (with a `violations` bitmask and `reasons`), clean
+    rows update the running stats and are returned. Records batch latency.
+    """
+    start = time.perf_counter()
+    params, rules = guard["params"], guard["rules"]
+    codes = guard["catalog"].get_indexer(batch["product_id"].astype(str))
+    known = codes >= 0
+    safe = np.where(known, codes, 0)
+    n = guard["n"][safe]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sd = np.sqrt(guard["m2"][safe] / (n - 1))
+    context = {
+        "catalog_code": codes,
+        "catalog_cost": np.where(known, guard["catalog_cost"][safe], np.nan),
+        "running_n": np.where(known, n, 0),
+        "running_mean": guard["mean"][safe],
+        "running_sd": sd,
+    }
+    mask = violation_mask(batch, rules, params, context)
+
+    quarantine_bits = sum(1 << bit for bit, rule in enumerate(rules)
+                          if rule["severity"] in QUARANTINE_SEVERITIES)
+    bad = (mask & mask.dtype.type(quarantine_bits)) > 0
+    if bad.any() and guard["quarantine_path"]:
+        _quarantine(guard, batch[bad], mask[bad])
+
+    clean = batch[~bad]
+    ok = ~bad & known
+    update_price_stats(guard, codes[ok], row_columns(batch, ["net_price"])["net_price"][ok])
+
+    guard["batches"].append({
+        "rows": len(batch),
+        "quarantined": int(bad.sum()),
+        "flagged": int((mask > 0).sum()),
+        "latency_ms": (time.perf_counter() - start) * 1000,
+    })
+    return clean
+
+
+def _quarantine(guard, rows, mask):
+    names = np.array([rule["name"] for rule in guard["rules"]], dtype=object)
+    bits = (mask[:, None] >> np.arange(len(names), dtype=mask.dtype)) & 1
+    out = rows.copy()
+    out["violations"] = mask
+    out["reasons"] = [";".join(names[row.astype(bool)]) for row in bits]
+    path = guard["quarantine_path"]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    out.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+
+
+def guarded(batches, guard):
+    """Streaming stage: yield the clean part of every batch."""
+    for batch in batches:
+        yield validate_batch(guard, batch)
+
+
+def guard_report(guard):
+    """Rows in / quarantined and per-batch latency percentiles."""
+    batches = pd.DataFrame(guard["batches"])
+    if batches.empty:
+        return {"batches": 0}
+    latency = batches["latency_ms"]
+    rows = int(batches["rows"].sum())
+    return {
+        "batches": len(batches),
+        "rows": rows,
+        "quarantined": int(batches["quarantined"].sum()),
+        "flagged": int(batches["flagged"].sum()),
+        "latency_ms_p50": round(float(latency.median()), 3),
+        "latency_ms_p95": round(float(latency.quantile(0.95)), 3),
+        "latency_ms_max": round(float(latency.max()), 3),
+        "rows_per_sec": round(rows / (latency.sum() / 1000)),
+    }
+
+
+if __name__ == "__main__":
+    from analytics_engine import load_data
+    from streaming import iter_chunks
+
+    print("Loading catalog...")
+    products, customers, txns = load_data()
+
+    guard = new_guard(products)
+    for clean in guarded(iter_chunks(chunk_rows=10_000, columns=None), guard):
+        pass
+    print(f"  → clean history: {guard_report(guard)}")
+
+    # A corrupted batch: below-cost prices, a 10x keyed cost and an unknown SKU
+    bad = txns.sample(1_000, random_state=1).reset_index(drop=True)
+    bad["product_id"] = bad["product_id"].astype(str)
+    bad.loc[:9, "net_price"] = bad.loc[:9, "unit_cost"] * 0.5
+    bad.loc[10:14, "unit_cost"] = bad.loc[10:14, "unit_cost"] * 10
+    bad.loc[15:19, "product_id"] = "SKU-0000000"
+    clean = validate_batch(guard, bad)
+    print(f"  → corrupted batch: {len(clean):,} clean, "
+          f"{guard['batches'][-1]['quarantined']} quarantined → {guard['quarantine_path']}")
+    print(pd.read_csv(guard["quarantine_path"])["reasons"].value_counts().to_string())
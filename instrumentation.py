@@ -0,0 +1,244 @@
+"""
+Sysco Revenue Management — Instrumentation
+Tracing hooks for the analytics functions: the @instrumented decorator and
+the trace() context manager record duration, input rows, output size and
+resident-memory delta per call, optionally with a cProfile or sampling-
+profiler capture of the hot spots. Each trace is emitted as a JSON log line
+on the "pricing.trace" logger and kept for summary_table(). Disabled (the
+default) a decorated function costs one dict lookup per call.
+
+Environment switches (read at import, see enable()):
+    PRICING_TRACE=1                  record traces
+    PRICING_PROFILE=cprofile|sample  add a profile to top-level traces
+    PRICING_PROFILE_DIR=<dir>        also dump .prof files (cprofile)
+    PRICING_TRACE_LOG=<path>         append the JSON log lines to a file
+                                     (default: stderr)
+"""
+
+import cProfile
+import functools
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import pandas as pd
+
+logger = logging.getLogger("pricing.trace")
+
+PROFILERS = ["cprofile", "sample"]
+HOTSPOTS = 5
+SAMPLE_INTERVAL_S = 0.005
+
+_STATE = {"enabled": False, "profile": None, "profile_dir": None, "handlers": {}}
+TRACES = []
+_STACK = []
+
+
+def enable(profile=None, profile_dir=None, log_path=None):
+    """
+    Start recording traces; `profile` is None, "cprofile" or "sample". The
+    trace logger is set to INFO and writes its JSON lines to `log_path`
+    (appended) or, without one, to stderr; each target gets one handler
+    however often enable() is called.
+    """
+    if profile is not None and profile not in PROFILERS:
+        raise ValueError(f"Unknown profiler: {profile!r} (expected one of {PROFILERS})")
+    _STATE.update(enabled=True, profile=profile, profile_dir=profile_dir)
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+    target = os.path.abspath(log_path) if log_path else "<stderr>"
+    if target not in _STATE["handlers"]:
+        handler = logging.FileHandler(target) if log_path else logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        _STATE["handlers"][target] = handler
+    logger.setLevel(logging.INFO)
+
+
+def disable():
+    _STATE["enabled"] = False
+
+
+def is_enabled():
+    return _STATE["enabled"]
+
+
+def reset():
+    TRACES.clear()
+
+
+def env_options():
+    """enable() keyword arguments from the PRICING_* environment variables."""
+    return {"profile": os.environ.get("PRICING_PROFILE") or None,
+            "profile_dir": os.environ.get("PRICING_PROFILE_DIR") or None,
+            "log_path": os.environ.get("PRICING_TRACE_LOG") or None}
+
+
+# ── Sizes and memory ─────────────────────────────────────────────────────────
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+def _rows(obj):
+    """Row count of a frame, a cube (its cells) or a sized container."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj)
+    if isinstance(obj, dict) and "cells" in obj:
+        return len(obj["cells"])
+    if isinstance(obj, dict) and "fact" in obj:
+        return len(obj["fact"])
+    return None
+
+
+def _output_size(result):
+    """(rows, MB) of a result; tuples are summed over their frames."""
+    parts = result if isinstance(result, tuple) else (result,)
+    rows, nbytes = 0, 0
+    for part in parts:
+        if isinstance(part, dict) and "cells" in part:
+            part = part["cells"]
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            rows += len(part)
+            nbytes += int(part.memory_usage(index=False).sum()
+                          if isinstance(part, pd.DataFrame) else part.memory_usage(index=False))
+        elif hasattr(part, "__len__"):
+            rows += len(part)
+    return rows, round(nbytes / 2**20, 3)
+
+
+# ── Profilers ────────────────────────────────────────────────────────────────
+
+def _cprofile_hotspots(profiler, top=HOTSPOTS):
+    stats = pstats.Stats(profiler).stats
+    ranked = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+    return [{"function": f"{os.path.basename(file)}:{line}({name})",
+             "calls": nc, "tottime_s": round(tt, 4), "cumtime_s": round(ct, 4)}
+            for (file, line, name), (_, nc, tt, ct, _) in ranked]
+
+
+def _start_sampler(thread_id, interval=SAMPLE_INTERVAL_S):
+    """Sample `thread_id`'s innermost frame every `interval` seconds."""
+    sampler = {"counts": Counter(), "done": threading.Event()}
+
+    def run():
+        while not sampler["done"].wait(interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                code = frame.f_code
+                sampler["counts"][f"{os.path.basename(code.co_filename)}:{frame.f_lineno}"
+                                  f"({code.co_name})"] += 1
+
+    sampler["thread"] = threading.Thread(target=run, daemon=True)
+    sampler["thread"].start()
+    return sampler
+
+
+def _stop_sampler(sampler, top=HOTSPOTS):
+    sampler["done"].set()
+    sampler["thread"].join()
+    total = sum(sampler["counts"].values()) or 1
+    return [{"function": where, "samples": n, "share": round(n / total, 3)}
+            for where, n in sampler["counts"].most_common(top)]
+
+
+# ── Hooks ────────────────────────────────────────────────────────────────────
+
+@contextmanager
+def trace(name, rows=None):
+    """
+    Trace a block. Yields the record so the block can fill in output sizes
+    (record["output_rows"] / ["output_mb"]). Only top-level traces are
+    profiled; nested ones carry their parent's name.
+    """
+    if not _STATE["enabled"]:
+        yield {}
+        return
+    record = {"name": name, "parent": _STACK[-1] if _STACK else None, "depth": len(_STACK),
+              "input_rows": rows}
+    profiler = sampler = None
+    if not _STACK and _STATE["profile"] == "cprofile":
+        profiler = cProfile.Profile()
+    elif not _STACK and _STATE["profile"] == "sample":
+        sampler = _start_sampler(threading.get_ident())
+    _STACK.append(name)
+    rss = _rss_mb()
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield record
+    finally:
+        if profiler:
+            profiler.disable()
+        if sampler:
+            record["hotspots"] = _stop_sampler(sampler)
+        record["duration_s"] = round(time.perf_counter() - start, 6)
+        after = _rss_mb()
+        record["mem_delta_mb"] = round(after - rss, 1) if rss is not None else None
+        _STACK.pop()
+        if profiler:
+            record["hotspots"] = _cprofile_hotspots(profiler)
+            if _STATE["profile_dir"]:
+                profiler.dump_stats(os.path.join(_STATE["profile_dir"],
+                                                 f"{name}-{len(TRACES)}.prof"))
+        TRACES.append(record)
+        logger.info(json.dumps(record, default=str))
+
+
+def instrumented(func=None, *, name=None):
+    """
+    Decorator tracing every call of `func`: input rows come from the first
+    argument (a transaction frame, a star schema's fact table or a cube's
+    cells), output size from the return value.
+    """
+    if func is None:
+        return functools.partial(instrumented, name=name)
+    label = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _STATE["enabled"]:
+            return func(*args, **kwargs)
+        with trace(label, rows=_rows(args[0]) if args else None) as record:
+            result = func(*args, **kwargs)
+            record["output_rows"], record["output_mb"] = _output_size(result)
+        return result
+    return wrapper
+
+
+def summary_table(traces=None):
+    """Per-name totals: calls, total / mean / max seconds, rows, memory delta."""
+    frame = pd.DataFrame(TRACES if traces is None else traces)
+    if frame.empty:
+        return frame
+    for col in ["output_rows", "output_mb"]:
+        if col not in frame.columns:
+            frame[col] = None
+    grouped = frame.groupby("name", sort=False)
+    summary = pd.DataFrame({
+        "calls": grouped.size(),
+        "total_s": grouped["duration_s"].sum().round(4),
+        "mean_s": grouped["duration_s"].mean().round(4),
+        "max_s": grouped["duration_s"].max().round(4),
+        "input_rows": grouped["input_rows"].max().astype("Int64"),
+        "output_rows": grouped["output_rows"].max().astype("Int64"),
+        "output_mb": grouped["output_mb"].max(),
+        "mem_delta_mb": grouped["mem_delta_mb"].sum().round(1),
+        "top_level": grouped["depth"].min() == 0,
+    })
+    return summary.sort_values("total_s", ascending=False).reset_index()
+
+
+if os.environ.get("PRICING_TRACE"):
+    enable(**env_options())
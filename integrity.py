@@ -0,0 +1,272 @@
+"""
+Sysco Revenue Management — Integrity Rule Registry
+Row-level data-quality rules for Module 6. Each rule is a vectorized
+predicate over transaction columns; evaluating a rule set ORs one bit per
+rule into a single compact bitmask per row, from which counts, dollar
+impact, affected products and drill-down row indices are read without
+copying the frame. Rules with cube measures are also pre-aggregated into
+the shared cube (count + GP$ per cell), so the audit can be served from a
+cube alone.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Thresholds the built-in rules read
+INTEGRITY_PARAMS = {
+    "high_margin_pct": 0.50,     # GP% above this is suspicious
+    "override_band_pct": 0.10,   # override price within ±10% of list
+    "cost_jump_pct": 0.05,       # unit cost up >5% on the product's prior week
+}
+
+# A rule is a dict:
+#   name       — identifier (one bit in the mask, in registry order)
+#   check      — issue title;  severity — CRITICAL / WARNING / INFO
+#   columns    — row columns the predicate reads ("product_code" = product
+#                key / factorized product_id)
+#   predicate  — (cols, params) → bool array, one value per row
+#   impact     — optional (cols, params) → $ per row; default GP$ of the row
+#   measures   — optional (count, GP$) cube measure names; cube-served rules
+#                must be row-local, and cubes built after registration carry
+#                them (cube.cube_measures)
+#   detail     — (summary dict, params) → text;  action — recommended fix
+
+INTEGRITY_RULES = [
+    {
+        "name": "neg_margin",
+        "check": "Negative Margin Transactions",
+        "severity": "CRITICAL",
+        "columns": ["gp_pct"],
+        "predicate": lambda c, p: c["gp_pct"] < 0,
+        "measures": ("neg_margin_count", "neg_margin_gp"),
+        "detail": lambda s, p: (f"{s['count']} transactions with negative GP% detected. "
+                                f"Affected products: {s['products']}. "
+                                f"Total GP$ impact: ${s['dollar_impact']:,.2f}"),
+        "action": "Immediate review — likely cost update not reflected in pricing",
+    },
+    {
+        "name": "below_cost",
+        "check": "Net Price Below Cost",
+        "severity": "CRITICAL",
+        "columns": ["net_price", "unit_cost"],
+        "predicate": lambda c, p: c["net_price"] < c["unit_cost"],
+        "measures": ("below_cost_count", "below_cost_gp"),
+        "detail": lambda s, p: (f"{s['count']} transactions where net price < unit cost. "
+                                f"Revenue leakage: ${abs(s['dollar_impact']):,.2f}"),
+        "action": "Escalate to pricing system admin — config error likely",
+    },
+    {
+        "name": "high_margin",
+        "check": "Abnormally High Margin (>50%)",
+        "severity": "WARNING",
+        "columns": ["gp_pct"],
+        "predicate": lambda c, p: c["gp_pct"] > p["high_margin_pct"],
+        "measures": ("high_margin_count", "high_margin_gp"),
+        "detail": lambda s, p: (f"{s['count']} transactions with GP% > {p['high_margin_pct']:.0%}. "
+                                f"May indicate stale cost data or pricing system misconfiguration."),
+        "action": "Validate cost data freshness for flagged products",
+    },
+    {
+        "name": "override_audit",
+        "check": "Override Audit Trail",
+        "severity": "INFO",
+        "columns": ["has_override"],
+        "predicate": lambda c, p: c["has_override"].astype(bool),
+        "measures": ("override_count", "override_gp"),
+        "detail": lambda s, p: (f"{s['count']} active overrides in the last 16 weeks. "
+                                f"Override rate: {s['count'] / s['rows']:.1%}"),
+        "action": "Ensure all overrides have documented reason codes and expiry dates",
+    },
+    {
+        "name": "override_outside_band",
+        "check": "Override Outside List-Price Band",
+        "severity": "WARNING",
+        "columns": ["has_override", "override_price", "list_price", "cases_ordered"],
+        "predicate": lambda c, p: c["has_override"].astype(bool) & (
+            np.abs(np.nan_to_num(c["override_price"] / c["list_price"], nan=1.0) - 1)
+            > p["override_band_pct"]),
+        # $ the override moves the line away from list
+        "impact": lambda c, p: (np.nan_to_num(c["override_price"] - c["list_price"])
+                                * c["cases_ordered"]),
+        "detail": lambda s, p: (f"{s['count']} overrides priced more than "
+                                f"±{p['override_band_pct']:.0%} from list across {s['products']} "
+                                f"products. Net $ vs list: ${s['dollar_impact']:,.2f}"),
+        "action": "Confirm approval for out-of-band overrides; tighten override limits",
+    },
+    {
+        "name": "cost_jump_wow",
+        "check": "Unit Cost Jump Week over Week",
+        "severity": "WARNING",
+        "columns": ["product_code", "week_number", "unit_cost", "cases_ordered"],
+        "predicate": lambda c, p: c["unit_cost"] > _prior_week_cost(c) * (1 + p["cost_jump_pct"]),
+        # Added cost on the flagged lines
+        "impact": lambda c, p: np.nan_to_num(c["unit_cost"] - _prior_week_cost(c))
+                               * c["cases_ordered"],
+        "detail": lambda s, p: (f"{s['count']} transactions on {s['products']} products with "
+                                f"unit cost up more than {p['cost_jump_pct']:.0%} on the prior "
+                                f"week. Added cost: ${s['dollar_impact']:,.2f}"),
+        "action": "Verify supplier cost updates and pass-through for flagged SKUs",
+    },
+]
+
+
+def register_rule(rule, rules=INTEGRITY_RULES):
+    """Add a rule to a registry (one more bit per row); returns its bit."""
+    missing = {"name", "check", "severity", "columns", "predicate", "detail",
+               "action"} - set(rule)
+    if missing:
+        raise ValueError(f"Integrity rule is missing {sorted(missing)}")
+    if any(r["name"] == rule["name"] for r in rules):
+        raise ValueError(f"Integrity rule {rule['name']!r} is already registered")
+    if len(rules) >= 64:
+        raise ValueError("At most 64 integrity rules fit in the row bitmask")
+    rules.append(rule)
+    return len(rules) - 1
+
+
+def cube_rules(rules=INTEGRITY_RULES):
+    """Rules pre-aggregated into the cube."""
+    return [rule for rule in rules if rule.get("measures")]
+
+
+# ── Row evaluation ───────────────────────────────────────────────────────────
+
+def _prior_week_cost(cols):
+    """
+    Mean unit cost of each row's product in the latest earlier week with
+    sales (NaN for a product's first week). Cached on `cols`, which is
+    shared by the rules of one evaluation.
+    """
+    if "prior_week_cost" in cols:
+        return cols["prior_week_cost"]
+    codes, cost = cols["product_code"], cols["unit_cost"]
+    week_codes, week_values = pd.factorize(cols["week_number"], sort=True)
+    n_weeks = len(week_values)
+    slot = codes * n_weeks + week_codes
+    size = (int(codes.max()) + 1) * n_weeks if len(codes) else 0
+    count = np.bincount(slot, minlength=size).reshape(-1, n_weeks)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(slot, weights=cost, minlength=size).reshape(-1, n_weeks) / count
+    latest = np.maximum.accumulate(np.where(count > 0, np.arange(n_weeks), -1), axis=1)
+    prior = np.concatenate([np.full((len(latest), 1), -1), latest[:, :-1]], axis=1)
+    prev = prior[codes, week_codes]
+    cols["prior_week_cost"] = np.where(prev >= 0, mean[codes, np.maximum(prev, 0)], np.nan)
+    return cols["prior_week_cost"]
+
+
+def row_columns(txns, names):
+    """
+    NumPy views of the named columns of a transaction frame or star-schema
+    fact table. "product_code" is the product key, or product_id codes.
+    """
+    frame = txns["fact"] if isinstance(txns, dict) else txns
+    cols = {}
+    for name in names:
+        if name == "product_code":
+            if "product_key" in frame.columns:
+                cols[name] = frame["product_key"].to_numpy(dtype=np.int64)
+            else:
+                cols[name] = pd.factorize(frame["product_id"])[0].astype(np.int64)
+        elif name in ("has_override", "week_number"):
+            cols[name] = frame[name].to_numpy()
+        else:
+            cols[name] = frame[name].to_numpy(dtype=float)
+    return cols
+
+
+def _mask_dtype(n_rules):
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if n_rules <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError("At most 64 integrity rules fit in the row bitmask")
+
+
+def rule_flags(txns, rules=INTEGRITY_RULES, params=None, context=None):
+    """
+    Yield (rule, bool array) per rule; columns are pulled once per rule set.
+    `context` supplies extra per-row arrays (e.g. reference values looked
+    up by the caller) that rules can name in their columns.
+    """
+    params = {**INTEGRITY_PARAMS, **(params or {})}
+    context = context or {}
+    needed = sorted({col for rule in rules for col in rule["columns"]} - set(context))
+    cols = {**row_columns(txns, needed), **context}
+    for rule in rules:
+        yield rule, np.asarray(rule["predicate"](cols, params), dtype=bool)
+
+
+def violation_mask(txns, rules=INTEGRITY_RULES, params=None, context=None):
+    """
+    One pass over the rules: a per-row bitmask (uint8..uint64 by rule
+    count) with bit i set when rule i flags the row. Assign it as a column
+    (txns["violations"] = mask) to keep it with the rows.
+    """
+    frame = txns["fact"] if isinstance(txns, dict) else txns
+    mask = np.zeros(len(frame), dtype=_mask_dtype(len(rules)))
+    for bit, (_, flags) in enumerate(rule_flags(txns, rules, params, context)):
+        mask |= flags.astype(mask.dtype) << mask.dtype.type(bit)
+    return mask
+
+
+def _rule_bit(name, rules):
+    for bit, rule in enumerate(rules):
+        if rule["name"] == name:
+            return bit
+    raise KeyError(f"Unknown integrity rule {name!r}")
+
+
+def violation_rows(mask, name, rules=INTEGRITY_RULES):
+    """Drill-down: positional row indices flagged by rule `name`."""
+    bit = mask.dtype.type(1) << mask.dtype.type(_rule_bit(name, rules))
+    return np.flatnonzero(mask & bit)
+
+
+def rule_summary(txns, mask=None, rules=INTEGRITY_RULES, params=None):
+    """
+    Per rule: flagged rows, dollar impact (the rule's impact, else GP$ of
+    the flagged rows) and distinct products affected, read off the mask.
+    """
+    params = {**INTEGRITY_PARAMS, **(params or {})}
+    if mask is None:
+        mask = violation_mask(txns, rules, params)
+    needed = sorted({col for rule in rules for col in rule["columns"]}
+                    | {"product_code", "gross_profit_dollars"})
+    cols = row_columns(txns, needed)
+    n_products = int(cols["product_code"].max()) + 1 if len(mask) else 0
+    rows = []
+    for bit, rule in enumerate(rules):
+        flagged = (mask >> mask.dtype.type(bit)) & mask.dtype.type(1) > 0
+        impact = (rule["impact"](cols, params) if "impact" in rule
+                  else cols["gross_profit_dollars"])
+        rows.append({
+            "rule": rule["name"],
+            "check": rule["check"],
+            "severity": rule["severity"],
+            "count": int(flagged.sum()),
+            "dollar_impact": float(np.nansum(np.where(flagged, impact, 0.0))),
+            "products": int(np.count_nonzero(
+                np.bincount(cols["product_code"][flagged], minlength=n_products))),
+            "rows": len(mask),
+        })
+    return pd.DataFrame(rows)
+
+
+def cube_rule_summary(cells, rules=INTEGRITY_RULES):
+    """
+    rule_summary() for cube-served rules from cube cells (with product_id):
+    counts and GP$ are the summed measures.
+    """
+    rows = []
+    for rule in cube_rules(rules):
+        count_col, gp_col = rule["measures"]
+        flagged = cells[count_col] > 0
+        rows.append({
+            "rule": rule["name"],
+            "check": rule["check"],
+            "severity": rule["severity"],
+            "count": int(cells[count_col].sum()),
+            "dollar_impact": float(cells[gp_col].sum()),
+            "products": int(cells.loc[flagged, "product_id"].nunique()),
+            "rows": int(cells["txn_count"].sum()),
+        })
+    return pd.DataFrame(rows)
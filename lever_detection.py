@@ -0,0 +1,293 @@
+"""
+Sysco Revenue Management — Lever Change Detection
+Scans per-product (or per-category) unit_cost series for structural breaks
+with a vectorized CUSUM mean-shift search, and measures the impact of any
+number of candidate lever weeks in one batched pass over weekly aggregates.
+The lever week is read off product series: a category's mean unit cost
+moves with its basket mix, so category series can break in the wrong week.
+"""
+
+import numpy as np
+import pandas as pd
+
+from cube import as_cube, cube_frame
+
+LEVELS = {"category": "category", "product": "product_id"}
+
+
+def cost_series(txns, level="category"):
+    """
+    Mean unit_cost per (entity, week) as a matrix: one row per category or
+    product, one column per week. Weeks with no sales carry the nearest
+    observed cost so every series is complete.
+    """
+    entity = LEVELS[level]
+    cells = cube_frame(as_cube(txns), [entity, "week_number", "unit_cost_sum", "txn_count"])
+    sums = cells.groupby([entity, "week_number"], observed=True)[
+        ["unit_cost_sum", "txn_count"]].sum()
+    series = (sums["unit_cost_sum"] / sums["txn_count"]).unstack("week_number")
+    series.index = series.index.astype(str)
+    return series.sort_index(axis=1).ffill(axis=1).bfill(axis=1)
+
+
+def _segment_bounds(breaks):
+    """
+    For a boolean boundary matrix (series × n+1 positions), the nearest
+    boundary at or before (left) and at or after (right) every position.
+    """
+    n_pos = breaks.shape[1]
+    pos = np.arange(n_pos)
+    left = np.maximum.accumulate(np.where(breaks, pos, 0), axis=1)
+    right = np.minimum.accumulate(np.where(breaks, pos, n_pos - 1)[:, ::-1], axis=1)[:, ::-1]
+    return left, right
+
+
+def detect_change_points(series, max_breaks=2, min_segment=2, min_shift=0.01, min_score=25.0):
+    """
+    Binary segmentation for mean shifts, run on every series at once.
+
+    Cumulative sums S = Σx are computed once per series; the gain of splitting
+    segment [a, b) at k is n_l·n_r/(n_l+n_r) · (mean_right - mean_left)² with
+    both means read straight off S, so each round scores every candidate
+    split of every series with array arithmetic. A split is kept when its relative
+    cost shift is at least `min_shift` and its gain, scaled by the pooled
+    within-segment variance, is at least `min_score`.
+
+    Returns one row per break: entity, week_number (first week of the new
+    cost level), cost_before, cost_after, shift_pct, score.
+    """
+    values = series.to_numpy(dtype=float)
+    n_series, n = values.shape
+    S = np.concatenate([np.zeros((n_series, 1)), np.cumsum(values, axis=1)], axis=1)
+    rows = np.arange(n_series)
+
+    def seg_sum(A, lo, hi):
+        return A[rows[:, None], hi] - A[rows[:, None], lo]
+
+    breaks = np.zeros((n_series, n + 1), dtype=bool)
+    breaks[:, [0, n]] = True
+    found = []
+    for _ in range(max_breaks):
+        a, b = _segment_bounds(breaks)
+        k = np.broadcast_to(np.arange(n + 1), (n_series, n + 1))
+        n_left, n_right = k - a, b - k
+        valid = (n_left >= min_segment) & (n_right >= min_segment) & ~breaks
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_left = seg_sum(S, a, k) / n_left
+            mean_right = seg_sum(S, k, b) / n_right
+            gain = n_left * n_right / (n_left + n_right) * (mean_right - mean_left) ** 2
+            # Residual variance after the split, pooled over every segment
+            seg_lo, seg_hi = a[:, :n], b[:, 1:]
+            seg_mean = seg_sum(S, seg_lo, seg_hi) / (seg_hi - seg_lo)
+            sse = ((values - seg_mean) ** 2).sum(axis=1)[:, None] - gain
+            dof = np.maximum(n - breaks.sum(axis=1) - 1, 1)[:, None]
+            resid_var = np.maximum(sse, 0) / dof
+            score = np.where(resid_var > 0, gain / resid_var, np.inf)
+            shift = (mean_right - mean_left) / mean_left
+        gain = np.where(valid, gain, -np.inf)
+        best = np.argmax(gain, axis=1)
+        pick = (rows, best)
+        keep = (np.isfinite(gain[pick]) & (np.abs(shift[pick]) >= min_shift)
+                & (score[pick] >= min_score))
+        if not keep.any():
+            break
+        breaks[rows[keep], best[keep]] = True
+        found.append(pd.DataFrame({
+            "entity": series.index[keep],
+            "position": best[keep],
+            "cost_before": mean_left[pick][keep],
+            "cost_after": mean_right[pick][keep],
+            "shift_pct": shift[pick][keep],
+            "score": score[pick][keep],
+        }))
+
+    cols = ["entity", "week_number", "cost_before", "cost_after", "shift_pct", "score"]
+    if not found:
+        return pd.DataFrame(columns=cols)
+    # Costs are reported against the final segmentation, so later splits do
+    # not leave stale means on earlier breaks
+    out = pd.concat(found, ignore_index=True)
+    a, b = _segment_bounds(breaks)
+    idx = series.index.get_indexer(out["entity"])
+    pos = out["position"].to_numpy()
+    lo, hi = a[idx, pos - 1], b[idx, pos + 1]
+    out["cost_before"] = (S[idx, pos] - S[idx, lo]) / (pos - lo)
+    out["cost_after"] = (S[idx, hi] - S[idx, pos]) / (hi - pos)
+    out["shift_pct"] = (out["cost_after"] - out["cost_before"]) / out["cost_before"]
+    out["week_number"] = series.columns.to_numpy()[pos]
+    out = out[cols].sort_values(["week_number", "entity"], kind="stable").reset_index(drop=True)
+    for col in ["cost_before", "cost_after"]:
+        out[col] = out[col].round(2)
+    out["shift_pct"] = out["shift_pct"].round(4)
+    out["score"] = out["score"].round(1)
+    return out
+
+
+def lever_events(breaks, min_support=1):
+    """
+    Collapse per-series breaks into candidate lever weeks, ranked by how
+    many series break in that week.
+    """
+    if len(breaks) == 0:
+        return pd.DataFrame(columns=["week_number", "series", "avg_shift_pct", "entities"])
+    events = breaks.groupby("week_number").agg(
+        series=("entity", "size"),
+        avg_shift_pct=("shift_pct", "mean"),
+        entities=("entity", lambda s: sorted(s)),
+    ).reset_index()
+    events["avg_shift_pct"] = events["avg_shift_pct"].round(4)
+    events = events[events["series"] >= min_support]
+    return events.sort_values(["series", "week_number"], ascending=[False, True],
+                              kind="stable").reset_index(drop=True)
+
+
+def product_breaks(txns, **kwargs):
+    """Mix-neutral cost breaks: detect_change_points() on per-product series,
+    each break tagged with its product's category."""
+    cube = as_cube(txns)
+    breaks = detect_change_points(cost_series(cube, "product"), **kwargs)
+    products = cube["products"]
+    category = dict(zip(products["product_id"].astype(str), products["category"].astype(str)))
+    breaks.insert(1, "category", breaks["entity"].map(category))
+    return breaks
+
+
+def category_breaks(breaks):
+    """
+    Product breaks aggregated per category: the week most of its products
+    break in, how many do, and their mean shift.
+    """
+    cols = ["category", "week_number", "products", "avg_shift_pct"]
+    if len(breaks) == 0:
+        return pd.DataFrame(columns=cols)
+    by_week = breaks.groupby(["category", "week_number"]).agg(
+        products=("entity", "size"), avg_shift_pct=("shift_pct", "mean")).reset_index()
+    by_week = by_week.sort_values(["category", "products", "week_number"],
+                                  ascending=[True, False, True], kind="stable")
+    out = by_week.drop_duplicates("category").reset_index(drop=True)
+    out["avg_shift_pct"] = out["avg_shift_pct"].round(4)
+    return out[cols]
+
+
+def detect_lever_week(txns, default=7, breaks=None, **kwargs):
+    """
+    Week in which the most product cost series break, or `default` if none
+    do. Pass `breaks` from product_breaks() to reuse a detection run.
+    """
+    if breaks is None:
+        breaks = product_breaks(txns, **kwargs)
+    events = lever_events(breaks)
+    return int(events["week_number"].iloc[0]) if len(events) else default
+
+
+def multi_event_impact(txns, lever_weeks, window=None):
+    """
+    Pre/post commodity impact for several hypothesised lever weeks at once.
+
+    Weekly (week × commodity flag) and (week × category) totals are built in
+    one scan; each event is a row of pre / post week-membership weights, so
+    every event's period totals come from one matrix product instead of a
+    full lever_change_impact re-run per date. `window` limits each side to
+    that many weeks around the lever.
+
+    Returns a dict with `events` (one row per lever week) and
+    `category_impact` (one row per lever week × commodity category).
+    """
+    cells = cube_frame(as_cube(txns), ["week_number", "category", "is_commodity",
+                                       "txn_count", "cases_ordered", "unit_cost_sum",
+                                       "net_sales", "gross_profit_dollars"])
+    cells["is_commodity"] = cells["is_commodity"].astype(bool)
+    measures = ["gross_profit_dollars", "net_sales", "cases_ordered", "unit_cost_sum", "txn_count"]
+    weekly = cells.groupby(["week_number", "is_commodity"])[measures].sum().unstack(
+        "is_commodity", fill_value=0)
+    weeks = weekly.index.to_numpy()
+
+    lever = np.asarray(lever_weeks, dtype=int)[:, None]
+    pre = weeks[None, :] < lever
+    post = ~pre
+    if window is not None:
+        pre &= weeks[None, :] >= lever - window
+        post &= weeks[None, :] < lever + window
+    pre, post = pre.astype(float), post.astype(float)
+    n_pre, n_post = pre.sum(axis=1), post.sum(axis=1)
+
+    def totals(weights, flag):
+        cols = [(m, flag) for m in measures]
+        block = weekly.reindex(columns=pd.MultiIndex.from_tuples(cols), fill_value=0)
+        return pd.DataFrame(weights @ block.to_numpy(dtype=float), columns=measures)
+
+    comm_pre, comm_post = totals(pre, True), totals(post, True)
+    all_pre = comm_pre + totals(pre, False)
+    all_post = comm_post + totals(post, False)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gp_pre = comm_pre["gross_profit_dollars"] / comm_pre["net_sales"]
+        gp_post = comm_post["gross_profit_dollars"] / comm_post["net_sales"]
+        vol_pre = comm_pre["cases_ordered"] / n_pre
+        vol_post = comm_post["cases_ordered"] / n_post
+        cost_pre = comm_pre["unit_cost_sum"] / comm_pre["txn_count"]
+        cost_post = comm_post["unit_cost_sum"] / comm_post["txn_count"]
+        events = pd.DataFrame({
+            "lever_week": lever[:, 0],
+            "pre_weeks": n_pre.astype(int),
+            "post_weeks": n_post.astype(int),
+            "commodity_gp_pct_pre": gp_pre.round(4),
+            "commodity_gp_pct_post": gp_post.round(4),
+            "gp_erosion_bps": ((gp_post - gp_pre) * 10000).round(),
+            "blended_gp_pct_pre": (all_pre["gross_profit_dollars"] / all_pre["net_sales"]).round(4),
+            "blended_gp_pct_post": (all_post["gross_profit_dollars"] / all_post["net_sales"]).round(4),
+            "commodity_cases_per_wk_pre": vol_pre.round(1),
+            "commodity_cases_per_wk_post": vol_post.round(1),
+            "volume_change_pct": ((vol_post - vol_pre) / vol_pre).round(4),
+            "commodity_cost_increase_pct": ((cost_post - cost_pre) / cost_pre).round(4),
+        })
+
+    # Category detail: (event × week) weights applied to a (week × category) cube
+    comm = cells[cells["is_commodity"]]
+    by_cat = comm.groupby(["week_number", "category"], observed=True)[
+        ["gross_profit_dollars", "unit_cost_sum", "txn_count"]].sum().unstack("category", fill_value=0)
+    by_cat = by_cat.reindex(weeks, fill_value=0)
+    cats = by_cat["gross_profit_dollars"].columns
+    stacked = np.stack([by_cat[m].to_numpy(dtype=float)
+                        for m in ["gross_profit_dollars", "unit_cost_sum", "txn_count"]])
+    pre_tot = np.einsum("ew,mwc->mec", pre, stacked)
+    post_tot = np.einsum("ew,mwc->mec", post, stacked)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wk_gp_pre = pre_tot[0] / n_pre[:, None]
+        wk_gp_post = post_tot[0] / n_post[:, None]
+        cat_cost_pre = pre_tot[1] / pre_tot[2]
+        cat_cost_post = post_tot[1] / post_tot[2]
+    n_events, n_cats = wk_gp_pre.shape
+    category_impact = pd.DataFrame({
+        "lever_week": np.repeat(lever[:, 0], n_cats),
+        "category": np.tile(np.asarray(cats, dtype=object), n_events),
+        "weekly_gp_pre": wk_gp_pre.ravel().round(2),
+        "weekly_gp_post": wk_gp_post.ravel().round(2),
+        "gp_delta_per_week": (wk_gp_post - wk_gp_pre).ravel().round(2),
+        "avg_cost_increase_pct": ((cat_cost_post - cat_cost_pre) / cat_cost_pre).ravel().round(4),
+    })
+    return {"events": events, "category_impact": category_impact}
+
+
+if __name__ == "__main__":
+    from analytics_engine import load_data
+    from cube import build_cube
+
+    print("Loading data...")
+    products, customers, txns = load_data()
+    cube = build_cube(txns)
+
+    for level in LEVELS:
+        breaks = detect_change_points(cost_series(cube, level))
+        print(f"\nCost breaks by {level}: {len(breaks)}")
+        print(lever_events(breaks)[["week_number", "series", "avg_shift_pct"]].to_string(index=False))
+
+    breaks = product_breaks(cube)
+    print("\nProduct breaks by category:")
+    print(category_breaks(breaks).to_string(index=False))
+    lever_week = detect_lever_week(cube, breaks=breaks)
+    print(f"\n  → detected lever week: {lever_week}")
+    candidates = [lever_week - 1, lever_week, lever_week + 1]
+    impact = multi_event_impact(cube, candidates)
+    print("\nImpact by hypothesised lever week:")
+    print(impact["events"].to_string(index=False))
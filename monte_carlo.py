@@ -0,0 +1,193 @@
+"""
+Sysco Revenue Management — Monte Carlo Scenario Engine
+Replaces the single-point pass-through assumptions of Module 5 with sampled
+commodity cost shocks and segment volume responses, and evaluates scenarios
+A/B/C across thousands of draws as one (draws × rows) NumPy computation.
+The scenarios are Module 5's SCENARIO_SPECS compiled by scenario_specs, and
+each draw perturbs those price / volume matrices, so with zero uncertainty
+the simulation reproduces scenario_analysis() exactly.
+"""
+
+import numpy as np
+import pandas as pd
+
+from cube import as_cube
+from schema import attach_attributes
+from scenario_specs import scenario_rows, compile_specs
+from analytics_engine import (
+    PASS_THROUGH_COST_INCREASE, PASS_THROUGH_VOL_LOSS, SEGMENT_VOL_LOSS, HOLD_VOL_GAIN,
+    SCENARIO_SPECS,
+)
+
+# Sampled volume shocks a spec can name as its `volume_shock`; the ones that
+# are a response to a price move are replaced by elasticity × price when
+# segment elasticities are given
+VOLUME_SHOCKS = ["pass_through_loss", "segment_loss", "hold_gain"]
+ELASTIC_VOLUME_SHOCKS = {"pass_through_loss", "segment_loss"}
+
+# Spread of each sampled assumption around its Module 5 point value
+DEFAULT_UNCERTAINTY = {
+    "cost_shock_sd": 0.01,        # per-category commodity cost increase (absolute)
+    "volume_sd_ratio": 0.5,       # segment volume response sd as a share of its mean
+    "hold_gain_sd": 0.015,        # volume gain from holding price (absolute)
+}
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def segment_elasticities(txns, sensitivity):
+    """
+    Per-segment mean elasticity and its standard error from a
+    compute_price_sensitivity() result (log-log slope when present,
+    ratio-of-means proxy otherwise).
+    """
+    col = "loglog_elasticity" if "loglog_elasticity" in sensitivity.columns else "elasticity_proxy"
+    est = attach_attributes(sensitivity[["customer_id", "product_id", col]],
+                            as_cube(txns), ["segment"])
+    est = est[np.isfinite(est[col])]
+    grouped = est.groupby("segment", observed=True)[col]
+    out = pd.DataFrame({"elasticity": grouped.mean(),
+                        "elasticity_se": grouped.std() / np.sqrt(grouped.size())})
+    return out.fillna({"elasticity_se": 0.0})
+
+
+def _draw_assumptions(rng, n_draws, categories, segments, uncertainty, elasticity):
+    """
+    Group-level random inputs for every draw, sampled up front so the
+    results do not depend on how the row expansion is chunked.
+    """
+    loss_a = PASS_THROUGH_VOL_LOSS
+    loss_b = np.array([SEGMENT_VOL_LOSS.get(s, 0.0) for s in segments])
+    draws = {
+        "cost_shock": rng.normal(PASS_THROUGH_COST_INCREASE, uncertainty["cost_shock_sd"],
+                                 size=(n_draws, len(categories))),
+        "pass_through_loss": rng.normal(loss_a, loss_a * uncertainty["volume_sd_ratio"],
+                                        size=(n_draws, len(segments))),
+        "segment_loss": rng.normal(loss_b, loss_b * uncertainty["volume_sd_ratio"],
+                                   size=(n_draws, len(segments))),
+        "hold_gain": rng.normal(HOLD_VOL_GAIN, uncertainty["hold_gain_sd"], size=(n_draws, 1)),
+    }
+    if elasticity is not None:
+        e = elasticity.reindex(segments)
+        draws["elasticity"] = rng.normal(e["elasticity"].fillna(0.0).to_numpy(),
+                                         e["elasticity_se"].fillna(0.0).to_numpy(),
+                                         size=(n_draws, len(segments)))
+    return draws
+
+
+def simulate_scenarios(txns, n_draws=10000, seed=42, chunk_size=2000, elasticity=None,
+                       uncertainty=None, downside_pct=5, specs=SCENARIO_SPECS):
+    """
+    Monte Carlo version of scenario_analysis().
+
+    The price delta P and volume response V of every spec phase come from
+    compile_specs(specs), the matrices evaluate_specs() projects. Per draw
+    they are shifted by zero-mean shocks the spec names: with
+    `cost_pass_through` the price moves with a commodity cost increase
+    per category around its point value; `volume_shock` (one of
+    VOLUME_SHOCKS) adds the pass-through or per-segment volume loss, or the
+    hold volume gain. With `elasticity` (segment_elasticities() output)
+    price-response volume shocks (ELASTIC_VOLUME_SHOCKS) are sampled as
+    elasticity × price move instead.
+    Sales follow evaluate_specs(): Σ (1 + V)·(net_sales + price_x_cases·P),
+    COGS and cases scale by (1 + V), phases blend by their week weights.
+    Rows are expanded to (draws × rows) matrices in chunks of `chunk_size`
+    draws to bound memory.
+
+    Returns a dict with `summary` (one row per scenario: GP vs baseline
+    mean / sd / percentiles, probability of losing GP, value-at-risk and
+    mean GP vs baseline of the worst `downside_pct`% of draws, share of
+    draws where the scenario is best) and `gp_vs_baseline` (draws × scenarios).
+    """
+    uncertainty = {**DEFAULT_UNCERTAINTY, **(uncertainty or {})}
+    rows = scenario_rows(txns)
+    seg_codes, segments = pd.factorize(rows["segment"].astype(str), sort=True)
+    cat_codes, categories = pd.factorize(rows["category"].astype(str), sort=True)
+    base_gp = rows["gross_profit_dollars"].sum()
+    net_sales = rows["net_sales"].to_numpy(dtype=float)
+    pxc = rows["price_x_cases"].to_numpy(dtype=float)
+    cogs = rows["cogs"].to_numpy(dtype=float)
+    cases = rows["cases_ordered"].to_numpy(dtype=float)
+
+    for spec in specs:
+        if spec.get("volume_shock") not in [None] + VOLUME_SHOCKS:
+            raise ValueError(f"Unknown volume shock {spec['volume_shock']!r} "
+                             f"(expected one of {VOLUME_SHOCKS})")
+    names = [spec.get("name", f"spec_{i}") for i, spec in enumerate(specs)]
+    compiled = compile_specs(specs, rows)
+    P, V, W = compiled["price"], compiled["volume"], compiled["weights"]
+    phase_specs = [specs[i] for i in compiled["owner"]]
+    loss_b = np.array([SEGMENT_VOL_LOSS.get(s, 0.0) for s in segments])
+
+    rng = np.random.default_rng(seed)
+    draws = _draw_assumptions(rng, n_draws, categories, segments, uncertainty, elasticity)
+
+    gp = np.empty((n_draws, len(specs)))
+    sales = np.empty_like(gp)
+    volume = np.empty_like(gp)
+    for start in range(0, n_draws, chunk_size):
+        sl = slice(start, min(start + chunk_size, n_draws))
+        n = sl.stop - start
+        # Zero-mean shifts of the compiled spec matrices (chunk × rows)
+        cost_shift = draws["cost_shock"][sl][:, cat_codes] - PASS_THROUGH_COST_INCREASE
+        volume_shift = {
+            "pass_through_loss": (PASS_THROUGH_VOL_LOSS
+                                  - draws["pass_through_loss"][sl][:, seg_codes]),
+            "segment_loss": loss_b[seg_codes] - draws["segment_loss"][sl][:, seg_codes],
+            "hold_gain": np.broadcast_to(draws["hold_gain"][sl] - HOLD_VOL_GAIN, (n, len(rows))),
+        }
+        totals = np.zeros((3, n, W.shape[1]))                   # sales / cogs / cases per phase
+        for k, spec in enumerate(phase_specs):
+            price = P[k] + cost_shift if spec.get("cost_pass_through") else P[k]
+            shock = spec.get("volume_shock")
+            if elasticity is not None and shock in ELASTIC_VOLUME_SHOCKS:
+                vol = draws["elasticity"][sl][:, seg_codes] * price
+            else:
+                vol = V[k] + volume_shift[shock] if shock else V[k]
+            growth = 1 + np.maximum(vol, -1.0)
+            totals[0, :, k] = (growth * (net_sales + pxc * price)).sum(axis=1)
+            totals[1, :, k] = (growth * cogs).sum(axis=1)
+            totals[2, :, k] = (growth * cases).sum(axis=1)
+        s, c, volume[sl] = totals @ W.T
+        gp[sl] = s - c
+        sales[sl] = s
+
+    delta = gp - base_gp
+    best = np.bincount(delta.argmax(axis=1), minlength=len(specs)) / n_draws
+    cutoff = np.percentile(delta, downside_pct, axis=0)
+    summary = pd.DataFrame({
+        "scenario": names,
+        "gp_vs_baseline_mean": delta.mean(axis=0).round(2),
+        "gp_vs_baseline_sd": delta.std(axis=0, ddof=1).round(2),
+        **{f"gp_vs_baseline_p{p}": np.percentile(delta, p, axis=0).round(2) for p in PERCENTILES},
+        "projected_gp_pct_mean": (gp / sales).mean(axis=0).round(4),
+        "volume_change_pct_mean": (volume / cases.sum() - 1).mean(axis=0).round(4),
+        "prob_gp_below_baseline": (delta < 0).mean(axis=0).round(4),
+        f"value_at_risk_{downside_pct}": np.maximum(-cutoff, 0).round(2),
+        f"tail_mean_{downside_pct}": np.array([
+            delta[delta[:, j] <= cutoff[j], j].mean() for j in range(len(specs))]).round(2),
+        "prob_best": best.round(4),
+    })
+    return {"summary": summary,
+            "gp_vs_baseline": pd.DataFrame(delta, columns=names)}
+
+
+if __name__ == "__main__":
+    import time
+    from analytics_engine import load_data, compute_price_sensitivity
+    from cube import build_cube
+
+    print("Loading data...")
+    products, customers, txns = load_data()
+    cube = build_cube(txns)
+
+    start = time.perf_counter()
+    result = simulate_scenarios(cube, n_draws=10000)
+    print(f"  → 10,000 draws in {time.perf_counter() - start:.2f}s")
+    print(result["summary"].T.to_string())
+
+    elasticity = segment_elasticities(cube, compute_price_sensitivity(cube, loglog=True))
+    print("\nSegment elasticities (log-log):")
+    print(elasticity.round(3).to_string())
+    result = simulate_scenarios(cube, n_draws=10000, elasticity=elasticity)
+    print("\nElasticity-driven volume response:")
+    print(result["summary"].T.to_string())
@@ -0,0 +1,234 @@
+"""
+Sysco Revenue Management — Parallel Module Runner
+Schedules the analytics modules as a dependency graph on a process pool.
+The shared aggregation cube is written once as Arrow IPC files and
+memory-mapped by every worker (zero-copy numeric columns), so workers
+never receive a pickled copy of the data; the fact rows the integrity
+audit's row-level rules read are shared the same way. Reports per-module wall time and
+the speedup over running the same graph serially.
+"""
+
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from analytics_engine import (
+    weekly_portfolio_summary, category_performance, segment_performance, margin_bridge,
+    generate_override_recommendations, override_floor_sweep, lever_change_impact,
+    scenario_analysis, data_integrity_audit, basket_analysis,
+)
+from integrity import INTEGRITY_RULES
+from lever_detection import detect_lever_week
+
+CUBE_TABLES = ["cells", "customers", "products", "weeks"]
+ROWS_TABLE = "rows"
+
+
+# ── Zero-copy cube sharing ───────────────────────────────────────────────────
+
+def share_cube(cube, path):
+    """Write the cube's tables as Arrow IPC files under `path`."""
+    os.makedirs(path, exist_ok=True)
+    for name in CUBE_TABLES:
+        table = pa.Table.from_pandas(cube[name], preserve_index=False)
+        with ipc.new_file(os.path.join(path, f"{name}.arrow"), table.schema) as writer:
+            writer.write_table(table)
+    return path
+
+
+def audit_row_columns(rules=INTEGRITY_RULES):
+    """Fact columns the integrity audit reads from raw rows."""
+    cols = {col for rule in rules for col in rule["columns"]} | {"gross_profit_dollars"}
+    return sorted((cols - {"product_code"}) | {"product_id"})
+
+
+def share_rows(rows, path):
+    """Write the audit's fact columns of `rows` as an Arrow IPC file under `path`."""
+    os.makedirs(path, exist_ok=True)
+    table = pa.Table.from_pandas(rows[audit_row_columns()], preserve_index=False)
+    with ipc.new_file(os.path.join(path, f"{ROWS_TABLE}.arrow"), table.schema) as writer:
+        writer.write_table(table)
+    return path
+
+
+def open_shared_rows(path):
+    """Memory-map the fact rows written by share_rows(), or None if absent."""
+    file = os.path.join(path, f"{ROWS_TABLE}.arrow")
+    if not os.path.exists(file):
+        return None
+    return ipc.open_file(pa.memory_map(file)).read_all().to_pandas(split_blocks=True)
+
+
+def open_shared_cube(path):
+    """
+    Memory-map a cube written by share_cube(). Numeric columns are read-only
+    views onto the mapped pages; only the small categorical dimension
+    columns are materialized.
+    """
+    cube = {}
+    for name in CUBE_TABLES:
+        source = pa.memory_map(os.path.join(path, f"{name}.arrow"))
+        cube[name] = ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+    return cube
+
+
+# ── Module graph ─────────────────────────────────────────────────────────────
+
+def _cube_only(func, **kwargs):
+    return lambda cube, products, rows, deps: func(cube, **kwargs)
+
+
+def _lever_week(cube, products, rows, deps):
+    weeks = cube["weeks"]["week_number"]
+    return {"lever_week": detect_lever_week(cube),
+            "first_week": int(weeks.min()), "last_week": int(weeks.max())}
+
+
+def _margin_bridge(cube, products, rows, deps):
+    lever = deps["lever_week"]
+    return margin_bridge(cube, period_a_weeks=(lever["first_week"], lever["lever_week"] - 1),
+                         period_b_weeks=(lever["lever_week"], lever["last_week"]))
+
+
+def _data_integrity(cube, products, rows, deps):
+    # Without fact rows the row-only rules are skipped (cube-only audit)
+    return data_integrity_audit(cube, products, rows=rows)
+
+
+# module → (callable(cube, products, rows, deps), upstream modules)
+MODULES = {
+    "lever_week": (_lever_week, []),
+    "weekly_summary": (_cube_only(weekly_portfolio_summary), []),
+    "category_performance": (_cube_only(category_performance), []),
+    "segment_performance": (_cube_only(segment_performance), []),
+    "margin_bridge": (_margin_bridge, ["lever_week"]),
+    "override_recommendations": (_cube_only(generate_override_recommendations), []),
+    "override_floor_sweep": (_cube_only(override_floor_sweep, segment_floors=True), []),
+    "lever_impact": (lambda cube, products, rows, deps: lever_change_impact(
+        cube, lever_week=deps["lever_week"]["lever_week"]), ["lever_week"]),
+    "scenarios": (_cube_only(scenario_analysis), []),
+    "data_integrity": (_data_integrity, []),
+    "basket": (_cube_only(basket_analysis), []),
+}
+
+
+# ── Worker side ──────────────────────────────────────────────────────────────
+
+_WORKER = {}
+
+
+def _init_worker(cube_path, products):
+    _WORKER["cube"] = open_shared_cube(cube_path)
+    _WORKER["rows"] = open_shared_rows(cube_path)
+    _WORKER["products"] = products
+
+
+def _run_module(name, deps):
+    func, _ = MODULES[name]
+    start = time.perf_counter()
+    result = func(_WORKER["cube"], _WORKER["products"], _WORKER["rows"], deps)
+    return name, result, time.perf_counter() - start
+
+
+# ── Schedulers ───────────────────────────────────────────────────────────────
+
+def run_serial(cube, products, modules=None, rows=None):
+    """
+    Run the graph in-process in dependency order. `rows` (raw transactions)
+    feed the integrity audit's row-level rules; without them the audit is
+    cube-only. Returns (results, timings).
+    """
+    modules = modules or list(MODULES)
+    results, timings = {}, {}
+    pending = list(modules)
+    while pending:
+        for name in pending:
+            if all(dep in results for dep in MODULES[name][1]):
+                break
+        else:
+            raise ValueError(f"Unsatisfiable module dependencies among {pending}")
+        start = time.perf_counter()
+        results[name] = MODULES[name][0](cube, products, rows,
+                                         {d: results[d] for d in MODULES[name][1]})
+        timings[name] = time.perf_counter() - start
+        pending.remove(name)
+    return results, timings
+
+
+def run_parallel(cube, products, modules=None, max_workers=None, mp_context=None, rows=None):
+    """
+    Run the graph on a process pool: a module is submitted as soon as all
+    its upstream modules have finished. `rows` are shared memory-mapped
+    next to the cube for the integrity audit (cube-only without them).
+    Returns (results, timings) with per-module wall time measured inside
+    the worker.
+    """
+    modules = modules or list(MODULES)
+    results, timings = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        share_cube(cube, tmp)
+        if rows is not None:
+            share_rows(rows, tmp)
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context,
+                                 initializer=_init_worker, initargs=(tmp, products)) as pool:
+            pending, running = list(modules), set()
+            while pending or running:
+                ready = [n for n in pending if all(d in results for d in MODULES[n][1])]
+                for name in ready:
+                    pending.remove(name)
+                    deps = {d: results[d] for d in MODULES[name][1]}
+                    running.add(pool.submit(_run_module, name, deps))
+                if not running:
+                    raise ValueError(f"Unsatisfiable module dependencies among {pending}")
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, result, elapsed = future.result()
+                    results[name] = result
+                    timings[name] = elapsed
+    return results, timings
+
+
+def benchmark_runner(cube, products, max_workers=None, rows=None):
+    """
+    Serial vs process-pool wall time for the full module graph. Returns a
+    per-module timing frame and a summary dict with the overall speedup.
+    """
+    start = time.perf_counter()
+    _, serial = run_serial(cube, products, rows=rows)
+    serial_wall = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, parallel = run_parallel(cube, products, max_workers=max_workers, rows=rows)
+    parallel_wall = time.perf_counter() - start
+
+    timings = pd.DataFrame({
+        "module": list(serial),
+        "serial_s": [round(serial[m], 4) for m in serial],
+        "worker_s": [round(parallel[m], 4) for m in serial],
+    })
+    summary = {
+        "workers": max_workers or os.cpu_count(),
+        "serial_wall_s": round(serial_wall, 3),
+        "parallel_wall_s": round(parallel_wall, 3),
+        "speedup": round(serial_wall / parallel_wall, 2),
+    }
+    return timings, summary
+
+
+if __name__ == "__main__":
+    from analytics_engine import load_data
+    from cube import build_cube
+
+    print("Loading data...")
+    products, customers, txns = load_data()
+    cube = build_cube(txns)
+
+    timings, summary = benchmark_runner(cube, products, rows=txns)
+    print(timings.to_string(index=False))
+    print(f"\n  → {summary['workers']} workers: serial {summary['serial_wall_s']:.2f}s, "
+          f"parallel {summary['parallel_wall_s']:.2f}s, speedup {summary['speedup']:.2f}x")
@@ -0,0 +1,229 @@
+"""
+Sysco Revenue Management — Price Optimizer
+Recommends GP-maximizing price changes per customer-product line under a
+maximum price move per line and a maximum volume loss per segment, using
+constant-elasticity demand fitted from compute_price_sensitivity().
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from analytics_engine import override_candidates, compute_price_sensitivity, _group_sum
+from cube import as_cube
+
+DEFAULT_ELASTICITY = -1.5
+# Pair-level log-log slopes are noisy; keep them in a plausible demand range
+ELASTICITY_BOUNDS = (-5.0, -0.2)
+
+
+def line_elasticities(cp, sensitivity=None, default=DEFAULT_ELASTICITY, bounds=ELASTICITY_BOUNDS):
+    """
+    Elasticity per candidate line: the pair's log-log slope when available,
+    else its segment median, else `default`; clipped to `bounds`.
+    """
+    est = pd.Series(np.nan, index=cp.index)
+    if sensitivity is not None and len(sensitivity) > 0:
+        col = "loglog_elasticity" if "loglog_elasticity" in sensitivity.columns else "elasticity_proxy"
+        est = cp[["customer_id", "product_id"]].merge(
+            sensitivity[["customer_id", "product_id", col]], on=["customer_id", "product_id"],
+            how="left")[col]
+        est.index = cp.index
+    est = est.clip(*bounds)
+    seg_median = est.groupby(cp["segment"].astype(str)).transform("median")
+    return est.fillna(seg_median).fillna(default).clip(*bounds).to_numpy(dtype=float)
+
+
+def _line_prices(price, cost, elasticity, shadow, max_change):
+    """
+    GP-maximizing price per line for a volume shadow price λ: maximize
+    (p - c + λ)·q0·(p/p0)^ε over p0·(1 ± max_change). For ε < -1 the
+    objective is unimodal with its peak at (c - λ)·ε/(1 + ε), so clipping
+    gives the optimum. For ε ≥ -1 any stationary point is a minimum
+    (λ > c), so the optimum is the better of the two bounds.
+    """
+    lo, hi = price * (1 - max_change), price * (1 + max_change)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stationary = np.where(elasticity < -1,
+                              (cost - shadow) * elasticity / (1 + elasticity), np.inf)
+
+    def gp(p):
+        return (p - cost + shadow) * (p / price) ** elasticity
+
+    endpoint = np.where(gp(hi) >= gp(lo), hi, lo)
+    return np.where(elasticity < -1, np.clip(stationary, lo, hi), endpoint)
+
+
+def _floor_shadow(price, cost, elasticity, max_change):
+    """
+    Per line, the λ above which _line_prices() picks the price floor: the
+    stationary point reaches the floor (ε < -1), or the floor's objective
+    overtakes the cap's (ε ≥ -1).
+    """
+    lo, hi = price * (1 - max_change), price * (1 + max_change)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        interior = cost - lo * (1 + elasticity) / elasticity
+        r = (lo / hi) ** elasticity
+        endpoint = ((hi - cost) - r * (lo - cost)) / (r - 1)
+    return np.where(elasticity < -1, interior, endpoint)
+
+
+def optimize_prices(price, cost, volume, elasticity, group_codes, max_volume_loss,
+                    max_change=0.10, iterations=60):
+    """
+    Vectorized solve over arrays of lines. `group_codes` assigns each line
+    to a volume-constraint group (segment); `max_volume_loss` is a scalar or
+    per-group array. Each group's constraint Σq(p) ≥ (1 - loss)·Σq0 is
+    enforced through its Lagrange multiplier λ ≥ 0, found by bisection for
+    all groups at once (volume is monotone in λ). A group whose target is
+    out of reach even with every line at its price floor is solved at the
+    floor and flagged infeasible.
+
+    Returns (optimal prices, projected volumes, λ per group, feasible per
+    group).
+    """
+    n_groups = int(group_codes.max()) + 1 if len(group_codes) else 0
+    loss = np.broadcast_to(np.asarray(max_volume_loss, dtype=float), (n_groups,))
+    target = (1 - loss) * _group_sum(group_codes, volume, n_groups)
+
+    def solve(shadow):
+        p = _line_prices(price, cost, elasticity, shadow[group_codes], max_change)
+        q = volume * (p / price) ** elasticity
+        return p, q
+
+    lam_lo = np.zeros(n_groups)
+    p, q = solve(lam_lo)
+    short = _group_sum(group_codes, q, n_groups) < target - 1e-9
+    feasible = np.ones(n_groups, dtype=bool)
+    if short.any():
+        # Upper bracket: a λ past every line's floor switch drives all to the floor
+        top = np.max(_floor_shadow(price, cost, elasticity, max_change))
+        lam_hi = np.where(short, max(top, 0.0) * 1.01 + 1.0, 0.0)
+        _, q_hi = solve(lam_hi)
+        feasible = _group_sum(group_codes, q_hi, n_groups) >= target - 1e-9 * np.abs(target)
+        for _ in range(iterations):
+            mid = (lam_lo + lam_hi) / 2
+            _, q_mid = solve(mid)
+            ok = _group_sum(group_codes, q_mid, n_groups) >= target
+            lam_hi = np.where(short & ok, mid, lam_hi)
+            lam_lo = np.where(short & ~ok, mid, lam_lo)
+        lam = np.where(short, lam_hi, 0.0)
+        p, q = solve(lam)
+    else:
+        lam = lam_lo
+    return p, q, lam, feasible
+
+
+def recommend_prices(txns, max_volume_loss=0.03, max_change=0.10, sensitivity=None,
+                     recent_from=13):
+    """
+    Optimal price per customer-product line from the recent-weeks override
+    candidates. `max_volume_loss` is a scalar or {segment: loss} map;
+    `sensitivity` is a compute_price_sensitivity(loglog=True) result
+    (computed when omitted).
+
+    Returns (lines, segment_summary); a segment whose volume-loss limit
+    cannot be met within the price floor has feasible=False and is priced at
+    the floor.
+    """
+    cube = as_cube(txns)
+    cp = override_candidates(cube, recent_from=recent_from)
+    if sensitivity is None:
+        sensitivity = compute_price_sensitivity(cube, loglog=True)
+
+    seg_codes, segments = pd.factorize(cp["segment"].astype(str), sort=True)
+    if isinstance(max_volume_loss, dict):
+        loss = np.array([max_volume_loss.get(s, 0.0) for s in segments])
+    else:
+        loss = float(max_volume_loss)
+
+    price = cp["avg_net_price"].to_numpy(dtype=float)
+    cost = cp["avg_cost"].to_numpy(dtype=float)
+    volume = (cp["total_cases"] / cp["weeks_ordered"]).to_numpy(dtype=float)
+    elasticity = line_elasticities(cp, sensitivity)
+
+    opt_price, opt_volume, shadow, feasible = optimize_prices(price, cost, volume, elasticity,
+                                                    seg_codes, loss, max_change)
+    gp_now = (price - cost) * volume
+    gp_opt = (opt_price - cost) * opt_volume
+    change = opt_price / price - 1
+    bound = np.select([np.isclose(change, max_change), np.isclose(change, -max_change)],
+                      ["price_cap", "price_floor"], default="interior")
+
+    lines = cp[["customer_id", "customer_name", "segment", "product_id", "description",
+                "category"]].copy()
+    lines["current_price"] = price.round(2)
+    lines["current_cost"] = cost.round(2)
+    lines["elasticity"] = elasticity.round(3)
+    lines["optimal_price"] = opt_price.round(2)
+    lines["price_change_pct"] = change.round(4)
+    lines["weekly_cases_current"] = volume.round(1)
+    lines["weekly_cases_projected"] = opt_volume.round(1)
+    lines["weekly_gp_current"] = gp_now.round(2)
+    lines["weekly_gp_projected"] = gp_opt.round(2)
+    lines["projected_annual_gp_impact"] = ((gp_opt - gp_now) * 52).round(2)
+    lines["bound"] = bound
+    lines = lines.sort_values("projected_annual_gp_impact", ascending=False, kind="stable")
+
+    n_groups = len(segments)
+    vol_now = _group_sum(seg_codes, volume, n_groups)
+    vol_opt = _group_sum(seg_codes, opt_volume, n_groups)
+    summary = pd.DataFrame({
+        "segment": segments,
+        "lines": np.bincount(seg_codes, minlength=n_groups),
+        "max_volume_loss": np.broadcast_to(loss, (n_groups,)),
+        "volume_change_pct": (vol_opt / vol_now - 1).round(4),
+        "avg_price_change_pct": (_group_sum(seg_codes, change, n_groups)
+                                 / np.bincount(seg_codes, minlength=n_groups)).round(4),
+        "annual_gp_impact": (_group_sum(seg_codes, gp_opt - gp_now, n_groups) * 52).round(2),
+        "volume_shadow_price": shadow.round(4),
+        "volume_constraint_binding": shadow > 0,
+        "feasible": feasible,
+    })
+    return lines.reset_index(drop=True), summary
+
+
+def benchmark_optimizer(n_lines=100_000, n_groups=5, max_change=0.10, seed=42, repeats=3):
+    """
+    Time optimize_prices() on synthetic lines: costs, margins, volumes and
+    elasticities drawn around the demo data's ranges. Returns best-of
+    `repeats` wall time and lines/sec.
+    """
+    rng = np.random.default_rng(seed)
+    cost = rng.uniform(10, 150, n_lines)
+    price = cost / (1 - rng.uniform(0.10, 0.35, n_lines))
+    volume = rng.gamma(2.0, 5.0, n_lines)
+    elasticity = rng.uniform(*ELASTICITY_BOUNDS, n_lines)
+    groups = rng.integers(0, n_groups, n_lines)
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        optimize_prices(price, cost, volume, elasticity, groups, 0.03, max_change)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {"lines": n_lines, "seconds": round(best, 4), "lines_per_sec": round(n_lines / best)}
+
+
+if __name__ == "__main__":
+    from analytics_engine import load_data
+    from cube import build_cube
+
+    print("Loading data...")
+    products, customers, txns = load_data()
+    cube = build_cube(txns)
+
+    lines, summary = recommend_prices(cube, max_volume_loss=0.03)
+    print(f"\n{len(lines):,} lines optimized "
+          f"(annual GP impact ${lines['projected_annual_gp_impact'].sum():,.2f})")
+    print(summary.to_string(index=False))
+    print("\nTop 10 lines:")
+    print(lines[["customer_name", "description", "current_price", "optimal_price",
+                 "elasticity", "projected_annual_gp_impact", "bound"]].head(10).to_string(index=False))
+
+    print("\nBenchmark:")
+    for n in [10_000, 100_000, 1_000_000]:
+        result = benchmark_optimizer(n_lines=n)
+        print(f"  → {result['lines']:>9,} lines: {result['seconds']:.3f}s "
+              f"({result['lines_per_sec']:,} lines/sec)")
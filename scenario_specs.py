@@ -0,0 +1,201 @@
+"""
+Sysco Revenue Management — Scenario Specs
+Declarative pass-through strategies: price deltas and volume responses by
+segment / category / pricing tier, optionally in timed phases (hold, then
+trigger steps). Any number of specs compile into (strategies × rows)
+matrices and are evaluated against the recent commodity baseline at once.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from cube import as_cube, cube_frame
+
+SPEC_DIMENSIONS = ["segment", "category", "pricing_tier"]
+
+# Spec keys copied onto the result rows untouched
+DESCRIPTIVE_KEYS = ["description", "price_action", "risk_level", "best_for"]
+
+# A spec is a dict:
+#   name        — label
+#   price       — price delta (fraction), see effects below
+#   volume      — volume response (fraction, negative = loss)
+#   elasticity  — optional; adds elasticity × price delta to the volume response
+#   phases      — optional list of {"weeks": n, "price": ..., "volume": ...,
+#                 "elasticity": ...}; the projection is the week-weighted
+#                 blend of phases (e.g. a 4-week hold, then a trigger step)
+#   cost_pass_through, volume_shock
+#               — optional; which sampled shocks monte_carlo.py applies to
+#                 the spec (see simulate_scenarios())
+# An effect is a number (applies to every row) or a dict with an optional
+# "all" value plus per-dimension maps, e.g.
+#   {"all": 0.01, "segment": {"Healthcare": 0.02}, "category": {"Dairy": 0.005}}
+# Values from every matching layer are added together.
+
+
+def scenario_rows(txns, recent_from=13):
+    """Recent commodity baseline by (segment, category, pricing_tier)."""
+    cells = cube_frame(as_cube(txns), ["week_number", "is_commodity"] + SPEC_DIMENSIONS + [
+                                       "cases_ordered", "price_x_cases", "net_sales", "cogs",
+                                       "gross_profit_dollars"])
+    recent = cells[(cells["week_number"] >= recent_from) & cells["is_commodity"].astype(bool)]
+    rows = recent.groupby(SPEC_DIMENSIONS, observed=True)[
+        ["cases_ordered", "price_x_cases", "net_sales", "cogs", "gross_profit_dollars"]].sum()
+    return rows.reset_index()
+
+
+def _phases(spec):
+    phases = spec.get("phases") or [spec]
+    return [{"weeks": p.get("weeks", 1), "price": p.get("price", 0.0),
+             "volume": p.get("volume", 0.0), "elasticity": p.get("elasticity", 0.0)}
+            for p in phases]
+
+
+def _effect_matrix(effects, dims):
+    """
+    Compile a list of effects into an (effects × rows) matrix. Lookup tables
+    are (effects × levels) per dimension, gathered onto rows by code.
+    """
+    n_rows = len(next(iter(dims.values()))[0])
+    out = np.zeros((len(effects), n_rows))
+    tables = {dim: np.zeros((len(effects), len(levels))) for dim, (_, levels) in dims.items()}
+    positions = {dim: {level: pos for pos, level in enumerate(levels)}
+                 for dim, (_, levels) in dims.items()}
+    for i, effect in enumerate(effects):
+        if not isinstance(effect, dict):
+            out[i] = float(effect)
+            continue
+        out[i] = float(effect.get("all", 0.0))
+        for dim, mapping in effect.items():
+            if dim == "all":
+                continue
+            if dim not in dims:
+                raise KeyError(f"Unknown scenario dimension {dim!r} (expected one of {SPEC_DIMENSIONS})")
+            for level, value in mapping.items():
+                pos = positions[dim].get(level)
+                if pos is not None:
+                    tables[dim][i, pos] = value
+    for dim, (codes, _) in dims.items():
+        out += tables[dim][:, codes]
+    return out
+
+
+def compile_specs(specs, rows):
+    """
+    Specs → price delta P and volume response V, both (phases × rows), plus
+    the (specs × phases) week-weight matrix W that blends phases per spec
+    and each phase's owning spec index.
+    """
+    dims = {}
+    for dim in SPEC_DIMENSIONS:
+        codes, levels = pd.factorize(rows[dim].astype(str))
+        dims[dim] = (codes, pd.Index(levels))
+
+    phases, owner, weeks = [], [], []
+    for i, spec in enumerate(specs):
+        for phase in _phases(spec):
+            phases.append(phase)
+            owner.append(i)
+            weeks.append(phase["weeks"])
+    weeks = np.asarray(weeks, dtype=float)
+
+    price = _effect_matrix([p["price"] for p in phases], dims)
+    volume = _effect_matrix([p["volume"] for p in phases], dims)
+    volume += _effect_matrix([p["elasticity"] for p in phases], dims) * price
+    volume = np.maximum(volume, -1.0)
+
+    W = np.zeros((len(specs), len(phases)))
+    W[owner, np.arange(len(phases))] = weeks
+    W /= W.sum(axis=1, keepdims=True)
+    return {"price": price, "volume": volume, "weights": W, "owner": np.asarray(owner)}
+
+
+def evaluate_specs(txns, specs, recent_from=13):
+    """
+    Project every spec against the recent commodity baseline in one pass.
+
+    Per phase: sales = Σ (1 + V)·(net_sales + price_x_cases·P), COGS and
+    cases scale by (1 + V); a zero-change phase reproduces the baseline
+    exactly. Phase totals are blended per spec by the week weights.
+    Returns one row per spec in input order.
+    """
+    rows = scenario_rows(txns, recent_from)
+    compiled = compile_specs(specs, rows)
+    P, V, W = compiled["price"], compiled["volume"], compiled["weights"]
+
+    net_sales = rows["net_sales"].to_numpy(dtype=float)
+    pxc = rows["price_x_cases"].to_numpy(dtype=float)
+    growth = 1 + V
+    sales = W @ (growth @ net_sales + (growth * P) @ pxc)
+    cogs = W @ (growth @ rows["cogs"].to_numpy(dtype=float))
+    cases = W @ (growth @ rows["cases_ordered"].to_numpy(dtype=float))
+    base_gp = rows["gross_profit_dollars"].sum()
+    base_cases = rows["cases_ordered"].sum()
+
+    gp = sales - cogs
+    result = pd.DataFrame({
+        "scenario": [spec.get("name", f"spec_{i}") for i, spec in enumerate(specs)],
+        "projected_sales": sales,
+        "projected_cogs": cogs,
+        "projected_gp": gp,
+        "projected_gp_pct": np.where(sales > 0, gp / np.where(sales > 0, sales, 1), 0.0),
+        "projected_volume": cases,
+        "volume_change_pct": cases / base_cases - 1,
+        "gp_vs_baseline": gp - base_gp,
+    })
+    for key in DESCRIPTIVE_KEYS:
+        if any(key in spec for spec in specs):
+            result[key] = [spec.get(key) for spec in specs]
+    return result
+
+
+def rank_specs(results, max_volume_loss=None, top=None):
+    """Strategies by GP vs baseline, optionally capped at a volume loss."""
+    ranked = results
+    if max_volume_loss is not None:
+        ranked = ranked[ranked["volume_change_pct"] >= -max_volume_loss]
+    ranked = ranked.sort_values("gp_vs_baseline", ascending=False, kind="stable")
+    return ranked.head(top) if top else ranked
+
+
+def segment_rate_grid(segments, rates, elasticity=-1.0, hold_weeks=0, horizon_weeks=4):
+    """
+    Every combination of per-segment pass-through rates (len(rates) **
+    len(segments) specs). Volume responds through `elasticity`; with
+    `hold_weeks`, prices stay flat for that many of `horizon_weeks` first.
+    """
+    specs = []
+    for combo in itertools.product(rates, repeat=len(segments)):
+        price = {"segment": dict(zip(segments, combo))}
+        name = " / ".join(f"{seg} {rate:+.1%}" for seg, rate in zip(segments, combo))
+        if hold_weeks:
+            phases = [{"weeks": hold_weeks},
+                      {"weeks": horizon_weeks - hold_weeks, "price": price, "elasticity": elasticity}]
+            specs.append({"name": f"Hold {hold_weeks}wk, then {name}", "phases": phases})
+        else:
+            specs.append({"name": name, "price": price, "elasticity": elasticity})
+    return specs
+
+
+if __name__ == "__main__":
+    import time
+    from analytics_engine import load_data, SCENARIO_SPECS
+    from cube import build_cube
+
+    print("Loading data...")
+    products, customers, txns = load_data()
+    cube = build_cube(txns)
+
+    print(evaluate_specs(cube, SCENARIO_SPECS)[["scenario", "gp_vs_baseline",
+                                                "projected_gp_pct", "volume_change_pct"]].to_string(index=False))
+
+    segments = sorted(cube["customers"]["segment"].astype(str).unique())
+    grid = segment_rate_grid(segments, [0.0, 0.01, 0.02, 0.03, 0.04])
+    start = time.perf_counter()
+    results = evaluate_specs(cube, grid)
+    print(f"\n  → {len(grid):,} strategies evaluated in {time.perf_counter() - start:.2f}s")
+    print("\nTop strategies with at most 3% volume loss:")
+    print(rank_specs(results, max_volume_loss=0.03, top=5)[["scenario", "gp_vs_baseline",
+                                                           "volume_change_pct"]].to_string(index=False))
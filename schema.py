@@ -0,0 +1,200 @@
+"""
+Sysco Revenue Management — Star Schema
+Normalizes denormalized transaction rows into a narrow integer-keyed fact
+table plus customer and product dimensions. Descriptive columns are joined
+back lazily, only when an analysis actually needs them.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+CUSTOMER_ATTRIBUTES = ["customer_name", "segment"]
+PRODUCT_ATTRIBUTES = ["description", "category", "brand", "is_commodity", "pricing_tier"]
+
+FACT_COLUMNS = [
+    "transaction_id", "week_number", "customer_key", "product_key",
+    "cases_ordered", "unit_cost", "list_price", "net_price", "has_override",
+    "override_price", "net_sales", "cogs", "gross_profit_dollars", "gp_pct",
+]
+
+# dimension name → (id column, surrogate key column, descriptive attributes)
+DIMENSIONS = {
+    "customers": ("customer_id", "customer_key", CUSTOMER_ATTRIBUTES),
+    "products": ("product_id", "product_key", PRODUCT_ATTRIBUTES),
+    "weeks": ("week_number", None, ["week_start"]),
+}
+
+
+def _build_dimension(txns, id_col, key_col, attrs, source=None):
+    cols = [id_col] + attrs
+    if source is not None and set(cols) <= set(source.columns):
+        dim = source[cols]
+    else:
+        dim = txns[cols]
+    dim = dim.drop_duplicates(id_col).sort_values(id_col).reset_index(drop=True)
+    for col in attrs:
+        if dim[col].dtype == object or pd.api.types.is_string_dtype(dim[col]):
+            dim[col] = dim[col].astype("category")
+    if key_col is not None:
+        dim.insert(0, key_col, np.arange(len(dim), dtype=np.int32))
+    return dim
+
+
+def build_star_schema(txns, products=None, customers=None):
+    """
+    Split a denormalized transaction frame into a star schema:
+      fact      — one row per transaction, int32 customer/product keys,
+                  int16 week, measures only
+      customers — customer_key → customer_id, customer_name, segment
+      products  — product_key → product_id, description, category, ...
+      weeks     — week_number → week_start
+    Dimension attributes are taken from `products` / `customers` when given
+    (e.g. the catalog CSVs), otherwise from the transactions themselves.
+    Raises ValueError when a transaction id is missing from a given catalog.
+    """
+    sources = {"customers": customers, "products": products, "weeks": None}
+    star = {name: _build_dimension(txns, id_col, key_col, attrs, sources[name])
+            for name, (id_col, key_col, attrs) in DIMENSIONS.items()}
+
+    fact = pd.DataFrame(index=txns.index)
+    for name in ["customers", "products"]:
+        id_col, key_col, _ = DIMENSIONS[name]
+        codes = pd.Categorical(txns[id_col], categories=star[name][id_col]).codes
+        if (codes < 0).any():
+            unknown = sorted(str(v) for v in pd.unique(txns[id_col].to_numpy()[codes < 0]))
+            raise ValueError(f"{len(unknown)} {id_col} value(s) missing from the {name} "
+                             f"dimension: {unknown[:10]}{' ...' if len(unknown) > 10 else ''}")
+        fact[key_col] = codes.astype(np.int32)
+    fact["week_number"] = txns["week_number"].astype(np.int16)
+    for col in FACT_COLUMNS:
+        if col not in fact.columns:
+            fact[col] = txns[col].to_numpy()
+    star["fact"] = fact[FACT_COLUMNS].reset_index(drop=True)
+    return star
+
+
+def is_star_schema(obj):
+    return isinstance(obj, dict) and "fact" in obj
+
+
+def materialize(txns, columns):
+    """
+    Star schema input → frame with only `columns` (lazy dimension join).
+    Denormalized frames pass through untouched.
+    """
+    if is_star_schema(txns):
+        return denormalize(txns, columns)
+    return txns
+
+
+def _dimension_column(star, name, key_values, col):
+    """Gather one dimension column onto fact rows by positional key (no hash join)."""
+    values = star[name][col]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return pd.Categorical.from_codes(values.cat.codes.to_numpy()[key_values],
+                                         dtype=values.dtype)
+    return values.to_numpy()[key_values]
+
+
+def denormalize(star, columns=None):
+    """
+    Materialize a transaction frame from the star schema. Only `columns`
+    are built, so descriptive columns are joined only when requested;
+    columns=None rebuilds the full denormalized layout.
+    """
+    fact = star["fact"]
+    if columns is None:
+        columns = ["transaction_id", "week_number", "week_start",
+                   "customer_id"] + CUSTOMER_ATTRIBUTES + ["product_id"] + PRODUCT_ATTRIBUTES + [
+                   c for c in FACT_COLUMNS if c not in ("transaction_id", "week_number",
+                                                        "customer_key", "product_key")]
+
+    out = {}
+    for col in columns:
+        if col in fact.columns:
+            out[col] = fact[col].to_numpy()
+            continue
+        for name, (id_col, key_col, attrs) in DIMENSIONS.items():
+            if col == id_col or col in attrs:
+                if key_col is None:
+                    weeks = star[name].set_index(id_col)[col]
+                    out[col] = fact[id_col].map(weeks).to_numpy()
+                else:
+                    out[col] = _dimension_column(star, name, fact[key_col].to_numpy(), col)
+                break
+        else:
+            raise KeyError(f"Column {col!r} is not in the fact table or any dimension")
+    return pd.DataFrame(out, columns=list(columns))
+
+
+def attach_attributes(frame, source, columns):
+    """
+    Join descriptive `columns` onto an aggregated frame keyed by customer_id
+    and/or product_id. `source` is a star schema (attributes come from the
+    dimensions) or a denormalized transaction frame (deduplicated lookup).
+    Each attribute is placed right after its key column.
+    """
+    out = frame
+    for name in ["customers", "products"]:
+        id_col, _, attrs = DIMENSIONS[name]
+        wanted = [c for c in columns if c in attrs and c not in out.columns]
+        if not wanted or id_col not in out.columns:
+            continue
+        if isinstance(source, dict):
+            lookup = source[name][[id_col] + wanted]
+        else:
+            lookup = source[[id_col] + wanted].drop_duplicates(id_col)
+        merged = out.merge(lookup, on=id_col, how="left")
+        pos = list(out.columns).index(id_col) + 1
+        order = list(out.columns[:pos]) + wanted + list(out.columns[pos:])
+        out = merged[order]
+    return out
+
+
+def _csv_bytes(frames):
+    total = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, df in enumerate(frames):
+            path = os.path.join(tmp, f"{i}.csv")
+            df.to_csv(path, index=False)
+            total += os.path.getsize(path)
+    return total
+
+
+def footprint_report(txns, star=None):
+    """
+    Memory / on-disk size benchmark: denormalized rows vs the star schema
+    (fact + dimensions). Returns one row per layout.
+    """
+    star = star or build_star_schema(txns)
+    star_frames = [star[k] for k in ["fact", "customers", "products", "weeks"]]
+
+    rows = []
+    for layout, frames in [("denormalized", [txns]), ("star", star_frames)]:
+        rows.append({
+            "layout": layout,
+            "rows": len(frames[0]),
+            "columns": frames[0].shape[1],
+            "memory_mb": round(sum(f.memory_usage(deep=True).sum() for f in frames) / 1e6, 2),
+            "csv_mb": round(_csv_bytes(frames) / 1e6, 2),
+        })
+    report = pd.DataFrame(rows)
+    for col in ["memory_mb", "csv_mb"]:
+        report[f"{col}_ratio"] = (report[col] / report[col].iloc[0]).round(3)
+    return report
+
+
+if __name__ == "__main__":
+    from analytics_engine import load_data
+
+    print("Loading data...")
+    products, customers, txns = load_data()
+    star = build_star_schema(txns, products=products, customers=customers)
+    print(f"  → fact: {len(star['fact']):,} rows × {star['fact'].shape[1]} columns")
+    print(f"  → dimensions: {len(star['customers'])} customers, "
+          f"{len(star['products'])} products, {len(star['weeks'])} weeks")
+    print("\nFootprint (denormalized vs star schema):")
+    print(footprint_report(txns, star).to_string(index=False))
@@ -0,0 +1,229 @@
+"""
+Sysco Revenue Management — Columnar Storage Layer
+Persists transaction history as Parquet or Arrow IPC datasets partitioned
+by week (and optionally segment), with compact dtypes, column projection
+and week-range predicate pushdown on read. Dataset directories carry an
+ownership marker; only marked (or empty) directories are ever replaced.
+The data root is $PRICING_DATA_DIR (default /home/claude/pricing_engine).
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+DATA_DIR = os.environ.get("PRICING_DATA_DIR", "/home/claude/pricing_engine")
+TRANSACTIONS_DATASET = "transactions"
+# Written into every dataset directory this package creates (ignored by readers)
+DATASET_MARKER = "_transactions_dataset.json"
+
+FORMATS = {"parquet": "parquet", "arrow": "ipc"}
+
+# Repeated descriptive strings → pandas categoricals (dictionary-encoded on disk)
+CATEGORICAL_COLUMNS = [
+    "customer_id", "customer_name", "segment", "product_id", "description",
+    "category", "brand", "pricing_tier", "week_start",
+]
+# Per-case money columns: float32 when every value round-trips at cent precision.
+# Line totals (net_sales, cogs, gross_profit_dollars) stay float64 because the
+# analytics modules sum them across the whole history.
+PER_CASE_MONEY_COLUMNS = ["unit_cost", "list_price", "net_price", "override_price"]
+
+
+def _cent_safe(values):
+    """True if float32 storage reproduces every value to the cent."""
+    values = np.asarray(values, dtype=np.float64)
+    finite = values[np.isfinite(values)]
+    if len(finite) == 0:
+        return True
+    roundtrip = finite.astype(np.float32).astype(np.float64)
+    return bool(np.array_equal(np.round(roundtrip, 2), np.round(finite, 2)))
+
+
+def compact_dtypes(txns):
+    """Downcast a transaction frame to the storage dtypes (returns a new frame)."""
+    out = txns.copy()
+    for col in CATEGORICAL_COLUMNS:
+        if col in out.columns and not isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype("category")
+    if "week_number" in out.columns:
+        out["week_number"] = out["week_number"].astype(np.int16)
+    if "cases_ordered" in out.columns:
+        out["cases_ordered"] = out["cases_ordered"].astype(np.int32)
+    for col in PER_CASE_MONEY_COLUMNS:
+        if col in out.columns and _cent_safe(out[col]):
+            out[col] = out[col].astype(np.float32)
+    for col in ["is_commodity", "has_override"]:
+        if col in out.columns:
+            out[col] = out[col].astype(bool)
+    return out
+
+
+def _partitioning(partition_by):
+    fields = [("week_number", pa.int16()) if col == "week_number" else (col, pa.string())
+              for col in partition_by]
+    return ds.partitioning(pa.schema(fields), flavor="hive")
+
+
+def claim_dataset_dir(path, overwrite=False, **meta):
+    """
+    Empty `path` for a new dataset and mark it as ours. An existing
+    non-empty directory is removed only when it holds DATASET_MARKER;
+    anything else raises FileExistsError unless `overwrite=True`. `meta` is
+    recorded in the marker.
+    """
+    if os.path.isdir(path) and os.listdir(path):
+        if not (overwrite or os.path.exists(os.path.join(path, DATASET_MARKER))):
+            raise FileExistsError(f"{path} is not a transaction dataset written by this package; "
+                                  f"pass overwrite=True to replace it")
+        shutil.rmtree(path)
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, DATASET_MARKER), "w") as f:
+        json.dump(meta, f)
+    return path
+
+
+def write_transactions(txns, path=None, format="parquet", partition_by=("week_number",),
+                       overwrite=False):
+    """
+    Write transactions as a hive-partitioned Parquet or Arrow IPC dataset.
+    `partition_by` is ("week_number",) or ("week_number", "segment").
+    A dataset previously written at `path` is replaced; any other existing
+    directory raises FileExistsError unless `overwrite=True`.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown storage format: {format!r} (expected one of {list(FORMATS)})")
+    path = path or os.path.join(DATA_DIR, TRANSACTIONS_DATASET)
+
+    table = pa.Table.from_pandas(compact_dtypes(txns), preserve_index=False)
+    # Partition keys live in the directory names; store them as plain values
+    for col in partition_by:
+        idx = table.schema.get_field_index(col)
+        target = pa.int16() if col == "week_number" else pa.string()
+        table = table.set_column(idx, col, table.column(col).cast(target))
+
+    claim_dataset_dir(path, overwrite, writer="write_transactions", format=format,
+                      partition_by=list(partition_by), rows=len(txns))
+    ds.write_dataset(
+        table, path, format=FORMATS[format],
+        partitioning=_partitioning(partition_by),
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return path
+
+
+def write_transaction_part(txns, path, week_number, part, format="parquet"):
+    """
+    Write one part file of a week-partitioned dataset (used by the sharded
+    generator, one file per worker shard). Parts land in
+    path/week_number=<week>/ so read_transactions() can read the directory.
+    Strings stay plain and money float64, so every part has the same schema
+    whatever values it holds.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown storage format: {format!r} (expected one of {list(FORMATS)})")
+    # Built with the week column so the pandas metadata keeps the full column order
+    table = pa.Table.from_pandas(txns, preserve_index=False).drop_columns(["week_number"])
+    directory = os.path.join(path, f"week_number={week_number}")
+    os.makedirs(directory, exist_ok=True)
+    out = os.path.join(directory, f"part-{part:05d}.{format}")
+    if format == "parquet":
+        pq.write_table(table, out)
+    else:
+        with pa.ipc.new_file(out, table.schema) as writer:
+            writer.write_table(table)
+    return out
+
+
+def _week_filter(weeks):
+    lo, hi = weeks
+    expr = None
+    if lo is not None:
+        expr = ds.field("week_number") >= lo
+    if hi is not None:
+        upper = ds.field("week_number") <= hi
+        expr = upper if expr is None else expr & upper
+    return expr
+
+
+def read_transactions(path=None, columns=None, weeks=None, segments=None, format="parquet"):
+    """
+    Load a transaction dataset written by write_transactions().
+
+    columns:  optional projection — only these columns are read from disk
+    weeks:    optional (first, last) inclusive week range; either bound may be
+              None. Pruned at the partition level, e.g. weeks=(13, None)
+    segments: optional list of segments to keep
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown storage format: {format!r} (expected one of {list(FORMATS)})")
+    path = path or os.path.join(DATA_DIR, TRANSACTIONS_DATASET)
+    dataset = ds.dataset(path, format=FORMATS[format], partitioning="hive")
+
+    filters = []
+    if weeks is not None:
+        week_expr = _week_filter(weeks)
+        if week_expr is not None:
+            filters.append(week_expr)
+    if segments is not None:
+        filters.append(ds.field("segment").isin(list(segments)))
+    expr = None
+    for f in filters:
+        expr = f if expr is None else expr & f
+
+    # Week order matters for period-over-period calcs, so always read the key
+    read_cols = None
+    if columns is not None:
+        read_cols = list(columns)
+        if "week_number" not in read_cols:
+            read_cols.append("week_number")
+
+    txns = dataset.to_table(columns=read_cols, filter=expr).to_pandas()
+    # Hive discovery lexically orders partitions (week 10 before week 2)
+    txns = txns.sort_values("week_number", kind="stable").reset_index(drop=True)
+    txns = compact_dtypes(txns)
+
+    if columns is not None:
+        return txns[list(columns)]
+    # Restore the writer's column order (partition keys come back last)
+    meta = dataset.schema.pandas_metadata or {}
+    schema_order = [c["name"] for c in meta.get("columns", [])] or list(txns.columns)
+    return txns[[c for c in schema_order if c in txns.columns]]
+
+
+def iter_transaction_batches(path=None, columns=None, batch_rows=100_000, format="parquet"):
+    """
+    Stream a transaction dataset as DataFrames of `batch_rows` rows (the
+    last may be shorter; storage dtypes). Record batches, which stop at
+    file boundaries, are buffered and re-sliced to that size, so memory is
+    bounded by the batch rather than the dataset. Rows arrive in file
+    order, not sorted by week.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown storage format: {format!r} (expected one of {list(FORMATS)})")
+    path = path or os.path.join(DATA_DIR, TRANSACTIONS_DATASET)
+    dataset = ds.dataset(path, format=FORMATS[format], partitioning="hive")
+    pending, rows = [], 0
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_rows):
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= batch_rows:
+            table = pa.Table.from_batches(pending)
+            yield compact_dtypes(table.slice(0, batch_rows).to_pandas())
+            rest = table.slice(batch_rows)
+            pending, rows = rest.to_batches(), rest.num_rows
+    if rows:
+        yield compact_dtypes(pa.Table.from_batches(pending).to_pandas())
+
+
+def upcast_money(txns):
+    """Per-case money columns back to float64, rounded to the stored cent values."""
+    for col in PER_CASE_MONEY_COLUMNS:
+        if col in txns.columns:
+            txns[col] = txns[col].astype(np.float64).round(2)
+    return txns
@@ -0,0 +1,281 @@
+"""
+Sysco Revenue Management — Streaming Analytics
+Runs Modules 1, 2, 6 and 7 over transaction histories larger than memory.
+Transactions are read in chunks (record batches of the columnar dataset,
+or CSV chunks) and folded into mergeable partial aggregates: the cube's
+additive measures rolled up to (week, product), (week, customer) and
+recent (customer, product). Each chunk's partials are queued and the
+queue is reduced only when it outgrows the rollup it extends, so every
+row is regrouped a bounded number of times however many chunks arrive.
+Each rollup is itself a cube, so the module functions run on it
+unchanged and return the same results as the in-memory path. Memory is
+bounded by the chunk size plus the rollups, whose size depends on entity
+counts, not row counts.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from storage import DATA_DIR, TRANSACTIONS_DATASET, iter_transaction_batches, upcast_money
+from schema import DIMENSIONS, _build_dimension
+from cube import CUBE_KEYS, cube_measures, _cell_measures
+from ingest_guard import guarded, guard_columns
+from analytics_engine import (
+    weekly_portfolio_summary, category_performance, segment_performance, margin_bridge,
+    data_integrity_audit, basket_analysis,
+)
+
+STREAM_COLUMNS = [
+    "week_number", "week_start", "customer_id", "customer_name", "segment", "product_id",
+    "description", "category", "brand", "is_commodity", "pricing_tier", "cases_ordered",
+    "unit_cost", "net_price", "has_override", "net_sales", "cogs", "gross_profit_dollars",
+    "gp_pct",
+]
+
+# Partial tables queued per rollup before a reduction is considered
+COMPACT_ROWS = 200_000
+
+# rollup → cube keys it keeps (the rest are collapsed to a single member)
+ROLLUPS = {
+    "product_weekly": ["week_number", "product_key"],     # Modules 1, 2, 6
+    "customer_weekly": ["week_number", "customer_key"],   # Module 1 customer counts
+    "customer_product_recent": ["customer_key", "product_key"],   # Module 7
+}
+
+
+def iter_chunks(source=None, chunk_rows=100_000, columns=STREAM_COLUMNS):
+    """
+    Transactions in chunks of `chunk_rows` rows (the last may be shorter)
+    from a partitioned dataset directory (default: the DATA_DIR store) or a
+    CSV file.
+    """
+    source = source or os.path.join(DATA_DIR, TRANSACTIONS_DATASET)
+    if os.path.isdir(source):
+        for batch in iter_transaction_batches(source, columns=columns, batch_rows=chunk_rows):
+            yield upcast_money(batch)
+    else:
+        yield from pd.read_csv(source, usecols=columns, chunksize=chunk_rows)
+
+
+def empty_partials(recent_from=13):
+    return {
+        "recent_from": recent_from,
+        "dictionaries": {"customers": pd.Index([], dtype=object),
+                         "products": pd.Index([], dtype=object)},
+        "attributes": {name: [] for name in DIMENSIONS},
+        "attribute_ids": {name: set() for name in DIMENSIONS},
+        "rollups": {name: [] for name in ROLLUPS},
+    }
+
+
+def _reduce(tables, keys):
+    """One partial table per key from a list of partial tables."""
+    if len(tables) == 1:
+        return tables[0]
+    return pd.concat(tables, ignore_index=True).groupby(
+        keys, sort=False)[cube_measures()].sum().reset_index()
+
+
+def _queue_partial(queue, update, keys):
+    """
+    Append a chunk's partial table to a rollup queue (queue[0] is the
+    rollup reduced so far). The queue is reduced once the pending rows
+    reach the reduced rollup's size (at least COMPACT_ROWS), so reduction
+    work stays linear in the rows folded rather than growing per chunk.
+    """
+    queue.append(update)
+    pending = sum(len(table) for table in queue[1:])
+    if len(queue) > 1 and pending >= max(len(queue[0]), COMPACT_ROWS):
+        queue[:] = [_reduce(queue, keys)]
+
+
+def fold_chunk(partials, chunk):
+    """
+    Fold one chunk into the partial aggregates. Customer / product ids are
+    coded through append-only dictionaries so keys stay stable across chunks.
+    """
+    fact = pd.DataFrame({"week_number": chunk["week_number"].to_numpy(dtype=np.int16)})
+    for name in ["customers", "products"]:
+        id_col, key_col, attrs = DIMENSIONS[name]
+        ids = chunk[id_col].astype(str)
+        index = partials["dictionaries"][name]
+        new = pd.Index(ids.unique()).difference(index, sort=False)
+        if len(new):
+            index = partials["dictionaries"][name] = index.append(new)
+        fact[key_col] = index.get_indexer(ids).astype(np.int32)
+
+    for name, (id_col, _, attrs) in DIMENSIONS.items():
+        seen = chunk[[id_col] + attrs].drop_duplicates(id_col).astype(
+            {id_col: str} if id_col != "week_number" else {})
+        known = partials["attribute_ids"][name]
+        new = seen[~seen[id_col].isin(known)]
+        if len(new):
+            partials["attributes"][name].append(new)
+            known.update(new[id_col].tolist())
+
+    for col in ["cases_ordered", "unit_cost", "net_price", "has_override", "net_sales", "cogs",
+                "gross_profit_dollars", "gp_pct"]:
+        fact[col] = chunk[col].to_numpy()
+    cells = _cell_measures(fact)
+
+    for name, keys in ROLLUPS.items():
+        rows = cells
+        if name == "customer_product_recent":
+            rows = cells[cells["week_number"] >= partials["recent_from"]]
+        update = rows.groupby(keys, sort=False)[cube_measures()].sum().reset_index()
+        _queue_partial(partials["rollups"][name], update, keys)
+    return partials
+
+
+def stream_partials(source=None, chunk_rows=100_000, recent_from=13, guard=None):
+    """
+    Fold every chunk of `source`. With `guard` (ingest_guard.new_guard) each
+    chunk passes the ingest integrity guard first; quarantined rows are not
+    folded.
+    """
+    partials = empty_partials(recent_from)
+    columns = STREAM_COLUMNS
+    if guard is not None:
+        columns = STREAM_COLUMNS + [c for c in guard_columns(guard) if c not in STREAM_COLUMNS]
+    chunks = iter_chunks(source, chunk_rows, columns)
+    if guard is not None:
+        chunks = guarded(chunks, guard)
+    for chunk in chunks:
+        fold_chunk(partials, chunk)
+    return partials
+
+
+def _collapsed_dimension(name):
+    """One-member stand-in for a dimension a rollup has summed over."""
+    id_col, key_col, attrs = DIMENSIONS[name]
+    dim = pd.DataFrame({col: ["(all)"] for col in [id_col] + attrs})
+    return _build_dimension(dim, id_col, key_col, attrs)
+
+
+def rollup_cubes(partials):
+    """
+    Partial aggregates → one cube per rollup. Dimensions are rebuilt sorted
+    by id (as build_star_schema does) and dictionary codes remapped to them.
+    """
+    dims, remap = {}, {}
+    for name, (id_col, key_col, attrs) in DIMENSIONS.items():
+        attributes = pd.concat(partials["attributes"][name], ignore_index=True)
+        dims[name] = _build_dimension(attributes, id_col, key_col, attrs)
+        if key_col is not None:
+            order = dims[name][id_col].astype(str)
+            remap[key_col] = pd.Index(order).get_indexer(partials["dictionaries"][name]).astype(np.int32)
+
+    cubes = {}
+    for name, keys in ROLLUPS.items():
+        cells = _reduce(partials["rollups"][name], keys).copy()
+        for key_col, codes in remap.items():
+            if key_col in cells.columns:
+                cells[key_col] = codes[cells[key_col].to_numpy()]
+        cube = {"weeks": dims["weeks"]}
+        for dim_name in ["customers", "products"]:
+            key_col = DIMENSIONS[dim_name][1]
+            if key_col in keys:
+                cube[dim_name] = dims[dim_name]
+            else:
+                cube[dim_name] = _collapsed_dimension(dim_name)
+                cells[key_col] = np.int32(0)
+        if "week_number" not in keys:
+            cells["week_number"] = np.int16(partials["recent_from"])
+        cells = cells[CUBE_KEYS + cube_measures()].sort_values(CUBE_KEYS, kind="stable")
+        cube["cells"] = cells.reset_index(drop=True)
+        cubes[name] = cube
+    return cubes
+
+
+def stream_analytics(source=None, products=None, chunk_rows=100_000, recent_from=13,
+                     period_a_weeks=(1, 6), period_b_weeks=(7, 16), guard=None):
+    """
+    Modules 1, 2, 6 and 7 computed from streamed chunks. Returns a dict
+    keyed like the in-memory outputs. `guard` validates chunks at ingest
+    (see stream_partials).
+    """
+    cubes = rollup_cubes(stream_partials(source, chunk_rows, recent_from, guard))
+    by_product, by_customer = cubes["product_weekly"], cubes["customer_weekly"]
+
+    weekly = weekly_portfolio_summary(by_product)
+    # Customer counts come from the rollup that kept customers
+    counts = by_customer["cells"].groupby("week_number").size()
+    weekly["unique_customers"] = weekly["week_number"].map(counts).to_numpy()
+
+    bridge, cat_bridge = margin_bridge(by_product, period_a_weeks, period_b_weeks)
+    basket, top_cats = basket_analysis(cubes["customer_product_recent"])
+    return {
+        "weekly_summary": weekly,
+        "category_performance": category_performance(by_product),
+        "segment_performance": segment_performance(by_customer),
+        "margin_bridge": bridge,
+        "category_bridge": cat_bridge,
+        "data_integrity": data_integrity_audit(by_product, products),
+        "basket": basket,
+        "top_categories": top_cats,
+    }
+
+
+# Streamed sums add chunk partials in another order than the in-memory scan,
+# so an output rounded for display (cents, 4-place ratios) can land one unit
+# in its last place away when the exact value sits on a rounding boundary
+ROUNDED_ATOL = 0.01 + 1e-9
+
+
+def _dicts_match(a, b, atol=ROUNDED_ATOL):
+    return a.keys() == b.keys() and all(
+        np.isclose(a[k], b[k], rtol=0, atol=atol) if isinstance(a[k], float) else a[k] == b[k]
+        for k in a)
+
+
+def verify_streaming(txns, products=None, source=None, chunk_rows=100_000):
+    """
+    Streamed vs in-memory outputs for every module served. Integers and
+    labels must match exactly; floats to 1e-9 relative or one unit in the
+    last rounded place (ROUNDED_ATOL). The integrity audit must be
+    identical.
+    """
+    from incremental import _frames_match
+    from cube import build_cube
+
+    cube = build_cube(txns)
+    streamed = stream_analytics(source, products, chunk_rows)
+    bridge, cat_bridge = margin_bridge(cube)
+    basket, top_cats = basket_analysis(cube)
+    by_category = lambda df: df.sort_values("category").reset_index(drop=True)
+    match = lambda a, b: _frames_match(a, b, atol=ROUNDED_ATOL)
+    checks = {
+        "weekly_summary": match(weekly_portfolio_summary(cube), streamed["weekly_summary"]),
+        "category_performance": match(category_performance(cube),
+                                      streamed["category_performance"]),
+        "segment_performance": match(segment_performance(cube), streamed["segment_performance"]),
+        "margin_bridge": _dicts_match(bridge, streamed["margin_bridge"]),
+        "category_bridge": match(by_category(cat_bridge), by_category(streamed["category_bridge"])),
+        "data_integrity": data_integrity_audit(cube, products) == streamed["data_integrity"],
+        "basket": match(basket, streamed["basket"]),
+        "top_categories": match(top_cats.reset_index(), streamed["top_categories"].reset_index()),
+    }
+    return pd.DataFrame({"output": list(checks), "equal": list(checks.values())})
+
+
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+    from analytics_engine import load_data
+
+    print("Loading data...")
+    products, customers, txns = load_data()
+
+    for chunk_rows in [10_000, 100_000]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        stream_analytics(products=products, chunk_rows=chunk_rows)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  → chunk {chunk_rows:>7,} rows: {elapsed:.2f}s, peak {peak / 1e6:.1f} MB")
+
+    print("\nStreaming vs in-memory:")
+    print(verify_streaming(txns, products).to_string(index=False))
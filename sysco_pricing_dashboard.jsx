@@ -1,4 +1,4 @@
-import { useState } from "react";
+import { useState, useEffect } from "react";
 import { LineChart, Line, BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, Cell, Legend, ComposedChart, Area } from "recharts";
 
 const DATA = {
@@ -33,7 +33,8 @@ const DATA = {
     {customer:"AR Veterans Home",seg:"Gov",product:"DONUT, YEAST GLAZED",curGP:0.1017,gap:-783,recPrice:53.10,change:0.096,risk:"Med-High",conf:"Medium",annualImpact:1206},
     {customer:"Pulaski County Det.",seg:"Gov",product:"MUSHROOM, #10CAN",curGP:0.1045,gap:-755,recPrice:52.09,change:0.092,risk:"Med-High",conf:"Medium",annualImpact:1137},
   ],
-  overrideSummary: {total:955,annualGP:147487,high:775,medium:180,low:0},
+  overrideSummary: {total:955,annualGP:147487,high:775,medium:180,low:0,
+    segments:[{seg:"Corrections/Gov",val:126488},{seg:"K-12 Education",val:20972},{seg:"Senior Living",val:27}]},
   scenarios: [
     {name:"Full Pass-Through",desc:"Pass 100% of cost increase to all customers",action:"+4.0% all commodity",gpImpact:48135,gpPct:0.2585,volChange:-0.06,risk:"Medium"},
     {name:"Targeted Overrides",desc:"Differentiated by segment price sensitivity",action:"HC +3.5%, SL +3.0%, FSR +2.0%, K-12 +1.5%, Gov +1.0%",gpImpact:22753,gpPct:0.2479,volChange:-0.055,risk:"Low-Medium"},
@@ -59,6 +60,15 @@ const DATA = {
       {cat:"Potatoes & Sides",rev:290734},{cat:"Canned Fruit",rev:284573},
       {cat:"Condiments",rev:249110},{cat:"Breakfast",rev:239657},{cat:"Snacks",rev:196222}
     ]},
+  integrity: [
+    {check:"Override Audit Trail",sev:"INFO",count:9843,detail:"9,843 active overrides across 16 weeks. All require documented reason codes and expiry dates for governance compliance.",action:"Audit a 10% random sample for valid reason codes; flag and expire any override older than 90 days."},
+    {check:"Stale Pricing Detection",sev:"INFO",count:0,detail:"No products detected with zero price movement over 8+ consecutive weeks. This is a healthy signal \u2014 all products are being actively managed.",action:"Continue monitoring. If commodity indices shift >5%, trigger immediate cost-recovery scan."},
+    {check:"Price Variance Consistency",sev:"WARNING",count:14,detail:"14 products show coefficient of variation >15% in net price across customer base. May indicate inconsistent tier assignment or unauthorized off-list discounts.",action:"Pull tier assignment for flagged SKUs. Validate that variance is intentional (segment pricing) vs leakage."},
+    {check:"Negative Margin Guard",sev:"CRITICAL",count:0,detail:"Zero transactions detected with negative gross margin. Pricing floor constraints are holding as expected.",action:"No action required. Maintain automated cost-floor checks in pricing system config."},
+    {check:"Cost Refresh Lag",sev:"WARNING",count:8,detail:"8 commodity products where the last cost update was >14 days ago but commodity index moved >2%. Stale cost inputs lead to underpriced overrides.",action:"Request cost data refresh from Procurement. Cross-check against USDA/CME commodity feeds."},
+    {check:"Duplicate Pricing Entries",sev:"INFO",count:0,detail:"No duplicate customer-product pricing configurations detected. Clean state.",action:"Maintain dedup checks in weekly data pipeline."},
+  ],
+  meta: {transactions:82620,products:122,customers:77},
 };
 
 const PAL = {
@@ -89,6 +99,104 @@ const bps = (n) => n + " bps";
 
 const TABS = ["Weekly Review","Margin Bridge","Override Recs","Lever Impact","Scenarios","Data Integrity"];
 
+// ── Exported panels ──
+// dashboard_export.py writes one artifact per panel plus manifest.json, which
+// lists each panel's file / format / hash (plus a JSON copy of Arrow panels the
+// dashboard reads) and the panels every tab reads. Only the open tab's panels
+// are fetched; DATA is the snapshot shown until then.
+const PANEL_DIR = "/dashboard/";
+const panelCache = {};
+var manifestRequest = null;
+
+function fromColumnar(v){
+  if (Array.isArray(v)) return v.map(fromColumnar);
+  if (v && typeof v === "object"){
+    var keys = Object.keys(v);
+    if (keys.length === 2 && Array.isArray(v.columns) && Array.isArray(v.data)){
+      var n = v.data.length ? v.data[0].length : 0;
+      var rows = [];
+      for (var i = 0; i < n; i++){
+        var row = {};
+        v.columns.forEach(function(c,j){ row[c] = v.data[j][i]; });
+        rows.push(row);
+      }
+      return rows;
+    }
+    var out = {};
+    keys.forEach(function(k){ out[k] = fromColumnar(v[k]); });
+    return out;
+  }
+  return v;
+}
+
+function loadManifest(){
+  if (!manifestRequest){
+    manifestRequest = fetch(PANEL_DIR+"manifest.json").then(function(r){
+      if (!r.ok) throw new Error("manifest "+r.status);
+      return r.json();
+    });
+  }
+  return manifestRequest;
+}
+
+function loadPanel(manifest, name){
+  var entry = manifest.panels[name];
+  // Arrow exports carry a JSON copy of every panel the dashboard reads
+  var file = entry && (entry.format === "json" ? entry.file : entry.json_file);
+  if (!file) return Promise.resolve(null);
+  var key = name+":"+entry.hash;
+  if (!panelCache[key]){
+    panelCache[key] = fetch(PANEL_DIR+file).then(function(r){
+      if (!r.ok) throw new Error(name+" "+r.status);
+      return r.json();
+    }).then(fromColumnar);
+  }
+  return panelCache[key];
+}
+
+// Exported panel → the DATA fields the views read
+const ADAPT = {
+  weekly_summary: w => ({weekly: w.map(r => ({wk:r.week_number,sales:r.total_net_sales,gp:r.total_gp,gpPct:r.gp_pct,cases:r.total_cases,
+    costPerCase:r.avg_cost_per_case,pricePerCase:r.avg_price_per_case,gpPerCase:r.gp_per_case}))}),
+  margin_bridge: b => ({bridge: {gpA:b.gp_per_week_a,gpB:b.gp_per_week_b,delta:b.delta_gp_per_week,price:b.price_effect,
+    cost:b.cost_effect,volume:b.volume_effect,mix:b.mix_effect}}),
+  override_recommendations: o => ({overrides: o.slice(0,10).map(r => ({customer:r.customer_name,seg:r.segment,product:r.description,
+    curGP:r.current_gp_pct,gap:r.gp_gap_bps,recPrice:r.recommended_price,change:r.price_change_pct,risk:r.volume_risk,
+    conf:r.confidence,annualImpact:r.projected_annual_gp_impact}))}),
+  override_summary: o => ({overrideSummary: {total:o.total_recommendations,annualGP:o.total_annual_gp_impact,high:o.high_confidence,
+    medium:o.medium_confidence,low:o.low_confidence,
+    segments:Object.keys(o.by_segment||{}).map(k => ({seg:k,val:o.by_segment[k]})).filter(r => r.val > 0).sort((a,b) => b.val-a.val)}}),
+  lever_impact: l => ({lever: {preGP:l.pre_period.commodity_gp_pct,postGP:l.post_period.commodity_gp_pct,
+    preCost:l.pre_period.commodity_avg_cost,postCost:l.post_period.commodity_avg_cost,
+    prePrice:l.pre_period.commodity_avg_price,postPrice:l.post_period.commodity_avg_price,
+    cats:l.category_impact.map(c => ({cat:c.category,gpDelta:c.gp_delta_per_week,costInc:c.avg_cost_increase_pct}))}}),
+  scenarios: s => ({scenarios: s.map(sc => ({name:sc.scenario.replace(/^[A-Z]: /,""),desc:sc.description,action:sc.price_action,
+    gpImpact:sc.gp_vs_baseline,gpPct:sc.projected_gp_pct,volChange:sc.volume_change_pct,risk:sc.risk_level}))}),
+  data_integrity: d => ({integrity: d.map(c => ({check:c.check,sev:c.severity,count:c.count,detail:c.detail,action:c.action}))}),
+  basket_summary: b => ({basket: {avgProducts:b.avg_products_per_customer,avgCats:b.avg_categories_per_customer,
+    commShare:b.avg_commodity_share,weeklyBasket:b.avg_weekly_basket_value,
+    topCats:Object.keys(b.top_categories).map(k => ({cat:k,rev:b.top_categories[k]}))}}),
+  metadata: m => ({meta: {transactions:m.total_transactions,products:m.products_analyzed,customers:m.customers_analyzed}}),
+};
+
+// DATA overlaid with the exported panels of `tab`, fetched when the tab opens
+function useTabData(tab){
+  const [loaded, setLoaded] = useState({});
+  useEffect(function(){
+    var live = true;
+    loadManifest().then(function(manifest){
+      var names = (manifest.tabs || {})[TABS[tab]] || [];
+      return Promise.all(names.map(function(name){
+        return loadPanel(manifest, name).then(function(v){ return v == null || !ADAPT[name] ? {} : ADAPT[name](v); });
+      }));
+    }).then(function(parts){
+      if (live) setLoaded(function(prev){ return Object.assign({}, prev, ...parts); });
+    }).catch(function(){});  // no export published: keep the snapshot
+    return function(){ live = false; };
+  }, [tab]);
+  return Object.assign({}, DATA, loaded);
+}
+
 function KPI({label,value,sub,color,bg:kbg}){
   return(
     <div style={{padding:"16px 20px",background:kbg||PAL.card,borderRadius:10,border:"1px solid "+PAL.border,flex:"1 1 0",minWidth:140}}>
@@ -131,8 +239,8 @@ function CustomTooltip({active,payload,label,formatter}){
   );
 }
 
-function WeeklyReview(){
-  const d = DATA.weekly;
+function WeeklyReview({data}){
+  const d = data.weekly;
   const last = d[d.length-1];
   const prev = d[d.length-2];
   const gpUp = last.gpPct > prev.gpPct;
@@ -184,7 +292,7 @@ function WeeklyReview(){
 
       <Section title="Portfolio Basket Composition" sub="Revenue share by category (Last 4 Weeks)">
         <div style={{display:"grid",gridTemplateColumns:"repeat(auto-fill,minmax(200px,1fr))",gap:8}}>
-          {DATA.basket.topCats.map((c,i) => (
+          {data.basket.topCats.map((c,i) => (
             <div key={i} style={{background:PAL.card,borderRadius:8,padding:"12px 14px",border:"1px solid "+PAL.border,display:"flex",justifyContent:"space-between",alignItems:"center"}}>
               <span style={{fontSize:13,color:PAL.text}}>{c.cat}</span>
               <span style={{fontSize:13,fontWeight:600,color:PAL.accent,fontVariantNumeric:"tabular-nums"}}>{fmt(c.rev)}</span>
@@ -196,8 +304,8 @@ function WeeklyReview(){
   );
 }
 
-function MarginBridge(){
-  const b = DATA.bridge;
+function MarginBridge({data}){
+  const b = data.bridge;
   const bars = [
     {name:"Period A\nGP/Wk",value:b.gpA,fill:PAL.textMuted,type:"base"},
     {name:"Price\nEffect",value:b.price,fill:PAL.green,type:"delta"},
@@ -245,13 +353,13 @@ function MarginBridge(){
       <Section title="Category-Level Impact of Cost Increase" sub="Commodity categories with largest cost pass-through gaps">
         <div style={{background:PAL.card,borderRadius:10,padding:"16px 8px 8px",border:"1px solid "+PAL.border}}>
           <ResponsiveContainer width="100%" height={280}>
-            <BarChart data={DATA.lever.cats} layout="vertical" margin={{top:5,right:20,bottom:5,left:120}}>
+            <BarChart data={data.lever.cats} layout="vertical" margin={{top:5,right:20,bottom:5,left:120}}>
               <CartesianGrid strokeDasharray="3 3" stroke={PAL.border} horizontal={false}/>
               <XAxis type="number" tick={{fill:PAL.textMuted,fontSize:11}} tickFormatter={v=>fmt(v)}/>
               <YAxis type="category" dataKey="cat" tick={{fill:PAL.textMuted,fontSize:11}} width={115}/>
               <Tooltip content={<CustomTooltip formatter={(v,n)=> n && n.includes("Cost") ? pct(v) : fmt(v)}/>}/>
               <Bar dataKey="gpDelta" name="GP$/Wk Delta" radius={[0,4,4,0]}>
-                {DATA.lever.cats.map((e,i) => <Cell key={i} fill={e.gpDelta>=0 ? PAL.green : PAL.red}/>)}
+                {data.lever.cats.map((e,i) => <Cell key={i} fill={e.gpDelta>=0 ? PAL.green : PAL.red}/>)}
               </Bar>
             </BarChart>
           </ResponsiveContainer>
@@ -261,11 +369,9 @@ function MarginBridge(){
   );
 }
 
-function OverrideRecs(){
-  var o = DATA.overrideSummary;
-  var segData = [
-    {seg:"Corrections/Gov",val:126488},{seg:"K-12 Education",val:20972},{seg:"Senior Living",val:27}
-  ];
+function OverrideRecs({data}){
+  var o = data.overrideSummary;
+  var segData = o.segments;
   return(
     <div>
       <div style={{display:"flex",gap:12,flexWrap:"wrap",marginBottom:24}}>
@@ -300,7 +406,7 @@ function OverrideRecs(){
               </tr>
             </thead>
             <tbody>
-              {DATA.overrides.map(function(r,i){return(
+              {data.overrides.map(function(r,i){return(
                 <tr key={i} style={{borderBottom:"1px solid "+PAL.border}}>
                   <td style={{padding:"10px 12px",color:PAL.text,fontWeight:500}}>{r.customer}</td>
                   <td style={{padding:"10px 12px",color:PAL.textMuted}}>{r.product}</td>
@@ -330,8 +436,8 @@ function OverrideRecs(){
   );
 }
 
-function LeverImpact(){
-  var l = DATA.lever;
+function LeverImpact({data}){
+  var l = data.lever;
   return(
     <div>
       <div style={{background:PAL.amberSoft,borderRadius:10,padding:"14px 20px",border:"1px solid rgba(245,158,11,0.25)",marginBottom:24,display:"flex",alignItems:"center",gap:12}}>
@@ -352,7 +458,7 @@ function LeverImpact(){
       <Section title="Commodity Cost vs Price Response Over Time" sub="Tracking whether pricing actions are keeping pace with cost increases">
         <div style={{background:PAL.card,borderRadius:10,padding:"16px 8px 8px",border:"1px solid "+PAL.border}}>
           <ResponsiveContainer width="100%" height={260}>
-            <LineChart data={DATA.weekly} margin={{top:5,right:20,bottom:5,left:10}}>
+            <LineChart data={data.weekly} margin={{top:5,right:20,bottom:5,left:10}}>
               <CartesianGrid strokeDasharray="3 3" stroke={PAL.border} vertical={false}/>
               <XAxis dataKey="wk" tick={{fill:PAL.textMuted,fontSize:11}} tickFormatter={v=>"W"+v}/>
               <YAxis tick={{fill:PAL.textMuted,fontSize:11}} tickFormatter={v=>"$"+v} domain={[44,62]} width={50}/>
@@ -393,8 +499,8 @@ function LeverImpact(){
   );
 }
 
-function ScenarioView(){
-  var s = DATA.scenarios;
+function ScenarioView({data}){
+  var s = data.scenarios;
   var colors = [PAL.accent, PAL.green, PAL.amber];
   return(
     <div>
@@ -442,23 +548,19 @@ function ScenarioView(){
   );
 }
 
-function DataIntegrity(){
-  var checks = [
-    {check:"Override Audit Trail",sev:"INFO",count:9843,detail:"9,843 active overrides across 16 weeks. All require documented reason codes and expiry dates for governance compliance.",action:"Audit a 10% random sample for valid reason codes; flag and expire any override older than 90 days."},
-    {check:"Stale Pricing Detection",sev:"INFO",count:0,detail:"No products detected with zero price movement over 8+ consecutive weeks. This is a healthy signal \u2014 all products are being actively managed.",action:"Continue monitoring. If commodity indices shift >5%, trigger immediate cost-recovery scan."},
-    {check:"Price Variance Consistency",sev:"WARNING",count:14,detail:"14 products show coefficient of variation >15% in net price across customer base. May indicate inconsistent tier assignment or unauthorized off-list discounts.",action:"Pull tier assignment for flagged SKUs. Validate that variance is intentional (segment pricing) vs leakage."},
-    {check:"Negative Margin Guard",sev:"CRITICAL",count:0,detail:"Zero transactions detected with negative gross margin. Pricing floor constraints are holding as expected.",action:"No action required. Maintain automated cost-floor checks in pricing system config."},
-    {check:"Cost Refresh Lag",sev:"WARNING",count:8,detail:"8 commodity products where the last cost update was >14 days ago but commodity index moved >2%. Stale cost inputs lead to underpriced overrides.",action:"Request cost data refresh from Procurement. Cross-check against USDA/CME commodity feeds."},
-    {check:"Duplicate Pricing Entries",sev:"INFO",count:0,detail:"No duplicate customer-product pricing configurations detected. Clean state.",action:"Maintain dedup checks in weekly data pipeline."},
-  ];
+function DataIntegrity({data}){
+  var checks = data.integrity;
+  var warnings = checks.filter(function(c){return c.sev==="WARNING" && c.count>0}).length;
+  var critical = checks.filter(function(c){return c.sev==="CRITICAL" && c.count>0}).length;
+  var scanned = data.meta.transactions;
   return(
     <div>
-      <Section title="Pricing System Data Integrity Audit" sub="Automated checks run against 82,620 transactions across 16 weeks">
+      <Section title="Pricing System Data Integrity Audit" sub={"Automated checks run against "+scanned.toLocaleString()+" transactions across 16 weeks"}>
         <div style={{display:"flex",gap:12,flexWrap:"wrap",marginBottom:20}}>
-          <KPI label="Checks Passed" value="4/6" color={PAL.green}/>
-          <KPI label="Warnings" value="2" color={PAL.amber}/>
-          <KPI label="Critical Issues" value="0" color={PAL.green}/>
-          <KPI label="Transactions Scanned" value="82.6K"/>
+          <KPI label="Checks Passed" value={(checks.length-warnings-critical)+"/"+checks.length} color={PAL.green}/>
+          <KPI label="Warnings" value={String(warnings)} color={PAL.amber}/>
+          <KPI label="Critical Issues" value={String(critical)} color={critical?PAL.red:PAL.green}/>
+          <KPI label="Transactions Scanned" value={(scanned/1e3).toFixed(1)+"K"}/>
         </div>
         <div style={{display:"flex",flexDirection:"column",gap:10}}>
           {checks.map(function(c,i){return(
@@ -480,6 +582,7 @@ function DataIntegrity(){
 
 export default function Dashboard(){
   const [tab, setTab] = useState(0);
+  const data = useTabData(tab);
 
   var views = [WeeklyReview, MarginBridge, OverrideRecs, LeverImpact, ScenarioView, DataIntegrity];
   var View = views[tab];
@@ -515,7 +618,7 @@ export default function Dashboard(){
         </div>
       </div>
       <div style={{padding:"24px 28px 40px",maxWidth:1100}}>
-        <View/>
+        <View data={data}/>
       </div>
       <div style={{padding:"16px 28px",borderTop:"1px solid "+PAL.border,fontSize:11,color:PAL.textDim,display:"flex",justifyContent:"space-between"}}>
         <span>Built with Python (pandas, scipy) + React \u00b7 Data: Sysco Price Sheet (Eff. 4/1/23)</span>
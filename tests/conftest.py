@@ -0,0 +1,35 @@
+"""
+Shared fixtures: a small seeded demo store (catalog, customers and 16
+weeks of transactions written through the storage layer) in a temp dir.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics_engine import load_data
+from data_ingestion import build_product_catalog, generate_customers, generate_transactions
+from storage import TRANSACTIONS_DATASET, write_transactions
+
+SEED = 7
+
+
+@pytest.fixture(scope="session")
+def data_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp("pricing_engine")
+    products = build_product_catalog(SEED)
+    customers = generate_customers(SEED)
+    products.to_csv(path / "products.csv", index=False)
+    customers.to_csv(path / "customers.csv", index=False)
+    write_transactions(generate_transactions(products, customers, weeks=16, seed=SEED),
+                       path=str(path / TRANSACTIONS_DATASET))
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def demo(data_dir):
+    """(products, customers, txns) as load_data() returns them."""
+    return load_data(data_dir)
@@ -0,0 +1,42 @@
+import os
+
+import pandas as pd
+import pytest
+
+from data_ingestion import generate_transactions_sharded, generator_parity_report
+from storage import DATASET_MARKER, read_transactions
+
+
+def _sharded(demo, out_dir, max_workers):
+    products, customers, _ = demo
+    path, rows = generate_transactions_sharded(products, customers, weeks=3, seed=11,
+                                               out_dir=str(out_dir), customers_per_shard=20,
+                                               max_workers=max_workers)
+    txns = read_transactions(path).sort_values("transaction_id").reset_index(drop=True)
+    assert len(txns) == rows
+    return txns
+
+
+def test_sharded_output_identical_across_worker_counts(demo, tmp_path):
+    serial = _sharded(demo, tmp_path / "one", max_workers=1)
+    pooled = _sharded(demo, tmp_path / "two", max_workers=2)
+    pd.testing.assert_frame_equal(serial, pooled)
+
+
+def test_sharded_writer_only_replaces_its_own_directories(demo, tmp_path):
+    _sharded(demo, tmp_path / "ds", max_workers=1)
+    assert os.path.exists(tmp_path / "ds" / DATASET_MARKER)
+    _sharded(demo, tmp_path / "ds", max_workers=1)      # marked: replaced
+
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "keep.txt").write_text("not a dataset")
+    with pytest.raises(FileExistsError):
+        _sharded(demo, other, max_workers=1)
+    assert (other / "keep.txt").exists()
+
+
+def test_vectorized_generator_matches_legacy_distributions(demo):
+    products, customers, _ = demo
+    report = generator_parity_report(products, customers, weeks=4)
+    assert report["equivalent"].all(), report
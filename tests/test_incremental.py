@@ -0,0 +1,17 @@
+from incremental import append_week, build_state, load_state, save_state, verify_incremental
+
+
+def test_state_built_week_by_week_matches_full_history(demo):
+    _, _, txns = demo
+    checks = verify_incremental(txns)
+    assert checks["equal"].all(), checks
+
+
+def test_appended_week_matches_full_rebuild(demo, tmp_path):
+    _, _, txns = demo
+    last = int(txns["week_number"].max())
+    state = build_state(txns[txns["week_number"] < last])
+    save_state(state, str(tmp_path))
+    state = append_week(load_state(str(tmp_path)), txns[txns["week_number"] == last])
+    checks = verify_incremental(txns, state)
+    assert checks["equal"].all(), checks
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from ingest_guard import (QUARANTINE_DIR, guard_report, guarded, new_guard, price_stats,
+                          validate_batch)
+
+
+def _warm_guard(demo, path):
+    products, _, txns = demo
+    guard = new_guard(products, quarantine_path=str(path))
+    for _ in guarded((week for _, week in txns.groupby("week_number")), guard):
+        pass
+    return guard
+
+
+def test_clean_history_passes_and_tracks_price_stats(demo, tmp_path):
+    _, _, txns = demo
+    guard = _warm_guard(demo, tmp_path / "quarantine.csv")
+    assert guard_report(guard)["quarantined"] == 0
+    stats = price_stats(guard).set_index("product_id")
+    expected = txns.groupby(txns["product_id"].astype(str))["net_price"].agg(["mean", "std"])
+    assert np.allclose(stats.loc[expected.index, "mean_net_price"], expected["mean"])
+    assert np.allclose(stats.loc[expected.index, "sd_net_price"], expected["std"])
+
+
+def test_corrupted_rows_are_quarantined(demo, tmp_path):
+    _, _, txns = demo
+    path = tmp_path / "quarantine.csv"
+    guard = _warm_guard(demo, path)
+
+    bad = txns.sample(1_000, random_state=1).reset_index(drop=True)
+    bad["product_id"] = bad["product_id"].astype(str)
+    bad.loc[:9, "net_price"] = bad.loc[:9, "unit_cost"] * 0.5       # below cost
+    bad.loc[10:14, "unit_cost"] = bad.loc[10:14, "unit_cost"] * 10  # 10x keyed cost
+    bad.loc[15:19, "product_id"] = "SKU-0000000"                    # not in the catalog
+    clean = validate_batch(guard, bad)
+
+    assert len(clean) == len(bad) - 20
+    assert not clean.index.isin(range(20)).any()
+    quarantined = pd.read_csv(path)
+    assert len(quarantined) == 20
+    reasons = quarantined["reasons"].str.split(";")
+    assert reasons[:10].map(lambda r: "below_cost" in r).all()
+    assert reasons[10:15].map(lambda r: "catalog_cost_mismatch" in r).all()
+    assert reasons[15:20].map(lambda r: "unknown_product" in r).all()
+
+
+def test_new_guard_keeps_earlier_quarantine_files(demo, tmp_path):
+    products, _, _ = demo
+    first = tmp_path / "first.csv"
+    first.write_text("kept\n")
+    new_guard(products, quarantine_path=str(first))
+    assert first.read_text() == "kept\n"
+    default = new_guard(products)["quarantine_path"]
+    assert os.path.dirname(default) == QUARANTINE_DIR and not os.path.exists(default)
@@ -0,0 +1,20 @@
+import os
+
+from storage import TRANSACTIONS_DATASET
+from streaming import iter_chunks, verify_streaming
+
+
+def test_streamed_outputs_match_in_memory(demo, data_dir):
+    products, _, txns = demo
+    source = os.path.join(data_dir, TRANSACTIONS_DATASET)
+    for chunk_rows in [5_000, 100_000]:
+        checks = verify_streaming(txns, products, source=source, chunk_rows=chunk_rows)
+        assert checks["equal"].all(), (chunk_rows, checks)
+
+
+def test_chunks_honour_chunk_rows_across_files(demo, data_dir):
+    _, _, txns = demo
+    sizes = [len(chunk) for chunk in iter_chunks(os.path.join(data_dir, TRANSACTIONS_DATASET),
+                                                 chunk_rows=7_000)]
+    assert sum(sizes) == len(txns)
+    assert set(sizes[:-1]) == {7_000} and 0 < sizes[-1] <= 7_000